@@ -0,0 +1,240 @@
+"""
+Background saving.
+
+Snapshots are taken on the game thread at a tick boundary (see
+save_snapshot.take_save_snapshot); encoding, fsync and the atomic rename run
+on a worker thread so a save never stalls a frame. If saves arrive faster
+than the disk keeps up, a newer snapshot for the same file replaces the
+one still waiting.
+
+With a journal, autosaves append the actions since the previous autosave
+(see journal.py) and only write a full snapshot once the journal has
+grown past compact_bytes.
+"""
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+from farming_game.data.constants import (AUTOSAVE_PATH, AUTOSAVE_INTERVAL_MINUTES, GAME_DAY_LENGTH,
+                                         JOURNAL_COMPACT_BYTES)
+from farming_game.core.save_snapshot import SaveSnapshot, take_save_snapshot, to_json_data, write_atomic
+from farming_game.core.binary_save import encode_binary
+from farming_game.core.journal import Journal, JournalJob, journal_path
+
+SAVE_FORMATS = ("binary", "json")
+
+
+@dataclass
+class SaveJob:
+    snapshot: SaveSnapshot
+    filename: str
+    save_format: str
+    compression: str
+    reason: str
+
+    @property
+    def key(self) -> str:
+        return self.filename
+
+    def merge(self, newer: "SaveJob") -> "SaveJob":
+        return newer
+
+    def write(self) -> int:
+        if self.save_format == "json":
+            chunks = [json.dumps(to_json_data(self.snapshot), indent=2).encode("utf-8")]
+        else:
+            chunks = encode_binary(self.snapshot, self.compression)
+        return write_atomic(self.filename, chunks)
+
+
+@dataclass
+class SaveResult:
+    filename: str
+    reason: str
+    success: bool
+    size: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class Autosaver:
+    def __init__(self, filename: str = AUTOSAVE_PATH, interval_minutes: int = 0, on_day_end: bool = False,
+                 compression: str = "zlib", compact_bytes: int = JOURNAL_COMPACT_BYTES):
+        self.filename = filename
+        self.interval_minutes = interval_minutes  # 0 disables timed autosaves
+        self.on_day_end = on_day_end
+        self.compression = compression
+        self.compact_bytes = compact_bytes
+        self.journal: Optional[Journal] = None
+
+        self.condition = threading.Condition()
+        self.pending: Dict[object, object] = {}  # one SaveJob, JournalJob or SQLiteSaveJob per job.key
+        self.writing = False
+        self.thread: Optional[threading.Thread] = None
+        self.results: Deque[SaveResult] = deque()
+
+        self.day_ended = False
+        self.last_save_minute: Optional[float] = None
+        self.saves_written = 0
+        self.saves_superseded = 0
+        self.last_snapshot_seconds = 0.0
+
+    def __getstate__(self):
+        """Settings and journal only; saves still queued are not carried over."""
+        state = self.__dict__.copy()
+        for key in ("condition", "pending", "writing", "thread", "results"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.writing = False
+        self.thread = None
+        self.results = deque()
+        self.invalidate_journal()
+
+    def configure(self, filename: Optional[str] = None, interval_minutes: int = AUTOSAVE_INTERVAL_MINUTES,
+                  on_day_end: bool = True):
+        if filename is not None:
+            self.filename = filename
+        self.interval_minutes = interval_minutes
+        self.on_day_end = on_day_end
+
+    def use_journal(self, game_manager, enabled: bool = True):
+        """Switch autosaves between full snapshots and snapshot + journal."""
+        if self.journal is not None:
+            self.journal.detach()
+            self.journal = None
+        if enabled:
+            self.journal = Journal(game_manager)
+            self.journal.attach()
+
+    def invalidate_journal(self):
+        if self.journal is not None:
+            self.journal.invalidate()
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_minutes > 0 or self.on_day_end
+
+    def minutes_until_due(self, game_manager) -> Optional[float]:
+        """Game minutes until the next timed autosave, or None if there are none."""
+        if self.interval_minutes <= 0 or self.last_save_minute is None:
+            return None
+        state = game_manager.game_state
+        elapsed = state.day * GAME_DAY_LENGTH + state.time_minutes - self.last_save_minute
+        return self.interval_minutes - elapsed
+
+    def note_day_end(self):
+        self.day_ended = True
+
+    def tick(self, game_manager):
+        """Called at each tick boundary; takes an autosave snapshot when one is due."""
+        if not self.enabled:
+            return
+        state = game_manager.game_state
+        minute = state.day * GAME_DAY_LENGTH + state.time_minutes
+        if self.last_save_minute is None:
+            self.last_save_minute = minute
+
+        due = self.on_day_end and self.day_ended
+        if self.interval_minutes > 0 and minute - self.last_save_minute >= self.interval_minutes:
+            due = True
+        if not due:
+            return
+        if self.journal is not None:
+            self.save_journal(game_manager)
+        else:
+            self.request_save(game_manager, reason="autosave")
+
+    def save_journal(self, game_manager):
+        """Queue the journal's new records, or a compacted snapshot once it has grown large."""
+        journal = self.journal
+        if journal.needs_snapshot or journal.bytes_since_snapshot >= self.compact_bytes:
+            snapshot = take_save_snapshot(game_manager)
+            job = JournalJob(journal_path(self.filename), self.filename, snapshot=snapshot,
+                             header=journal.rotate(snapshot), compression=self.compression)
+        else:
+            job = JournalJob(journal_path(self.filename), self.filename, journal.take_records())
+        self.mark_saved(game_manager)
+        self.enqueue(job)
+
+    def mark_saved(self, game_manager):
+        state = game_manager.game_state
+        self.last_save_minute = state.day * GAME_DAY_LENGTH + state.time_minutes
+        self.day_ended = False
+
+    def request_save(self, game_manager, filename: Optional[str] = None, save_format: str = "binary",
+                     reason: str = "manual"):
+        """Snapshot the game now and queue the snapshot for writing in the background."""
+        if save_format not in SAVE_FORMATS:
+            raise ValueError(f"Unknown save format '{save_format}'")
+        start = time.perf_counter()
+        snapshot = take_save_snapshot(game_manager)
+        self.last_snapshot_seconds = time.perf_counter() - start
+        self.mark_saved(game_manager)
+        self.enqueue(SaveJob(snapshot, filename or self.filename, save_format, self.compression, reason))
+
+    def enqueue(self, job):
+        with self.condition:
+            queued = self.pending.get(job.key)
+            if queued is not None:
+                self.saves_superseded += 1
+                job = queued.merge(job)
+            self.pending[job.key] = job
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                if not self.pending:
+                    # Exit when idle; the next request starts a fresh worker
+                    self.thread = None
+                    self.condition.notify_all()
+                    return
+                job = self.pending.pop(next(iter(self.pending)))
+                self.writing = True
+
+            result = self.write(job)
+            with self.condition:
+                self.writing = False
+                self.results.append(result)
+                self.condition.notify_all()
+
+    def write(self, job) -> SaveResult:
+        start = time.perf_counter()
+        try:
+            size = job.write()
+        except Exception as e:
+            print(f"Failed to save game: {e}")
+            if isinstance(job, JournalJob):
+                # Records were lost, so the journal on disk has a gap
+                self.invalidate_journal()
+            return SaveResult(job.filename, job.reason, False, seconds=time.perf_counter() - start, error=str(e))
+        self.saves_written += 1
+        if job.reason != "autosave":
+            print(f"Game saved to {job.filename}")
+        return SaveResult(job.filename, job.reason, True, size, time.perf_counter() - start)
+
+    def poll_results(self) -> List[SaveResult]:
+        """Saves finished since the last call, oldest first."""
+        with self.condition:
+            results = list(self.results)
+            self.results.clear()
+        return results
+
+    def busy(self) -> bool:
+        with self.condition:
+            return bool(self.pending) or self.writing
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued save is on disk; False if timeout ran out first."""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.writing, timeout)
@@ -0,0 +1,226 @@
+"""
+Compact binary save format.
+
+Layout (little-endian):
+    header        HEADER struct: magic, format version, compression, field
+                  size, day/time, player position and money, section sizes,
+                  the farm's seed
+    string table  plant names then forage names, in interned-id order
+    inventory     item names and quantities
+    padding       up to an 8-byte boundary
+    cells         the field's packed column buffer (CELL_COLUMNS layout),
+                  optionally zlib or lzma compressed
+    forage        ForageState.pack() of the forage schedule, compressed like
+                  the cells; empty if the snapshot has none
+
+Uncompressed saves are loaded by mapping the file copy-on-write and
+handing the cell section straight to the field, so loading does not
+depend on the farm size.
+"""
+import lzma
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Tuple
+from farming_game.data.data_classes import Position
+from farming_game.core.field import NameTable, CELL_COLUMNS, COLUMN_ITEM_SIZES, CELL_RECORD_SIZE
+from farming_game.core.forage_scheduler import ForageState
+from farming_game.core.save_snapshot import SaveSnapshot, take_save_snapshot, write_atomic
+
+MAGIC = b"FGSV"
+FORMAT_VERSION = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSION_NAMES = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lzma": COMPRESSION_LZMA}
+
+# magic, version, compression, reserved, width, height, day, time_minutes,
+# player x, player y, money, string table size, inventory size,
+# stored cell bytes, raw cell bytes, seed (-1 if unknown), stored forage bytes
+HEADER = struct.Struct("<4sHBBIIIdiiqIIIIqI")
+# Version 1 header, written before the seed and forage schedule were saved
+HEADER_V1 = struct.Struct("<4sHBBIIIdiiqIIII")
+COUNT = struct.Struct("<H")
+NAME_LENGTH = struct.Struct("<H")
+QUANTITY = struct.Struct("<q")
+
+
+def pack_names(names: List[str]) -> bytes:
+    parts = [COUNT.pack(len(names))]
+    for name in names:
+        encoded = name.encode("utf-8")
+        parts.append(NAME_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def unpack_names(data, offset: int) -> Tuple[List[str], int]:
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    names = []
+    for _ in range(count):
+        (length,) = NAME_LENGTH.unpack_from(data, offset)
+        offset += NAME_LENGTH.size
+        names.append(bytes(data[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return names, offset
+
+
+def pack_inventory(inventory: Dict[str, int]) -> bytes:
+    parts = [pack_names(list(inventory))]
+    for quantity in inventory.values():
+        parts.append(QUANTITY.pack(quantity))
+    return b"".join(parts)
+
+
+def unpack_inventory(data, offset: int) -> Tuple[Dict[str, int], int]:
+    names, offset = unpack_names(data, offset)
+    inventory = {}
+    for name in names:
+        (inventory[name],) = QUANTITY.unpack_from(data, offset)
+        offset += QUANTITY.size
+    return inventory, offset
+
+
+def swap_byte_order(buffer, size: int):
+    """Byte-swap the multi-byte columns of a cell buffer in place."""
+    offset = 0
+    for _, typecode in CELL_COLUMNS:
+        length = size * COLUMN_ITEM_SIZES[typecode]
+        if COLUMN_ITEM_SIZES[typecode] > 1:
+            column = array(typecode, bytes(buffer[offset:offset + length]))
+            column.byteswap()
+            buffer[offset:offset + length] = column.tobytes()
+        offset += length
+
+
+def padding_for(offset: int) -> int:
+    return -offset % 8
+
+
+def compress(data, method: int) -> bytes:
+    if method == COMPRESSION_ZLIB:
+        return zlib.compress(data, 6)
+    if method == COMPRESSION_LZMA:
+        return lzma.compress(data)
+    return data
+
+
+def decompress(data, method: int) -> bytearray:
+    if method == COMPRESSION_ZLIB:
+        return bytearray(zlib.decompress(data))
+    if method == COMPRESSION_LZMA:
+        return bytearray(lzma.decompress(data))
+    if method == COMPRESSION_NONE:
+        return bytearray(data)
+    raise ValueError(f"Unknown compression method {method}")
+
+
+def encode_binary(snapshot: SaveSnapshot, compression: str = "none") -> List[bytes]:
+    """Serialise a snapshot in the binary format, as chunks to write in order."""
+    method = COMPRESSION_NAMES[compression]
+    size = snapshot.width * snapshot.height
+
+    string_table = pack_names(snapshot.plant_names[1:]) + pack_names(snapshot.forage_names[1:])
+    inventory = pack_inventory(snapshot.inventory)
+    cells = snapshot.cells
+    if sys.byteorder != "little":
+        cells = bytearray(cells)
+        swap_byte_order(cells, size)
+    stored = compress(cells, method)
+    forage = compress(snapshot.forage.pack(), method) if snapshot.forage is not None else b""
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, method, 0, snapshot.width, snapshot.height,
+                         snapshot.day, snapshot.time_minutes, snapshot.player_x, snapshot.player_y, snapshot.money,
+                         len(string_table), len(inventory), len(stored), len(cells),
+                         -1 if snapshot.seed is None else snapshot.seed, len(forage))
+    body_offset = HEADER.size + len(string_table) + len(inventory)
+    return [header, string_table, inventory, bytes(padding_for(body_offset)), stored, forage]
+
+
+def save_binary(game_manager, filename: str, compression: str = "none") -> int:
+    """Write the game in the binary format and return the file size."""
+    return write_atomic(filename, encode_binary(take_save_snapshot(game_manager), compression))
+
+
+def decode_binary(data) -> SaveSnapshot:
+    """Parse a binary save held in data (bytes, bytearray or mmap).
+
+    The snapshot's cells are a writable view into data when data is
+    writable and uncompressed, otherwise a new bytearray.
+    """
+    if len(data) < HEADER_V1.size:
+        raise ValueError("File too short for a binary save header")
+    (magic, version, method, _, width, height, day, time_minutes, pos_x, pos_y, money,
+     table_size, inventory_size, stored_size, raw_size) = HEADER_V1.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary save file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Save format version {version} is newer than supported ({FORMAT_VERSION})")
+    header_size = HEADER_V1.size
+    seed = None
+    forage_size = 0
+    if version >= 2:
+        if len(data) < HEADER.size:
+            raise ValueError("File too short for a binary save header")
+        seed, forage_size = HEADER.unpack_from(data, 0)[-2:]
+        header_size = HEADER.size
+        if seed < 0:
+            seed = None
+    if raw_size != width * height * CELL_RECORD_SIZE:
+        raise ValueError("Cell section size does not match the field size")
+
+    offset = header_size
+    plant_names, offset = unpack_names(data, offset)
+    forage_names, offset = unpack_names(data, offset)
+    inventory, _ = unpack_inventory(data, header_size + table_size)
+    body_offset = header_size + table_size + inventory_size
+    body_offset += padding_for(body_offset)
+    if body_offset + stored_size + forage_size > len(data):
+        raise ValueError("Binary save is truncated")
+
+    if method == COMPRESSION_NONE:
+        cells = memoryview(data)[body_offset:body_offset + raw_size]
+        if cells.readonly:
+            cells = bytearray(cells)
+    else:
+        cells = decompress(data[body_offset:body_offset + stored_size], method)
+    if len(cells) != raw_size:
+        raise ValueError("Cell section did not decompress to the expected size")
+    if sys.byteorder != "little":
+        swap_byte_order(cells, width * height)
+    forage = None
+    if forage_size:
+        forage_offset = body_offset + stored_size
+        forage = ForageState.unpack(decompress(data[forage_offset:forage_offset + forage_size], method))
+
+    return SaveSnapshot(width, height, cells, [None] + plant_names, [None] + forage_names,
+                        day, time_minutes, pos_x, pos_y, money, inventory, seed, forage)
+
+
+def apply_snapshot(game_manager, snapshot: SaveSnapshot):
+    """Make game_manager's field use the snapshot's cell buffer directly, and restore the rest of the farm."""
+    game_manager.field.adopt_buffer(snapshot.cells, snapshot.width, snapshot.height,
+                                    NameTable(snapshot.plant_names[1:]), NameTable(snapshot.forage_names[1:]))
+    player = game_manager.player
+    player.position = Position(snapshot.player_x, snapshot.player_y)
+    player.money = snapshot.money
+    player.inventory = snapshot.inventory
+    player.field_width = snapshot.width
+    player.field_height = snapshot.height
+    player.mark_changed()
+    game_manager.game_state.day = snapshot.day
+    game_manager.game_state.time_minutes = snapshot.time_minutes
+    if snapshot.seed is not None:
+        game_manager.seed = snapshot.seed
+    game_manager.resume_forage(snapshot.forage)
+
+
+def load_binary(game_manager, filename: str):
+    """Load a binary save into game_manager, mapping the cell section without copying when possible."""
+    with open(filename, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    apply_snapshot(game_manager, decode_binary(data))
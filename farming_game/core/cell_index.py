@@ -0,0 +1,137 @@
+"""
+Live indexes over a Field's cells.
+
+Field calls update() for every cell it records as changed (cell_changed,
+mark_dirty) and rebuild() when the whole grid is replaced, so the sets
+always match the columns. Queries like "is there a mature gigantic
+pumpkin" or "which plants need water" cost O(1) or O(matches) instead of
+a scan of every cell. Growth timer ticks don't change any index.
+
+newly_thirsty collects the cells that started needing water since its
+consumer (IrrigationSystem.update) last cleared it; it never holds a cell
+that no longer needs water.
+"""
+import re
+from typing import Dict, Optional, Set, Tuple
+from farming_game.data.data_classes import CELL_PLANTED, CELL_FORAGE, CELL_SPRINKLER
+from farming_game.data.constants import PLANT_REGISTRY, FORAGE_REGISTRY
+
+# (plant id, forage rarity, needs water, mature) for one indexed cell
+CellKey = Tuple[int, Optional[str], bool, bool]
+
+NON_EMPTY = re.compile(b"[^\x00]")  # cell_type bytes of cells that aren't CELL_EMPTY
+
+
+class CellIndex:
+    def __init__(self, field):
+        self.field = field
+        self.sprinkler_version = 0  # bumped whenever a sprinkler appears or goes
+        self.rebuild()
+
+    def rebuild(self):
+        """Re-index every cell, e.g. after the field's buffer or name tables were replaced."""
+        self.planted: Dict[int, Set[int]] = {}  # plant id -> cells
+        self.mature: Dict[int, Set[int]] = {}  # plant id -> fully grown cells
+        self.forage: Dict[Optional[str], Set[int]] = {}  # rarity (None if unknown) -> cells
+        self.needs_water: Set[int] = set()  # planted at a stage that needs water, not yet watered
+        self.newly_thirsty: Set[int] = set()  # joined needs_water since last cleared
+        self.sprinklers: Set[int] = set()
+        self.sprinkler_version += 1
+        self.cell_keys: Dict[int, CellKey] = {}
+        self.plant_info: Dict[int, Optional[Tuple[int, frozenset]]] = {}  # id -> (mature stage, water stages)
+        self.forage_rarity: Dict[int, Optional[str]] = {}
+        # Let the regex engine skip the empty stretches of the grid
+        for match in NON_EMPTY.finditer(self.field.cell_type.tobytes()):
+            self.update(match.start())
+
+    def lookup_plant(self, plant_id: int) -> Optional[Tuple[int, frozenset]]:
+        info = self.plant_info.get(plant_id, False)
+        if info is False:
+            plant_data = PLANT_REGISTRY.get(self.field.plant_names.names[plant_id])
+            info = None
+            if plant_data:
+                info = (plant_data.growth_stages - 1, frozenset(plant_data.water_requirements))
+            self.plant_info[plant_id] = info
+        return info
+
+    def lookup_rarity(self, forage_id: int) -> Optional[str]:
+        if forage_id not in self.forage_rarity:
+            forage_data = FORAGE_REGISTRY.get(self.field.forage_names.names[forage_id])
+            self.forage_rarity[forage_id] = forage_data.rarity if forage_data else None
+        return self.forage_rarity[forage_id]
+
+    def key_of(self, index: int) -> Optional[CellKey]:
+        field = self.field
+        kind = field.cell_type[index]
+        if kind == CELL_PLANTED and field.plant_id[index]:
+            plant_id = field.plant_id[index]
+            info = self.lookup_plant(plant_id)
+            if info is None:
+                return plant_id, None, False, False
+            stage = field.growth_stage[index]
+            thirsty = stage in info[1] and not field.watered[index]
+            return plant_id, None, thirsty, stage >= info[0]
+        if kind == CELL_FORAGE and field.forage_id[index]:
+            return 0, self.lookup_rarity(field.forage_id[index]), False, False
+        return None
+
+    def update(self, index: int):
+        """Re-index one cell from its current column values."""
+        is_sprinkler = self.field.cell_type[index] == CELL_SPRINKLER
+        if is_sprinkler != (index in self.sprinklers):
+            if is_sprinkler:
+                self.sprinklers.add(index)
+            else:
+                self.sprinklers.discard(index)
+            self.sprinkler_version += 1
+        key = self.key_of(index)
+        old = self.cell_keys.get(index)
+        if key == old:
+            return
+        if old is not None:
+            plant_id, rarity, thirsty, mature = old
+            if plant_id:
+                self.planted[plant_id].discard(index)
+                if mature:
+                    self.mature[plant_id].discard(index)
+            else:
+                self.forage[rarity].discard(index)
+            if thirsty:
+                self.needs_water.discard(index)
+                self.newly_thirsty.discard(index)
+            del self.cell_keys[index]
+        if key is not None:
+            plant_id, rarity, thirsty, mature = key
+            if plant_id:
+                self.planted.setdefault(plant_id, set()).add(index)
+                if mature:
+                    self.mature.setdefault(plant_id, set()).add(index)
+            else:
+                self.forage.setdefault(rarity, set()).add(index)
+            if thirsty:
+                self.needs_water.add(index)
+                self.newly_thirsty.add(index)
+            self.cell_keys[index] = key
+
+    def planted_cells(self, plant_type: Optional[str] = None) -> Set[int]:
+        """Planted cells, of one plant type or all; treat the result as read-only."""
+        if plant_type is not None:
+            return self.planted.get(self.field.plant_names.lookup(plant_type), set())
+        return set().union(*self.planted.values())
+
+    def mature_cells(self, plant_type: Optional[str] = None) -> Set[int]:
+        if plant_type is not None:
+            return self.mature.get(self.field.plant_names.lookup(plant_type), set())
+        return set().union(*self.mature.values())
+
+    def has_mature(self, plant_type: str) -> bool:
+        return bool(self.mature.get(self.field.plant_names.lookup(plant_type)))
+
+    def forage_cells(self, rarity: Optional[str] = None) -> Set[int]:
+        """Forage cells of one rarity, or all of them."""
+        if rarity is not None:
+            return self.forage.get(rarity, set())
+        return set().union(*self.forage.values())
+
+    def planted_count(self) -> int:
+        return sum(len(cells) for cells in self.planted.values())
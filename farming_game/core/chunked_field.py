@@ -0,0 +1,304 @@
+"""
+Chunked, sparse farm maps.
+
+A ChunkedField covers an unbounded plane (negative coordinates included)
+with fixed-size square chunks, each a small Field with its own plant and
+forage systems. Chunks are only allocated when something is planted in
+them or a caller activates them, so untouched ground costs nothing.
+
+Only loaded chunks are simulated. A chunk nobody has activated for
+idle_ticks updates is paged out: pickled whole, forage scheduler and its
+random stream included, and kept compressed in memory or written to
+page_dir. When it is needed again the updates it missed are caught up,
+growth in closed form (PlantSystem.advance_plant_growth) and forage
+through ForageScheduler.advance, so a map that pages chunks out and in
+plays out exactly like one that keeps them all loaded. This assumes one
+update per game minute, as GameManager.update drives them.
+
+save() writes every chunk in the binary save format to one file; load()
+reads it back. Each chunk's forage schedule is saved with it, so a
+loaded map carries on like the saved one.
+"""
+import os
+import pickle
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+from farming_game.data.data_classes import Position, InteractionResult
+from farming_game.data.constants import CHUNK_SIZE, CHUNK_IDLE_TICKS, GAME_DAY_LENGTH
+from farming_game.core.player import Player
+from farming_game.core.field import Field, NameTable, CellView
+from farming_game.core.save_snapshot import SaveSnapshot, write_atomic
+from farming_game.core.binary_save import encode_binary, decode_binary
+from farming_game.core.input_log import new_seed, rng_stream
+from farming_game.systems.plants import PlantSystem
+from farming_game.systems.forage import ForageSystem
+
+ChunkKey = Tuple[int, int]
+
+MAGIC = b"FGCM"
+FORMAT_VERSION = 1
+
+# magic, version, chunk size, seed, world tick, minute of the last update, chunk count
+MAP_HEADER = struct.Struct("<4sHIqqiI")
+# chunk x, chunk y, length of the chunk's binary save that follows
+CHUNK_RECORD = struct.Struct("<iiI")
+
+
+class Chunk:
+    def __init__(self, key: ChunkKey, size: int, tick: int, seed: int):
+        self.key = key
+        self.field = Field(size, size)
+        self.restart_forage(seed, tick)
+        # Per-cell growth over the planted index beats NumPy's fixed cost at chunk sizes
+        self.plant_system = PlantSystem(self.field, vectorized=False)
+        self.forage_system = ForageSystem(self.field)
+        self.ticks = tick  # world tick this chunk has been simulated up to
+        self.last_active = tick
+
+    def restart_forage(self, seed: int, tick: int):
+        """Reschedule every cell's forage from a stream of the chunk's own, fixed by seed and tick.
+
+        Its own stream, so chunks draw the same forage whatever order they are loaded in.
+        """
+        scheduler = self.field.forage_scheduler
+        scheduler.rng = rng_stream(seed, f"forage:{self.key[0]},{self.key[1]}:{tick}")
+        scheduler.reset()
+
+    @property
+    def is_empty(self) -> bool:
+        index = self.field.cell_index
+        return not any(index.planted.values()) and not any(index.forage.values())
+
+
+class ChunkedField:
+    def __init__(self, chunk_size: int = CHUNK_SIZE, idle_ticks: int = CHUNK_IDLE_TICKS,
+                 page_dir: Optional[str] = None, seed: Optional[int] = None):
+        self.chunk_size = chunk_size
+        self.seed = new_seed() if seed is None else seed
+        self.idle_ticks = idle_ticks  # 0 keeps every chunk loaded
+        self.page_dir = page_dir
+        self.chunks: Dict[ChunkKey, Chunk] = {}
+        # Paged-out chunks: key -> (tick paged out at, encoded chunk, or None if it is in page_dir)
+        self.paged: Dict[ChunkKey, Tuple[int, Optional[bytes]]] = {}
+        self.tick = 0
+        self.minute = 0  # current_time of the last update
+        self.last_eviction = 0
+        if page_dir is not None:
+            os.makedirs(page_dir, exist_ok=True)
+
+    def chunk_key(self, pos: Position) -> ChunkKey:
+        return pos.x // self.chunk_size, pos.y // self.chunk_size
+
+    def locate(self, pos: Position) -> Tuple[ChunkKey, Position]:
+        """Chunk key and the position inside that chunk."""
+        size = self.chunk_size
+        return (pos.x // size, pos.y // size), Position(pos.x % size, pos.y % size)
+
+    def get_chunk(self, pos: Position, create: bool = False) -> Optional[Chunk]:
+        """The chunk containing pos, paging it in if needed; marks it active."""
+        key = self.chunk_key(pos)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            if key in self.paged:
+                chunk = self.page_in(key)
+            elif create:
+                chunk = Chunk(key, self.chunk_size, self.tick, self.seed)
+                self.chunks[key] = chunk
+            else:
+                return None
+        chunk.last_active = self.tick
+        return chunk
+
+    def activate_around(self, pos: Position, radius: int = 1):
+        """Load and keep alive the chunks within radius chunks of pos, e.g. around the player."""
+        cx, cy = self.chunk_key(pos)
+        size = self.chunk_size
+        for y in range(cy - radius, cy + radius + 1):
+            for x in range(cx - radius, cx + radius + 1):
+                self.get_chunk(Position(x * size, y * size), create=True)
+
+    def get_cell(self, pos: Position) -> Optional[CellView]:
+        """The cell at pos, or None if its chunk was never allocated (it is empty ground)."""
+        chunk = self.get_chunk(pos)
+        if chunk is None:
+            return None
+        return chunk.field.get_cell(Position(pos.x % self.chunk_size, pos.y % self.chunk_size))
+
+    # Actions, routed to the owning chunk's systems
+
+    def plant_seed(self, player: Player, pos: Position, plant_type: str) -> InteractionResult:
+        chunk = self.get_chunk(pos, create=True)
+        return chunk.plant_system.plant_seed(player, self.locate(pos)[1], plant_type)
+
+    def water_plant(self, pos: Position) -> InteractionResult:
+        chunk = self.get_chunk(pos)
+        if chunk is None:
+            return InteractionResult.NOT_POSSIBLE
+        return chunk.plant_system.water_plant(self.locate(pos)[1])
+
+    def harvest_plant(self, player: Player, pos: Position) -> InteractionResult:
+        chunk = self.get_chunk(pos)
+        if chunk is None:
+            return InteractionResult.NOTHING_TO_HARVEST
+        return chunk.plant_system.harvest_plant(player, self.locate(pos)[1])
+
+    def forage_item(self, player: Player, pos: Position) -> InteractionResult:
+        chunk = self.get_chunk(pos)
+        if chunk is None:
+            return InteractionResult.NOTHING_TO_HARVEST
+        return chunk.forage_system.forage_item(player, self.locate(pos)[1])
+
+    # Simulation
+
+    def update(self, current_time: int):
+        """One growth/forage update of every loaded chunk, like GameManager.update's per-minute step."""
+        self.tick += 1
+        self.minute = current_time
+        for chunk in self.chunks.values():
+            chunk.plant_system.update_plant_growth(current_time)
+            chunk.field.update_forage_spawns(current_time)
+            chunk.ticks = self.tick
+        if self.idle_ticks and self.tick - self.last_eviction >= self.idle_ticks:
+            self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """Page out chunks idle for idle_ticks; returns how many were unloaded.
+
+        Empty chunks are paged out too: forage can still spawn in them.
+        """
+        self.last_eviction = self.tick
+        idle = [key for key, chunk in self.chunks.items() if self.tick - chunk.last_active >= self.idle_ticks]
+        for key in idle:
+            self.page_out(self.chunks.pop(key))
+        return len(idle)
+
+    def page_path(self, key: ChunkKey) -> str:
+        return os.path.join(self.page_dir, f"chunk_{key[0]}_{key[1]}.page")
+
+    def page_out(self, chunk: Chunk):
+        data = zlib.compress(pickle.dumps(chunk, pickle.HIGHEST_PROTOCOL), 1)
+        if self.page_dir is None:
+            self.paged[chunk.key] = (chunk.ticks, data)
+        else:
+            # Swap space, not a save: no need to fsync
+            with open(self.page_path(chunk.key), "wb") as f:
+                f.write(data)
+            self.paged[chunk.key] = (chunk.ticks, None)
+
+    def page_in(self, key: ChunkKey) -> Chunk:
+        ticks, data = self.paged.pop(key)
+        if data is None:
+            path = self.page_path(key)
+            with open(path, "rb") as f:
+                data = f.read()
+            os.remove(path)
+        chunk = pickle.loads(zlib.decompress(data))
+        self.catch_up(chunk)
+        chunk.last_active = self.tick
+        self.chunks[key] = chunk
+        return chunk
+
+    def catch_up(self, chunk: Chunk):
+        """Apply the updates a paged-out chunk missed, as if it had stayed loaded."""
+        missed = self.tick - chunk.ticks
+        if missed <= 0:
+            return
+        chunk.plant_system.advance_plant_growth(missed)
+        # Forage updates are split at midnight, where the minute wraps back to 0
+        minute = (self.minute - missed + 1) % GAME_DAY_LENGTH
+        while missed > 0:
+            run = min(missed, GAME_DAY_LENGTH - minute)
+            chunk.field.advance_forage_spawns(run, minute)
+            missed -= run
+            minute = 0
+        chunk.ticks = self.tick
+
+    # Saving
+
+    def save(self, filename: str) -> int:
+        """Write every chunk to filename in one file; returns its size."""
+        paged = list(self.paged)
+        for key in paged:
+            self.page_in(key)
+        parts = [MAP_HEADER.pack(MAGIC, FORMAT_VERSION, self.chunk_size, self.seed, self.tick, self.minute,
+                                 len(self.chunks))]
+        for key, chunk in sorted(self.chunks.items()):
+            field = chunk.field
+            snapshot = SaveSnapshot(field.width, field.height, field.snapshot_buffer(),
+                                    list(field.plant_names.names), list(field.forage_names.names),
+                                    0, 0, 0, 0, 0, {}, forage=field.forage_scheduler.save_state())
+            data = b"".join(encode_binary(snapshot, "zlib"))
+            parts += [CHUNK_RECORD.pack(key[0], key[1], len(data)), data]
+        for key in paged:
+            self.page_out(self.chunks.pop(key))
+        return write_atomic(filename, parts)
+
+    @classmethod
+    def load(cls, filename: str, idle_ticks: int = CHUNK_IDLE_TICKS,
+             page_dir: Optional[str] = None) -> "ChunkedField":
+        """Read a map written by save()."""
+        with open(filename, "rb") as f:
+            data = f.read()
+        if len(data) < MAP_HEADER.size:
+            raise ValueError("Not a chunked map save")
+        magic, version, chunk_size, seed, tick, minute, count = MAP_HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version > FORMAT_VERSION:
+            raise ValueError("Not a chunked map save")
+        world = cls(chunk_size, idle_ticks, page_dir, seed)
+        world.tick = world.last_eviction = tick
+        world.minute = minute
+        offset = MAP_HEADER.size
+        for _ in range(count):
+            x, y, length = CHUNK_RECORD.unpack_from(data, offset)
+            offset += CHUNK_RECORD.size
+            snapshot = decode_binary(data[offset:offset + length])
+            offset += length
+            chunk = Chunk((x, y), chunk_size, tick, seed)
+            chunk.field.adopt_buffer(snapshot.cells, snapshot.width, snapshot.height,
+                                     NameTable(snapshot.plant_names[1:]), NameTable(snapshot.forage_names[1:]))
+            if snapshot.forage is not None:
+                chunk.field.forage_scheduler.restore_state(snapshot.forage)
+            else:
+                chunk.restart_forage(seed, tick)
+            world.chunks[(x, y)] = chunk
+        return world
+
+    # Queries
+
+    def visible_chunks(self, left: int, top: int, right: int, bottom: int) -> Iterator[Chunk]:
+        """Loaded or paged chunks overlapping cells [left, right) x [top, bottom), paged ones loaded back.
+
+        Being on screen counts as activity, so visible chunks stay loaded.
+        """
+        size = self.chunk_size
+        first_x, first_y = left // size, top // size
+        last_x, last_y = (right - 1) // size, (bottom - 1) // size
+        for cy in range(first_y, last_y + 1):
+            for cx in range(first_x, last_x + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None and (cx, cy) in self.paged:
+                    chunk = self.page_in((cx, cy))
+                if chunk is not None:
+                    chunk.last_active = self.tick
+                    yield chunk
+
+    def chunk_origin(self, chunk: Chunk) -> Position:
+        return Position(chunk.key[0] * self.chunk_size, chunk.key[1] * self.chunk_size)
+
+    def planted_positions(self) -> List[Position]:
+        """World positions of every planted cell in loaded chunks."""
+        positions = []
+        for chunk in self.chunks.values():
+            origin = self.chunk_origin(chunk)
+            for index in chunk.field.cell_index.planted_cells():
+                positions.append(origin + chunk.field.position_of(index))
+        return positions
+
+    @property
+    def loaded_count(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def paged_count(self) -> int:
+        return len(self.paged)
@@ -1,70 +1,418 @@
 """
 Field grid system and cell management.
+
+Cells are stored column-wise: one compact typed array per CellState
+attribute, all packed into a single buffer and indexed by y * width + x.
+Plant and forage names are interned to small integer ids.
 """
-from typing import List, Optional
-import random
-from farming_game.data.data_classes import Position, CellState, CellType, InteractionResult
-from farming_game.data.constants import FIELD_WIDTH, FIELD_HEIGHT, FORAGE_REGISTRY
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from farming_game.data.data_classes import (Position, CellState, CellType, InteractionResult,
+                                            CELL_EMPTY, CELL_PLANTED, CELL_FORAGE, CELL_TYPES, CELL_TYPE_CODES)
+from farming_game.data.constants import FIELD_WIDTH, FIELD_HEIGHT, FORAGE_REGISTRY, PLANT_REGISTRY
+from farming_game.core.forage_scheduler import ForageScheduler
+from farming_game.core.cell_index import CellIndex
+
+# Column layout of the cell store: (attribute name, array typecode).
+# Wider columns come first so every column stays naturally aligned.
+CELL_COLUMNS = (
+    ("plant_timer", "i"),
+    ("forage_spawn_time", "i"),
+    ("cell_type", "B"),
+    ("plant_id", "B"),
+    ("growth_stage", "B"),
+    ("watered", "B"),
+    ("forage_id", "B"),
+)
+COLUMN_ITEM_SIZES = {"i": 4, "B": 1}
+CELL_RECORD_SIZE = sum(COLUMN_ITEM_SIZES[code] for _, code in CELL_COLUMNS)
+
+
+def column_views(buffer, size: int) -> Dict[str, memoryview]:
+    """Typed views of each column in a buffer laid out as CELL_COLUMNS."""
+    view = memoryview(buffer)
+    columns = {}
+    offset = 0
+    for name, typecode in CELL_COLUMNS:
+        length = size * COLUMN_ITEM_SIZES[typecode]
+        columns[name] = view[offset:offset + length].cast(typecode)
+        offset += length
+    return columns
+
+
+def changed_between(current, baseline, size: int, block: int = 256) -> List[int]:
+    """Indices of cells that differ between two buffers in the CELL_COLUMNS layout.
+
+    Columns are compared a block at a time, so unchanged stretches cost
+    one bytes comparison each.
+    """
+    changed: Set[int] = set()
+    current = memoryview(current)
+    previous = memoryview(baseline)
+    offset = 0
+    for _, typecode in CELL_COLUMNS:
+        item_size = COLUMN_ITEM_SIZES[typecode]
+        for start in range(0, size, block):
+            stop = min(start + block, size)
+            lo, hi = offset + start * item_size, offset + stop * item_size
+            if current[lo:hi] == previous[lo:hi]:
+                continue
+            new_values = current[lo:hi].cast(typecode)
+            old_values = previous[lo:hi].cast(typecode)
+            for i in range(stop - start):
+                if new_values[i] != old_values[i]:
+                    changed.add(start + i)
+        offset += size * item_size
+    return sorted(changed)
+
+
+class NameTable:
+    """Interns names to small integer ids. Id 0 is reserved for None."""
+
+    def __init__(self, names: Iterable[str] = (), max_ids: int = 255):
+        self.names: List[Optional[str]] = [None]
+        self.ids: Dict[str, int] = {}
+        self.max_ids = max_ids
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: Optional[str]) -> int:
+        if name is None:
+            return 0
+        name_id = self.ids.get(name)
+        if name_id is None:
+            if len(self.names) > self.max_ids:
+                raise ValueError(f"Too many distinct names to intern '{name}'")
+            name_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = name_id
+        return name_id
+
+    def lookup(self, name: Optional[str]) -> int:
+        """Id of an already interned name, or -1 if it was never seen."""
+        if name is None:
+            return 0
+        return self.ids.get(name, -1)
+
+    def name(self, name_id: int) -> Optional[str]:
+        return self.names[name_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class CellView:
+    """Live view of one cell in a Field's column store.
+
+    Exposes the same attributes as CellState, so code written against
+    CellState objects can keep reading and writing cells through it.
+    """
+    __slots__ = ("field", "index")
+
+    def __init__(self, field: "Field", index: int):
+        self.field = field
+        self.index = index
+
+    @property
+    def cell_type(self) -> CellType:
+        return CELL_TYPES[self.field.cell_type[self.index]]
+
+    @cell_type.setter
+    def cell_type(self, value: CellType):
+        self.field.cell_type[self.index] = CELL_TYPE_CODES[value]
+        self.field.cell_changed(self.index)
+
+    @property
+    def plant_type(self) -> Optional[str]:
+        return self.field.plant_names.name(self.field.plant_id[self.index])
+
+    @plant_type.setter
+    def plant_type(self, value: Optional[str]):
+        self.field.plant_id[self.index] = self.field.plant_names.intern(value)
+        self.field.cell_changed(self.index)
+
+    @property
+    def growth_stage(self) -> int:
+        return self.field.growth_stage[self.index]
+
+    @growth_stage.setter
+    def growth_stage(self, value: int):
+        self.field.growth_stage[self.index] = value
+        self.field.cell_changed(self.index)
+
+    @property
+    def watered(self) -> bool:
+        return bool(self.field.watered[self.index])
+
+    @watered.setter
+    def watered(self, value: bool):
+        self.field.watered[self.index] = 1 if value else 0
+        self.field.cell_changed(self.index)
+
+    @property
+    def forage_item(self) -> Optional[str]:
+        return self.field.forage_names.name(self.field.forage_id[self.index])
+
+    @forage_item.setter
+    def forage_item(self, value: Optional[str]):
+        self.field.forage_id[self.index] = self.field.forage_names.intern(value)
+        self.field.cell_changed(self.index)
+
+    @property
+    def forage_spawn_time(self) -> int:
+        return self.field.forage_spawn_time[self.index]
+
+    @forage_spawn_time.setter
+    def forage_spawn_time(self, value: int):
+        self.field.forage_spawn_time[self.index] = value
+        self.field.cell_changed(self.index)
+
+    @property
+    def plant_timer(self) -> int:
+        return self.field.plant_timer[self.index]
+
+    @plant_timer.setter
+    def plant_timer(self, value: int):
+        self.field.plant_timer[self.index] = value
+        self.field.cell_changed(self.index)
+
+    def to_state(self) -> CellState:
+        """Detached CellState copy of this cell."""
+        return CellState(
+            cell_type=self.cell_type,
+            plant_type=self.plant_type,
+            growth_stage=self.growth_stage,
+            watered=self.watered,
+            forage_item=self.forage_item,
+            forage_spawn_time=self.forage_spawn_time,
+            plant_timer=self.plant_timer,
+        )
+
+    def __repr__(self) -> str:
+        return f"CellView({self.field.position_of(self.index)}, {self.to_state()})"
+
 
 class Field:
-    def __init__(self):
-        self.cells: List[List[CellState]] = []
-        self.initialize_field()
-    
+    def __init__(self, width: int = FIELD_WIDTH, height: int = FIELD_HEIGHT):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.plant_names = NameTable(PLANT_REGISTRY)
+        self.forage_names = NameTable(FORAGE_REGISTRY)
+        self.buffer = bytearray(self.size * CELL_RECORD_SIZE)
+        self.bind_columns()
+        # Cells whose appearance may have changed since the renderer last looked
+        self.dirty: Set[int] = set(range(self.size))
+        self.version = 0  # bumped on every change to any column
+        # Version of each cell's last visible change, least recently changed first
+        self.cell_versions: Dict[int, int] = {}
+        self.reset_version = 0  # every cell counts as changed at this version
+        self.cell_index = CellIndex(self)
+        self.forage_scheduler = ForageScheduler(self)
+        self.journal = None  # save journal recording edits, if one is attached
+
+    def __getstate__(self):
+        # Columns are views into buffer; rebind them after unpickling
+        state = {key: value for key, value in self.__dict__.items()
+                 if key not in dict(CELL_COLUMNS)}
+        if not isinstance(self.buffer, bytearray):
+            state["buffer"] = bytearray(self.buffer)  # e.g. a slice of a mapped save file
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.bind_columns()
+
+    def adopt_buffer(self, buffer, width: int, height: int, plant_names: NameTable, forage_names: NameTable):
+        """Switch the field over to an existing cell buffer without copying it.
+
+        buffer may be any writable buffer in the CELL_COLUMNS layout, e.g. a
+        slice of a copy-on-write mmap; plant and forage ids in it refer to
+        the given name tables.
+        """
+        if len(buffer) != width * height * CELL_RECORD_SIZE:
+            raise ValueError(f"Cell buffer holds {len(buffer)} bytes, expected {width * height * CELL_RECORD_SIZE}")
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.plant_names = plant_names
+        self.forage_names = forage_names
+        self.buffer = buffer
+        self.bind_columns()
+        self.dirty = set(range(self.size))
+        self.version += 1
+        self.mark_all_changed()
+        self.forage_scheduler.build_tables()
+        self.forage_scheduler.reset()
+
+    def bind_columns(self):
+        """Point each column attribute at its slice of the cell buffer."""
+        for name, column in column_views(self.buffer, self.size).items():
+            setattr(self, name, column)
+
     def initialize_field(self):
-        self.cells = [[CellState() for _ in range(FIELD_WIDTH)] for _ in range(FIELD_HEIGHT)]
-    
-    def get_cell(self, pos: Position) -> Optional[CellState]:
+        self.buffer[:] = bytes(len(self.buffer))
+        self.dirty.update(range(self.size))
+        self.version += 1
+        self.mark_all_changed()
+        self.forage_scheduler.reset()
+
+    def cell_changed(self, index: int):
+        """Record an edit made through a view or set_cell."""
+        self.dirty.add(index)
+        self.version += 1
+        versions = self.cell_versions
+        versions.pop(index, None)  # Re-insert so the dict stays in version order
+        versions[index] = self.version
+        self.cell_index.update(index)
+        self.forage_scheduler.cell_changed(index)
+        if self.journal is not None:
+            self.journal.touched.add(index)
+
+    def mark_dirty(self, indices: Iterable[int]):
+        """Record cells changed by a batched update writing the columns directly."""
+        if indices:
+            self.dirty.update(indices)
+            self.version += 1
+            if len(indices) >= self.size:
+                self.mark_all_changed()
+                return
+            versions = self.cell_versions
+            version = self.version
+            update_index = self.cell_index.update
+            for index in indices:
+                versions.pop(index, None)
+                versions[index] = version
+                update_index(index)
+
+    def cells_changed(self, indices: Sequence[int]):
+        """Record edits to many cells written straight into the columns, like cell_changed for each."""
+        if not indices:
+            return
+        self.mark_dirty(indices)
+        scheduler_changed = self.forage_scheduler.cell_changed
+        for index in indices:
+            scheduler_changed(index)
+        if self.journal is not None:
+            self.journal.touched.update(indices)
+
+    def mark_all_changed(self):
+        """Every cell changed at the current version, e.g. after a load."""
+        self.reset_version = self.version
+        self.cell_versions.clear()
+        self.cell_index.rebuild()
+
+    def changed_since(self, version: int) -> Sequence[int]:
+        """Cells that visibly changed after `version` (a value of self.version).
+
+        Walks cell_versions from the newest end, so the cost is proportional
+        to the number of cells changed, not to the field size. Growth timer
+        ticks (see touch) are not tracked.
+        """
+        if version < self.reset_version:
+            return range(self.size)
+        changed = []
+        for index, stamp in reversed(self.cell_versions.items()):
+            if stamp <= version:
+                break
+            changed.append(index)
+        return changed
+
+    def log_event(self, kind: int, index: int):
+        """Record an action that changed a cell in the attached journal."""
+        if self.journal is not None:
+            self.journal.log_cell(kind, index)
+
+    def log_events(self, kind: int, indices: Iterable[int]):
+        if self.journal is not None:
+            for index in indices:
+                self.journal.log_cell(kind, index)
+
+    def touch(self):
+        """Record a column change that doesn't alter how any cell looks (e.g. growth timers)."""
+        self.version += 1
+
+    def take_dirty(self) -> Set[int]:
+        """Return and clear the set of cells changed since the last call."""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def index_of(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
+
+    def position_of(self, index: int) -> Position:
+        return Position(index % self.width, index // self.width)
+
+    def rect_indices(self, left: int, top: int, width: int, height: int) -> List[int]:
+        """Indices of the cells in a rectangle, clipped to the field, row by row."""
+        x0, x1 = max(left, 0), min(left + width, self.width)
+        indices = []
+        if x0 < x1:
+            for y in range(max(top, 0), min(top + height, self.height)):
+                indices.extend(range(y * self.width + x0, y * self.width + x1))
+        return indices
+
+    def indices_of(self, positions: Iterable[Position]) -> List[int]:
+        """Index of each position's cell, or -1 for positions off the field."""
+        return [pos.y * self.width + pos.x if 0 <= pos.x < self.width and 0 <= pos.y < self.height else -1
+                for pos in positions]
+
+    def get_cell(self, pos: Position) -> Optional[CellView]:
         """Get cell at given position if valid."""
-        if 0 <= pos.x < FIELD_WIDTH and 0 <= pos.y < FIELD_HEIGHT:
-            return self.cells[pos.y][pos.x]
+        if 0 <= pos.x < self.width and 0 <= pos.y < self.height:
+            return CellView(self, pos.y * self.width + pos.x)
         return None
-    
+
     def set_cell(self, pos: Position, cell: CellState) -> bool:
-        if 0 <= pos.x < FIELD_WIDTH and 0 <= pos.y < FIELD_HEIGHT:
-            self.cells[pos.y][pos.x] = cell
+        if 0 <= pos.x < self.width and 0 <= pos.y < self.height:
+            i = pos.y * self.width + pos.x
+            self.cell_type[i] = CELL_TYPE_CODES[cell.cell_type]
+            self.plant_id[i] = self.plant_names.intern(cell.plant_type)
+            self.growth_stage[i] = cell.growth_stage
+            self.watered[i] = 1 if cell.watered else 0
+            self.forage_id[i] = self.forage_names.intern(cell.forage_item)
+            self.forage_spawn_time[i] = cell.forage_spawn_time
+            self.plant_timer[i] = cell.plant_timer
+            self.cell_changed(i)
             return True
         return False
-    
+
     def is_valid_position(self, pos: Position) -> bool:
-        return 0 <= pos.x < FIELD_WIDTH and 0 <= pos.y < FIELD_HEIGHT
-    
+        return 0 <= pos.x < self.width and 0 <= pos.y < self.height
+
     def can_plant_at(self, pos: Position) -> bool:
-        cell = self.get_cell(pos)
-        return cell is not None and cell.cell_type == CellType.EMPTY
-    
+        if not self.is_valid_position(pos):
+            return False
+        return self.cell_type[self.index_of(pos)] == CELL_EMPTY
+
     def can_harvest_at(self, pos: Position) -> bool:
-        cell = self.get_cell(pos)
-        if cell is None or cell.cell_type != CellType.PLANTED:
+        if not self.is_valid_position(pos):
             return False
-        return cell.plant_type is not None
-    
+        i = self.index_of(pos)
+        return self.cell_type[i] == CELL_PLANTED and self.plant_id[i] != 0
+
     def can_forage_at(self, pos: Position) -> bool:
-        cell = self.get_cell(pos)
-        return cell is not None and cell.cell_type == CellType.FORAGE and cell.forage_item is not None
-    
+        if not self.is_valid_position(pos):
+            return False
+        i = self.index_of(pos)
+        return self.cell_type[i] == CELL_FORAGE and self.forage_id[i] != 0
+
     def update_forage_spawns(self, current_time: int):
-        for y in range(FIELD_HEIGHT):
-            for x in range(FIELD_WIDTH):
-                cell = self.cells[y][x]
-                
-                # Only spawn on empty cells
-                if cell.cell_type == CellType.EMPTY:
-                    # Attempt to spawn forage items
-                    for forage_id, forage_data in FORAGE_REGISTRY.items():
-                        if random.random() < forage_data.spawn_probability / 1000:  # Reduced probability per frame
-                            cell.cell_type = CellType.FORAGE
-                            cell.forage_item = forage_id
-                            cell.forage_spawn_time = current_time
-                            break
-                
-                # Remove expired forage items
-                elif cell.cell_type == CellType.FORAGE and cell.forage_item:
-                    forage_data = FORAGE_REGISTRY.get(cell.forage_item)
-                    if forage_data and current_time - cell.forage_spawn_time >= forage_data.respawn_time:
-                        cell.cell_type = CellType.EMPTY
-                        cell.forage_item = None
-                        cell.forage_spawn_time = 0
-    
-    def get_all_cells(self) -> List[List[CellState]]:
-        return self.cells
\ No newline at end of file
+        """Apply the forage spawns and expiries due at this update."""
+        return self.forage_scheduler.update(current_time)
+
+    def advance_forage_spawns(self, ticks: int, first_minute: int):
+        """Apply `ticks` consecutive forage updates starting at `first_minute`."""
+        self.forage_scheduler.advance(ticks, first_minute)
+
+    def snapshot_buffer(self) -> bytes:
+        """Immutable copy of every column, for diffing with changed_cells later."""
+        return bytes(self.buffer)
+
+    def changed_cells(self, baseline: bytes, block: int = 256) -> List[int]:
+        """Indices of cells that differ from a snapshot_buffer() taken earlier."""
+        return changed_between(self.buffer, baseline, self.size, block)
+
+    def get_all_cells(self) -> List[List[CellView]]:
+        """Row-major grid of live cell views."""
+        return [[CellView(self, y * self.width + x) for x in range(self.width)]
+                for y in range(self.height)]
@@ -0,0 +1,283 @@
+"""
+Event-driven forage spawning and expiry.
+
+Each empty cell rolls for a forage item once per forage update, trying
+every forage type in registry order until one succeeds. Instead of
+rolling, the scheduler draws how many updates pass until the first
+success (a geometric distribution with the combined probability) and
+which type it is (one weighted choice), and keeps both spawns and
+expiries in priority queues. An update only touches cells that change.
+
+save_state() captures the schedule and the random stream for a save, so
+a loaded farm draws the same forage as the one that was saved.
+"""
+import bisect
+import heapq
+import math
+import random
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from farming_game.data.data_classes import CELL_EMPTY, CELL_FORAGE, EVENT_SPAWN, EVENT_EXPIRE
+from farming_game.data.constants import FORAGE_REGISTRY, GAME_DAY_LENGTH
+
+NOT_SCHEDULED = -1
+
+# tick, cell count, pending cell count, random state version, gauss_next (NaN if none),
+# random state word count; the words, spawn dues, expiry dues and pending cells follow
+STATE_HEADER = struct.Struct("<qIIIdI")
+
+
+@dataclass
+class ForageState:
+    """A ForageScheduler's tick, random stream and queued events, detached for a save."""
+    tick: int
+    rng_state: tuple
+    spawn_due: List[int]
+    expiry_due: List[int]
+    pending: List[int]
+
+    def pack(self) -> bytes:
+        version, words, gauss_next = self.rng_state
+        header = STATE_HEADER.pack(self.tick, len(self.spawn_due), len(self.pending), version,
+                                   math.nan if gauss_next is None else gauss_next, len(words))
+        arrays = [array("I", words), array("q", self.spawn_due), array("q", self.expiry_due),
+                  array("I", self.pending)]
+        if sys.byteorder != "little":
+            for values in arrays:
+                values.byteswap()
+        return header + b"".join(values.tobytes() for values in arrays)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "ForageState":
+        tick, size, pending_count, version, gauss_next, word_count = STATE_HEADER.unpack_from(data, 0)
+        offset = STATE_HEADER.size
+        arrays = []
+        for typecode, count in (("I", word_count), ("q", size), ("q", size), ("I", pending_count)):
+            values = array(typecode)
+            end = offset + count * values.itemsize
+            if end > len(data):
+                raise ValueError("Forage state is truncated")
+            values.frombytes(data[offset:end])
+            if sys.byteorder != "little":
+                values.byteswap()
+            arrays.append(values)
+            offset = end
+        words, spawn_due, expiry_due, pending = arrays
+        rng_state = (version, tuple(words), None if math.isnan(gauss_next) else gauss_next)
+        return cls(tick, rng_state, spawn_due.tolist(), expiry_due.tolist(), pending.tolist())
+
+
+class ForageScheduler:
+    def __init__(self, field):
+        self.field = field
+        self.rng = random
+        self.tick = 0
+        self.build_tables()
+        self.reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.rng is random:
+            state["rng"] = None  # The shared module generator cannot be pickled
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+
+    def build_tables(self):
+        """Combined spawn chance per update and the cumulative type weights."""
+        names = self.field.forage_names
+        self.forage_ids: List[int] = []
+        self.cumulative_weights: List[float] = []
+        self.respawn_times: Dict[int, int] = {}
+        miss_chance = 1.0
+        for name, forage_data in FORAGE_REGISTRY.items():
+            chance = forage_data.spawn_probability / 1000
+            forage_id = names.intern(name)
+            self.forage_ids.append(forage_id)
+            # Type i wins when every earlier type missed and i hit
+            self.cumulative_weights.append(1.0 - miss_chance * (1.0 - chance))
+            miss_chance *= 1.0 - chance
+            self.respawn_times[forage_id] = forage_data.respawn_time
+        self.spawn_chance = 1.0 - miss_chance
+        self.log_miss_chance = math.log(miss_chance) if miss_chance > 0 else None
+
+    def reset(self):
+        """Forget all pending events and reschedule every cell."""
+        size = self.field.size
+        self.spawn_due: List[int] = [NOT_SCHEDULED] * size
+        self.expiry_due: List[int] = [NOT_SCHEDULED] * size
+        self.spawn_queue: List[Tuple[int, int]] = []
+        self.expiry_queue: List[Tuple[int, int]] = []
+        self.pending: Set[int] = set(range(size))
+
+    def save_state(self) -> ForageState:
+        return ForageState(self.tick, self.rng.getstate(), list(self.spawn_due), list(self.expiry_due),
+                           sorted(self.pending))
+
+    def restore_state(self, state: ForageState):
+        """Pick up where the scheduler that saved state left off; the field must hold the saved cells."""
+        if len(state.spawn_due) != self.field.size or len(state.expiry_due) != self.field.size:
+            raise ValueError("Forage state is for a field of a different size")
+        self.tick = state.tick
+        self.rng = random.Random()
+        self.rng.setstate(state.rng_state)
+        self.spawn_due = list(state.spawn_due)
+        self.expiry_due = list(state.expiry_due)
+        # Entries the saved queues held for superseded events would have been skipped anyway
+        self.spawn_queue = [(due, i) for i, due in enumerate(self.spawn_due) if due != NOT_SCHEDULED]
+        self.expiry_queue = [(due, i) for i, due in enumerate(self.expiry_due) if due != NOT_SCHEDULED]
+        heapq.heapify(self.spawn_queue)
+        heapq.heapify(self.expiry_queue)
+        self.pending = set(state.pending)
+
+    def cell_changed(self, index: int):
+        """Called when a cell was edited outside the scheduler."""
+        self.pending.add(index)
+
+    def draw_spawn_delay(self) -> int:
+        """Number of updates until an empty cell's roll first succeeds."""
+        if self.spawn_chance <= 0:
+            return NOT_SCHEDULED
+        if self.log_miss_chance is None:
+            return 1
+        # 1 - random() is in (0, 1], so the log is always defined
+        return int(math.log(1.0 - self.rng.random()) / self.log_miss_chance) + 1
+
+    def draw_forage_id(self) -> int:
+        roll = self.rng.random() * self.spawn_chance
+        slot = bisect.bisect_right(self.cumulative_weights, roll)
+        return self.forage_ids[min(slot, len(self.forage_ids) - 1)]
+
+    def schedule_spawn(self, index: int, after_tick: int):
+        delay = self.draw_spawn_delay()
+        if delay == NOT_SCHEDULED:
+            self.spawn_due[index] = NOT_SCHEDULED
+            return
+        due = after_tick + delay
+        self.spawn_due[index] = due
+        heapq.heappush(self.spawn_queue, (due, index))
+
+    def schedule_expiry(self, index: int, current_time: int):
+        field = self.field
+        respawn_time = self.respawn_times.get(field.forage_id[index])
+        if respawn_time is None:
+            # Unknown forage items never expire
+            self.expiry_due[index] = NOT_SCHEDULED
+            return
+        age = current_time - field.forage_spawn_time[index]
+        if age < 0:
+            # Spawned before the day rolled over
+            age += GAME_DAY_LENGTH
+        due = self.tick + respawn_time - age
+        self.expiry_due[index] = due
+        heapq.heappush(self.expiry_queue, (due, index))
+
+    def reschedule(self, index: int, current_time: int):
+        """Replace a cell's pending events based on its current contents."""
+        self.spawn_due[index] = NOT_SCHEDULED
+        self.expiry_due[index] = NOT_SCHEDULED
+        kind = self.field.cell_type[index]
+        if kind == CELL_EMPTY:
+            # The cell gets its first roll during this update
+            self.schedule_spawn(index, self.tick - 1)
+        elif kind == CELL_FORAGE and self.field.forage_id[index]:
+            self.schedule_expiry(index, current_time)
+
+    def update(self, current_time: int):
+        field = self.field
+        cell_type = field.cell_type
+        self.tick += 1
+        tick = self.tick
+
+        if self.pending:
+            pending, self.pending = self.pending, set()
+            # In index order, so the draws don't depend on how the set was built
+            for index in sorted(pending):
+                self.reschedule(index, current_time)
+
+        # Collect both kinds of due events before applying either, so a cell
+        # that expires cannot respawn, and a fresh spawn cannot expire, in
+        # the same update
+        spawns = []
+        spawn_queue, spawn_due = self.spawn_queue, self.spawn_due
+        while spawn_queue and spawn_queue[0][0] <= tick:
+            due, index = heapq.heappop(spawn_queue)
+            if spawn_due[index] == due:
+                spawn_due[index] = NOT_SCHEDULED
+                if cell_type[index] == CELL_EMPTY:
+                    spawns.append(index)
+
+        expiries = []
+        expiry_queue, expiry_due = self.expiry_queue, self.expiry_due
+        while expiry_queue and expiry_queue[0][0] <= tick:
+            due, index = heapq.heappop(expiry_queue)
+            if expiry_due[index] == due:
+                expiry_due[index] = NOT_SCHEDULED
+                if cell_type[index] == CELL_FORAGE:
+                    expiries.append(index)
+
+        for index in spawns:
+            forage_id = self.draw_forage_id()
+            cell_type[index] = CELL_FORAGE
+            field.forage_id[index] = forage_id
+            field.forage_spawn_time[index] = current_time
+            due = tick + self.respawn_times[forage_id]
+            expiry_due[index] = due
+            heapq.heappush(expiry_queue, (due, index))
+
+        for index in expiries:
+            cell_type[index] = CELL_EMPTY
+            field.forage_id[index] = 0
+            field.forage_spawn_time[index] = 0
+            self.schedule_spawn(index, tick)
+
+        field.mark_dirty(spawns)
+        field.mark_dirty(expiries)
+        field.log_events(EVENT_SPAWN, spawns)
+        field.log_events(EVENT_EXPIRE, expiries)
+        self.compact_queues()
+        return spawns, expiries
+
+    def next_event_tick(self):
+        """Earliest queued event tick (possibly a stale entry), or None."""
+        heads = [queue[0][0] for queue in (self.spawn_queue, self.expiry_queue) if queue]
+        return min(heads) if heads else None
+
+    def ticks_until_next_event(self):
+        """Updates until the next spawn or expiry may happen, or None if none is queued."""
+        if self.pending:
+            return 1
+        due = self.next_event_tick()
+        return None if due is None else max(due - self.tick, 1)
+
+    def advance(self, ticks: int, first_minute: int):
+        """Run `ticks` updates at once, visiting only the ticks that have events.
+
+        The updates are assumed to fall on consecutive game minutes starting
+        at `first_minute`, within a single day.
+        """
+        start = self.tick
+        target = start + ticks
+        while self.tick < target:
+            due = self.tick + 1 if self.pending else self.next_event_tick()
+            if due is None or due > target:
+                break
+            self.tick = max(due, self.tick + 1) - 1
+            self.update(first_minute + self.tick - start)
+        self.tick = target
+
+    def compact_queues(self):
+        """Drop stale queue entries once they outnumber the live ones."""
+        limit = 2 * self.field.size + 64
+        if len(self.spawn_queue) > limit:
+            self.spawn_queue = [(due, i) for i, due in enumerate(self.spawn_due) if due != NOT_SCHEDULED]
+            heapq.heapify(self.spawn_queue)
+        if len(self.expiry_queue) > limit:
+            self.expiry_queue = [(due, i) for i, due in enumerate(self.expiry_due) if due != NOT_SCHEDULED]
+            heapq.heapify(self.expiry_queue)
@@ -0,0 +1,180 @@
+"""
+Fixed-timestep game loop.
+
+The simulation advances in whole game minutes (GameManager.step), at a
+rate set by its own clock rather than by the frame rate. FixedStepClock
+turns variable frame times into a number of steps to run, catching up
+after slow frames but never more than max_steps at once; the time it
+drops makes the game run slower instead of skipping minutes.
+
+SimulationThread runs those steps on a thread of its own. Player actions
+still apply immediately, under the thread's lock, so their results are
+known at once. After every step or action the thread publishes the
+changes as a protocol DELTA onto a deque, and the renderer replays them
+into a RenderMirror it owns, so drawing never reads state the simulation
+is writing.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Sequence
+from farming_game.data.data_classes import Position
+from farming_game.data.constants import SIM_STEP_SECONDS, SIM_MAX_CATCH_UP_STEPS
+from farming_game.core.field import Field, NameTable
+from farming_game.core.player import Player
+from farming_game.core.game_state import LiveGameState
+from farming_game.core.save_snapshot import SaveSnapshot, take_snapshot
+from farming_game.server.protocol import FRAME, encode_delta, apply_delta
+
+
+class FixedStepClock:
+    def __init__(self, step: float = SIM_STEP_SECONDS, max_steps: int = SIM_MAX_CATCH_UP_STEPS):
+        self.step = step  # wall seconds per simulation step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped = 0.0  # wall seconds discarded by the catch-up cap
+
+    def advance(self, elapsed: float) -> int:
+        """Add elapsed wall seconds; returns how many steps to run now."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.step)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.step
+            self.accumulator -= (steps - self.max_steps) * self.step
+            steps = self.max_steps
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far the present lies between the last step and the next, in [0, 1), for interpolation."""
+        return self.accumulator / self.step
+
+
+class RenderMirror:
+    """Renderer-side copy of a farm, kept up to date from published deltas or snapshots; draws like a GameManager."""
+
+    def __init__(self, game_manager):
+        self.storage_system = game_manager.storage_system  # only its fixed positions are read
+        self.load(take_snapshot(game_manager))
+
+    def load(self, snapshot: SaveSnapshot):
+        """Rebuild the mirror from a snapshot; everything counts as changed."""
+        self.field = Field(snapshot.width, snapshot.height)
+        self.field.adopt_buffer(bytearray(snapshot.cells), snapshot.width, snapshot.height,
+                                NameTable(snapshot.plant_names[1:]), NameTable(snapshot.forage_names[1:]))
+        self.player = Player(Position(snapshot.player_x, snapshot.player_y), snapshot.width, snapshot.height)
+        self.player.money = snapshot.money
+        self.player.inventory = snapshot.inventory
+        self.game_state = LiveGameState(self.player, self.field, snapshot.day, snapshot.time_minutes)
+
+    def sync(self, snapshot: SaveSnapshot, changed: Optional[Sequence[int]] = None):
+        """Catch up with a newer snapshot of the same farm, marking only the cells that differ.
+
+        changed, if known, lists the cells that may differ; otherwise the whole buffer is compared.
+        """
+        field = self.field
+        plant_names, forage_names = field.plant_names.names, field.forage_names.names
+        if ((snapshot.width, snapshot.height) != (field.width, field.height)
+                or snapshot.plant_names[:len(plant_names)] != plant_names
+                or snapshot.forage_names[:len(forage_names)] != forage_names):
+            self.load(snapshot)  # e.g. a binary load with differently numbered names
+            return
+        for name in snapshot.plant_names[len(plant_names):]:
+            field.plant_names.intern(name)
+        for name in snapshot.forage_names[len(forage_names):]:
+            field.forage_names.intern(name)
+
+        if changed is None:
+            changed = field.changed_cells(snapshot.cells)
+        field.buffer[:] = snapshot.cells  # growth timers too, which changed lists leave out
+        if changed:
+            field.mark_dirty(changed)
+
+        player = self.player
+        position = Position(snapshot.player_x, snapshot.player_y)
+        if (player.position, player.money, player.inventory) != (position, snapshot.money, snapshot.inventory):
+            player.position = position
+            player.money = snapshot.money
+            player.inventory = snapshot.inventory
+            player.mark_changed()
+        state = self.game_state
+        if (state.day, state.time_minutes) != (snapshot.day, snapshot.time_minutes):
+            state.day = snapshot.day
+            state.time_minutes = snapshot.time_minutes
+
+    def apply(self, frames: Deque[bytes]) -> int:
+        """Apply every delta published so far; returns how many there were."""
+        applied = 0
+        while frames:
+            apply_delta(memoryview(frames.popleft())[FRAME.size:], self.field, self.player, self.game_state)
+            applied += 1
+        return applied
+
+    def get_current_time_string(self) -> str:
+        return self.game_state.get_time_string()
+
+
+class SimulationThread:
+    def __init__(self, game_manager, clock: Optional[FixedStepClock] = None,
+                 on_step: Optional[Callable[[], None]] = None):
+        self.game_manager = game_manager
+        self.clock = clock or FixedStepClock()
+        self.on_step = on_step  # called after each step, with the lock held
+        self.lock = threading.Lock()  # held while the simulation or an action changes the farm
+        self.frames: Deque[bytes] = deque()  # published DELTA messages, oldest first
+        self.steps = 0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self.published_names = (0, 0)
+        self.published_versions = None
+
+    def reset_mirror(self) -> RenderMirror:
+        """A fresh mirror of the farm for the renderer, which earlier deltas no longer apply to (e.g. after
+        a load); call with the lock held once the thread is running."""
+        field = self.game_manager.field
+        self.frames.clear()
+        self.published_names = (len(field.plant_names.names), len(field.forage_names.names))
+        self.published_versions = self.game_manager.game_state.versions()
+        return RenderMirror(self.game_manager)
+
+    def publish(self):
+        """Queue what changed since the last publish for the renderer; call with the lock held."""
+        game_manager = self.game_manager
+        field = game_manager.field
+        names = (len(field.plant_names.names), len(field.forage_names.names))
+        changes = game_manager.game_state.delta_since(self.published_versions)
+        if not (changes.cells or changes.player_changed or changes.day is not None
+                or names != self.published_names):
+            return
+        self.frames.append(encode_delta(self.steps, game_manager, changes,
+                                        names_from=self.published_names if names != self.published_names else None))
+        self.published_names = names
+        self.published_versions = changes.versions
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        last = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            steps = self.clock.advance(now - last)
+            last = now
+            if steps:
+                with self.lock:
+                    for _ in range(steps):
+                        self.game_manager.step()
+                        self.steps += 1
+                        if self.on_step:
+                            self.on_step()
+                    self.publish()
+            time.sleep(max(self.clock.step - self.clock.accumulator, 0.0))
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
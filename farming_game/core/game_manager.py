@@ -4,31 +4,74 @@ Game manager for day/night cycles, time management, and game state coordination.
 import json
 from typing import Dict, Any, Optional
 from farming_game.data.data_classes import GameState, Position, CellState, CellType
-from farming_game.data.constants import GAME_DAY_LENGTH, MINUTES_PER_SECOND, FIELD_WIDTH, FIELD_HEIGHT
+from farming_game.data.constants import (GAME_DAY_LENGTH, MINUTES_PER_SECOND, FIELD_WIDTH, FIELD_HEIGHT,
+                                         DEFAULT_PLAYER_X, DEFAULT_PLAYER_Y, SAVE_DATABASE_PATH,
+                                         DEFAULT_USERNAME, DEFAULT_SAVE_NAME, AUTOSAVE_PATH,
+                                         AUTOSAVE_INTERVAL_MINUTES, JOURNAL_INTERVAL_MINUTES)
 from farming_game.core.player import Player
 from farming_game.core.field import Field
+from farming_game.core.game_state import LiveGameState
+from farming_game.core.sqlite_store import SQLiteSaveBackend
+from farming_game.core.binary_save import save_binary, load_binary
+from farming_game.core.save_snapshot import take_save_snapshot, to_json_data, unpack_forage, write_atomic
+from farming_game.core.forage_scheduler import ForageState
+from farming_game.core.autosave import Autosaver
+from farming_game.core.journal import replay_journal, journal_path
+from farming_game.core.input_log import new_seed, rng_stream
 from farming_game.systems.plants import PlantSystem
 from farming_game.systems.forage import ForageSystem
 from farming_game.systems.storage import StorageSystem
+from farming_game.systems.irrigation import IrrigationSystem
 
 class GameManager:
-    def __init__(self):
+    def __init__(self, field_width: int = FIELD_WIDTH, field_height: int = FIELD_HEIGHT,
+                 seed: Optional[int] = None):
         # Initialize game components
-        self.game_state = GameState()
-        self.player = Player(self.game_state.player_pos)
-        self.field = Field()
+        self.field = Field(field_width, field_height)
+        self.player = Player(Position(DEFAULT_PLAYER_X, DEFAULT_PLAYER_Y), field_width, field_height)
+        self.game_state = LiveGameState(self.player, self.field)
         self.plant_system = PlantSystem(self.field)
         self.forage_system = ForageSystem(self.field)
         self.storage_system = StorageSystem()
+        self.irrigation_system = IrrigationSystem(self.field, self.plant_system)
         self.last_update_time = 0
-        
-        self.sync_game_state()
+        self.ticks = 0  # growth/forage updates applied so far
+        self.sqlite_backends: Dict[str, SQLiteSaveBackend] = {}
+        self.autosaver = Autosaver()  # no cadence until enable_autosave()
+        self.reseed(new_seed() if seed is None else seed)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["sqlite_backends"] = {}  # Connections reopen on next use
+        return state
+    
+    def reseed(self, seed: int):
+        """Restart this farm's random streams from seed; same seed, state and inputs give the same farm."""
+        self.seed = seed
+        self.field.forage_scheduler.rng = rng_stream(seed, "forage")
+    
+    def restart_forage(self):
+        """Reschedule every cell's forage from a stream fixed by the seed and the clock."""
+        state = self.game_state
+        scheduler = self.field.forage_scheduler
+        scheduler.rng = rng_stream(self.seed, f"forage:{state.day}:{int(state.time_minutes)}")
+        scheduler.reset()
+    
+    def resume_forage(self, forage: Optional[ForageState]):
+        """Finish a load: continue the saved forage schedule, or restart forage if the save has none."""
+        if forage is not None and len(forage.spawn_due) == self.field.size:
+            self.field.forage_scheduler.restore_state(forage)
+        else:
+            self.restart_forage()
     
     def sync_game_state(self):
-        self.game_state.player_pos = self.player.position
-        self.game_state.player_money = self.player.money
-        self.game_state.inventory = self.player.inventory.copy()
-        self.game_state.field_state = self.field.get_all_cells()
+        """Re-attach the live game state after the player or field objects were replaced.
+        
+        game_state reads the player and field in place, so nothing has to be
+        copied per frame; use game_state.snapshot() for a detached copy.
+        """
+        self.game_state.player = self.player
+        self.game_state.field = self.field
         # No chest contents to sync anymore
     
     def update(self, delta_time: float):
@@ -43,12 +86,81 @@ class GameManager:
         # Update plant growth (once per second approximately)
         current_second = int(self.game_state.time_minutes)
         if current_second != self.last_update_time:
-            self.plant_system.update_plant_growth(current_second)
-            self.field.update_forage_spawns(current_second)
-            self.last_update_time = current_second
+            self.run_tick(current_second)
+    
+    def step(self):
+        """Advance exactly one game minute, with one growth/forage tick; see game_loop.FixedStepClock."""
+        state = self.game_state
+        state.time_minutes = float(int(state.time_minutes) + 1)
+        if state.time_minutes >= GAME_DAY_LENGTH:
+            self.advance_day()
+        self.run_tick(int(state.time_minutes))
+    
+    def run_tick(self, minute: int):
+        self.ticks += 1
+        self.plant_system.update_plant_growth(minute)
+        self.irrigation_system.update()
+        self.field.update_forage_spawns(minute)
+        self.last_update_time = minute
+        self.autosaver.tick(self)
+    
+    def fast_forward(self, minutes: int):
+        """Advance the farm by whole game minutes without replaying each one.
         
-        # Sync game state
-        self.sync_game_state()
+        Produces the same kind of result as calling update() once per minute:
+        plants grow in closed form, forage events are applied in bulk and the
+        day still rolls over (with shipping) at GAME_DAY_LENGTH.
+        """
+        remaining = int(minutes)
+        while remaining > 0:
+            start = int(self.game_state.time_minutes)
+            ticks = min(remaining, GAME_DAY_LENGTH - 1 - start)
+            if ticks > 0:
+                self.ticks += ticks
+                self.advance_growth(ticks)
+                self.field.advance_forage_spawns(ticks, start + 1)
+                self.game_state.time_minutes += ticks
+                remaining -= ticks
+            
+            if remaining > 0:
+                # The next minute closes the day, then ticks as minute 0
+                self.advance_day()
+                self.ticks += 1
+                self.advance_growth(1)
+                self.field.advance_forage_spawns(1, 0)
+                remaining -= 1
+        
+        self.last_update_time = int(self.game_state.time_minutes)
+        self.autosaver.tick(self)
+    
+    def advance_growth(self, ticks: int):
+        """advance_plant_growth, stopping at each stage change while there are sprinklers, so they water
+        plants on the tick those need it, as run_tick does."""
+        while ticks > 0:
+            due = self.plant_system.ticks_until_stage_change() if self.field.cell_index.sprinklers else None
+            run = ticks if due is None else min(ticks, due)
+            self.plant_system.advance_plant_growth(run)
+            self.irrigation_system.update()
+            ticks -= run
+    
+    def minutes_until_next_event(self) -> int:
+        """Game minutes until the farm changes in a way anyone can see without player input.
+        
+        That is the next plant stage change, forage spawn or expiry, the end
+        of the day (shipping) or a timed autosave. Until then update() would
+        only move growth timers, which fast_forward() reproduces exactly, so
+        a host can leave the farm alone for that long.
+        """
+        minutes = GAME_DAY_LENGTH - int(self.game_state.time_minutes)
+        for due in (self.plant_system.ticks_until_stage_change(),
+                    self.field.forage_scheduler.ticks_until_next_event(),
+                    self.autosaver.minutes_until_due(self)):
+            if due is not None:
+                minutes = min(minutes, int(due))
+        return max(minutes, 1)
+    
+    def fast_forward_days(self, days: int):
+        self.fast_forward(days * GAME_DAY_LENGTH)
     
     def advance_day(self):
         # Ship all items from player inventory at end of day
@@ -59,61 +171,59 @@ class GameManager:
         self.game_state.time_minutes = 0
         
         print(f"Day {self.game_state.day - 1} complete! Earned ${earnings} from shipping.")
+        self.autosaver.note_day_end()
         
         # Check win condition
         if self.check_win_condition():
             print("Congratulations! You've grown a gigantic pumpkin and won the game!")
     
     def check_win_condition(self) -> bool:
-        for row in self.field.cells:
-            for cell in row:
-                if (cell.plant_type == "gigantic_pumpkin" and 
-                    cell.growth_stage >= 6):  # Fully grown gigantic pumpkin
-                    return True
-        return False
+        return self.field.cell_index.has_mature("gigantic_pumpkin")
     
     def get_current_time_string(self) -> str:
         return self.game_state.get_time_string()
     
     
     def save_game(self, filename: str = "savegame.json"):
-        save_data = {
-            "game_state": {
-                "day": self.game_state.day,
-                "time_minutes": self.game_state.time_minutes,
-                "player_pos": {"x": self.player.position.x, "y": self.player.position.y},
-                "player_money": self.player.money,
-                "inventory": self.player.inventory,
-                # No chest contents to save
-            },
-            "field_state": []
-        }
-        
-        # Save field state
-        for y in range(FIELD_HEIGHT):
-            row = []
-            for x in range(FIELD_WIDTH):
-                cell = self.field.cells[y][x]
-                row.append({
-                    "cell_type": cell.cell_type.value,
-                    "plant_type": cell.plant_type,
-                    "growth_stage": cell.growth_stage,
-                    "watered": cell.watered,
-                    "forage_item": cell.forage_item,
-                    "forage_spawn_time": cell.forage_spawn_time,
-                    "plant_timer": cell.plant_timer
-                })
-            save_data["field_state"].append(row)
-        
         try:
-            with open(filename, 'w') as f:
-                json.dump(save_data, f, indent=2)
+            data = json.dumps(to_json_data(take_save_snapshot(self)), indent=2)
+            write_atomic(filename, [data.encode("utf-8")])
             print(f"Game saved to {filename}")
             return True
         except Exception as e:
             print(f"Failed to save game: {e}")
             return False
     
+    def save_game_async(self, filename: str = "savegame.json", save_format: str = "json"):
+        """Snapshot now and write in the background; results arrive via autosaver.poll_results()."""
+        self.autosaver.request_save(self, filename, save_format)
+    
+    def enable_autosave(self, filename: str = AUTOSAVE_PATH, interval_minutes: Optional[int] = None,
+                        on_day_end: bool = True, journal: bool = False):
+        """Autosave in the background at the end of each day and every interval_minutes of game time.
+        
+        With journal=True most autosaves only append the actions since the
+        last one to filename + ".journal", so they can run much more often.
+        """
+        if interval_minutes is None:
+            interval_minutes = JOURNAL_INTERVAL_MINUTES if journal else AUTOSAVE_INTERVAL_MINUTES
+        self.autosaver.configure(filename, interval_minutes, on_day_end)
+        self.autosaver.use_journal(self, journal)
+    
+    def recover_game(self, filename: str = AUTOSAVE_PATH) -> bool:
+        """Load an autosave snapshot and replay its journal, if there is one."""
+        self.autosaver.flush()
+        if not self.load_game_binary(filename):
+            return False
+        try:
+            records = replay_journal(self, journal_path(filename))
+            print(f"Replayed {records} journal records")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to replay journal: {e}")
+        return True
+    
     def load_game(self, filename: str = "savegame.json") -> bool:
         try:
             with open(filename, 'r') as f:
@@ -126,15 +236,17 @@ class GameManager:
             self.player.position = Position(gs["player_pos"]["x"], gs["player_pos"]["y"])
             self.player.money = gs["player_money"]
             self.player.inventory = gs["inventory"]
+            self.player.mark_changed()
+            self.autosaver.invalidate_journal()
             # No chest contents to load
             
             # Load field state
             from farming_game.data.data_classes import CellType
-            for y in range(FIELD_HEIGHT):
-                for x in range(FIELD_WIDTH):
+            for y in range(self.field.height):
+                for x in range(self.field.width):
                     if y < len(save_data["field_state"]) and x < len(save_data["field_state"][y]):
                         cell_data = save_data["field_state"][y][x]
-                        cell = self.field.cells[y][x]
+                        cell = self.field.get_cell(Position(x, y))
                         cell.cell_type = CellType(cell_data["cell_type"])
                         cell.plant_type = cell_data["plant_type"]
                         cell.growth_stage = cell_data["growth_stage"]
@@ -142,6 +254,10 @@ class GameManager:
                         cell.forage_item = cell_data["forage_item"]
                         cell.forage_spawn_time = cell_data["forage_spawn_time"]
                         cell.plant_timer = cell_data["plant_timer"]
+            if gs.get("seed") is not None:
+                self.seed = gs["seed"]
+            forage = save_data.get("forage_schedule")
+            self.resume_forage(unpack_forage(forage) if forage else None)
             
             print(f"Game loaded from {filename}")
             return True
@@ -149,3 +265,54 @@ class GameManager:
             print(f"Failed to load game: {e}")
             return False
     
+    def get_sqlite_backend(self, db_path: str) -> SQLiteSaveBackend:
+        # One backend per database, so incremental saves can diff against the last save
+        if db_path not in self.sqlite_backends:
+            self.sqlite_backends[db_path] = SQLiteSaveBackend(db_path)
+        return self.sqlite_backends[db_path]
+    
+    def save_game_sqlite(self, db_path: str = SAVE_DATABASE_PATH, username: str = DEFAULT_USERNAME,
+                         save_name: str = DEFAULT_SAVE_NAME) -> bool:
+        """Snapshot now and write the slot in the background; results arrive via autosaver.poll_results()."""
+        try:
+            job = self.get_sqlite_backend(db_path).prepare(self, username, save_name)
+        except Exception as e:
+            print(f"Failed to save game: {e}")
+            return False
+        self.autosaver.enqueue(job)
+        return True
+    
+    def load_game_sqlite(self, db_path: str = SAVE_DATABASE_PATH, username: str = DEFAULT_USERNAME,
+                         save_name: str = DEFAULT_SAVE_NAME) -> bool:
+        self.autosaver.flush()  # A save still being written may be the one asked for
+        try:
+            if not self.get_sqlite_backend(db_path).load(self, username, save_name):
+                print(f"No save named {save_name} for {username} in {db_path}")
+                return False
+            self.last_update_time = int(self.game_state.time_minutes)
+            self.autosaver.invalidate_journal()
+            print(f"Game loaded from {db_path} ({username}/{save_name})")
+            return True
+        except Exception as e:
+            print(f"Failed to load game: {e}")
+            return False
+    
+    def save_game_binary(self, filename: str = "savegame.fgsv", compression: str = "none") -> bool:
+        try:
+            size = save_binary(self, filename, compression)
+            print(f"Game saved to {filename} ({size} bytes)")
+            return True
+        except Exception as e:
+            print(f"Failed to save game: {e}")
+            return False
+    
+    def load_game_binary(self, filename: str = "savegame.fgsv") -> bool:
+        try:
+            load_binary(self, filename)
+            self.last_update_time = int(self.game_state.time_minutes)
+            self.autosaver.invalidate_journal()
+            print(f"Game loaded from {filename}")
+            return True
+        except Exception as e:
+            print(f"Failed to load game: {e}")
+            return False
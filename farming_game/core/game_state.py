@@ -0,0 +1,128 @@
+"""
+Live game state: reads player and field data in place instead of copying
+them every frame, and materialises a GameState snapshot only on request.
+"""
+from typing import Dict, List, Optional
+from farming_game.data.data_classes import GameState, Position, CellState, StateDelta
+from farming_game.core.player import Player
+from farming_game.core.field import Field, CellView
+
+
+class LiveGameState:
+    def __init__(self, player: Player, field: Field, day: int = 1, time_minutes: float = 0):
+        self.player = player
+        self.field = field
+        self.time_version = 0
+        self.day = day
+        self.time_minutes = time_minutes
+
+        # Materialised pieces, each tagged with the version it was built from
+        self.cached_player_part: Optional[tuple] = None
+        self.cached_field_part: Optional[tuple] = None
+        self.cached_cell_views: Optional[tuple] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cached_player_part"] = None
+        state["cached_field_part"] = None
+        state["cached_cell_views"] = None
+        return state
+
+    @property
+    def day(self) -> int:
+        return self._day
+
+    @day.setter
+    def day(self, value: int):
+        self._day = value
+        self.time_version += 1
+
+    @property
+    def time_minutes(self) -> float:
+        return self._time_minutes
+
+    @time_minutes.setter
+    def time_minutes(self, value: float):
+        self._time_minutes = value
+        self.time_version += 1
+
+    # Live views of the player and field, for code written against GameState
+    @property
+    def player_pos(self) -> Position:
+        return self.player.position
+
+    @property
+    def player_money(self) -> int:
+        return self.player.money
+
+    @property
+    def inventory(self) -> Dict[str, int]:
+        return self.player.inventory
+
+    @property
+    def field_state(self) -> List[List[CellView]]:
+        if self.cached_cell_views is None or self.cached_cell_views[0] is not self.field:
+            self.cached_cell_views = (self.field, self.field.get_all_cells())
+        return self.cached_cell_views[1]
+
+    def versions(self) -> Dict[str, int]:
+        """Change counters per subsystem; a consumer only needs to re-read what moved."""
+        return {
+            "time": self.time_version,
+            "player": self.player.version,
+            "field": self.field.version,
+        }
+
+    def delta_since(self, versions: Optional[Dict[str, int]] = None) -> StateDelta:
+        """Changes since an earlier versions() token (None: everything).
+
+        Costs time in proportion to what changed, not to the field size.
+        """
+        versions = versions or {"time": -1, "player": -1, "field": -1}
+        player = self.player
+        delta = StateDelta(self.versions())
+        if self.time_version > versions["time"]:
+            delta.day = self.day
+            delta.time_minutes = self.time_minutes
+        if player.position_version > versions["player"]:
+            delta.player_pos = Position(player.position.x, player.position.y)
+        if player.money_version > versions["player"]:
+            delta.player_money = player.money
+        delta.inventory = player.inventory_changes_since(versions["player"])
+        delta.cells = self.field.changed_since(versions["field"])
+        return delta
+
+    def snapshot(self) -> GameState:
+        """Detached copy of the whole game state, rebuilt only for parts that changed.
+
+        Consecutive snapshots share the parts that did not change, so treat
+        them as read-only.
+        """
+        player_version = (id(self.player), self.player.version)
+        if self.cached_player_part is None or self.cached_player_part[0] != player_version:
+            player = self.player
+            self.cached_player_part = (player_version, (
+                Position(player.position.x, player.position.y),
+                player.money,
+                dict(player.inventory),
+            ))
+
+        field_version = (id(self.field), self.field.version)
+        if self.cached_field_part is None or self.cached_field_part[0] != field_version:
+            rows: List[List[CellState]] = [[cell.to_state() for cell in row] for row in self.field.get_all_cells()]
+            self.cached_field_part = (field_version, rows)
+
+        player_pos, player_money, inventory = self.cached_player_part[1]
+        return GameState(
+            day=self.day,
+            time_minutes=self.time_minutes,
+            player_pos=player_pos,
+            player_money=player_money,
+            inventory=inventory,
+            field_state=self.cached_field_part[1],
+        )
+
+    def get_time_string(self) -> str:
+        hours = int(self.time_minutes // 60) % 24
+        minutes = int(self.time_minutes % 60)
+        return f"Day {self.day} - {hours:02d}:{minutes:02d}"
@@ -0,0 +1,126 @@
+"""
+Deterministic sessions: seeded RNG streams and player input logs.
+
+Everything random in a farm's simulation draws from a stream derived
+from the farm's seed (rng_stream), so how a farm evolves is a function of
+its seed, its starting state and the player's inputs alone. InputLog
+records those inputs, one JSON object per line:
+
+- a segment header, {"seed", "width", "height", "ticks", "last_update",
+  "snapshot"}, at the start and again whenever the player loads a save
+  (snapshot is the loaded state as a zlib binary save, base64-encoded;
+  null for a new game);
+- {"tick", "action", ...params}: a perform_action call made after that
+  many growth updates, the same entries ScriptedPlayer reads;
+- {"tick", "action": "clock", "minute"}: the update that made `tick`
+  landed on `minute` rather than the one after the last, after a frame
+  that took longer than a game minute;
+- {"tick", "action": "end", "digest"}: the segment's final state_digest.
+
+simulation.replay_session runs a log headless, one update per game
+minute, and checks each segment against its digest.
+"""
+import base64
+import dataclasses
+import hashlib
+import json
+import os
+import random
+from typing import IO, Iterator, List, Optional
+from farming_game.data.constants import GAME_DAY_LENGTH
+from farming_game.core.save_snapshot import take_snapshot, take_save_snapshot
+from farming_game.core.binary_save import encode_binary
+
+
+def new_seed() -> int:
+    """A fresh seed from the OS, for farms nobody asked to be reproducible."""
+    return int.from_bytes(os.urandom(8), "little") >> 1
+
+
+def rng_stream(seed: int, name: str) -> random.Random:
+    """The named random stream of a farm; the same seed and name always give the same sequence."""
+    return random.Random(f"{seed}:{name}")
+
+
+def state_digest(game_manager) -> str:
+    """SHA-256 of the field, player and clock (whole minutes), independent of byte order."""
+    snapshot = take_snapshot(game_manager)
+    snapshot = dataclasses.replace(snapshot, time_minutes=float(int(snapshot.time_minutes)))
+    digest = hashlib.sha256()
+    for chunk in encode_binary(snapshot):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InputLog:
+    def __init__(self, file: IO[str]):
+        self.file = file
+        self.game_manager = None
+        self.last_minute = 0  # minute of the last update seen by note_update
+
+    @classmethod
+    def open(cls, filename: str) -> "InputLog":
+        return cls(open(filename, "w", buffering=1))  # line-buffered, so a crash loses little
+
+    def write(self, entry: dict):
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def start(self, game_manager, snapshot: bool = False):
+        """Begin a segment from game_manager's current state, with snapshot=True unless it is a new game."""
+        if self.game_manager is not None:
+            self.end()
+        self.game_manager = game_manager
+        self.last_minute = game_manager.last_update_time
+        field = game_manager.field
+        data = None
+        if snapshot:
+            # With the forage schedule, so replay draws the same forage as the live farm
+            data = base64.b64encode(b"".join(encode_binary(take_save_snapshot(game_manager), "zlib"))).decode("ascii")
+        self.write({"seed": game_manager.seed, "width": field.width, "height": field.height,
+                    "ticks": game_manager.ticks, "last_update": game_manager.last_update_time,
+                    "snapshot": data})
+
+    def record(self, action: str, **params):
+        """Log an action about to be applied with perform_action."""
+        entry = {"tick": self.game_manager.ticks, "action": action}
+        entry.update(params)
+        self.write(entry)
+
+    def note_update(self):
+        """Call after each GameManager.update; logs the minute when an update skipped ahead."""
+        game_manager = self.game_manager
+        minute = game_manager.last_update_time
+        if minute == self.last_minute:
+            return
+        if minute != (self.last_minute + 1) % GAME_DAY_LENGTH:
+            self.write({"tick": game_manager.ticks, "action": "clock", "minute": minute})
+        self.last_minute = minute
+
+    def end(self):
+        """Close the current segment with its digest; call before loading a save over the farm."""
+        if self.game_manager is None:
+            return
+        self.write({"tick": self.game_manager.ticks, "action": "end", "digest": state_digest(self.game_manager)})
+        self.game_manager = None
+
+    def close(self):
+        self.end()
+        self.file.close()
+
+
+def read_segments(filename: str) -> Iterator[List[dict]]:
+    """The log's segments, each a header followed by its entries."""
+    segment: Optional[List[dict]] = None
+    with open(filename) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "seed" in entry:
+                if segment is not None:
+                    yield segment
+                segment = [entry]
+            elif segment is not None:
+                segment.append(entry)
+    if segment is not None:
+        yield segment
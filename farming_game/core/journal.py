@@ -0,0 +1,299 @@
+"""
+Append-only save journal.
+
+Between full snapshots, autosaves only append what happened: one compact
+record per action (plant, water, harvest, forage, buy, ship) or forage
+spawn/expiry, holding the cell's new packed record and any player change.
+Growth is not journaled; replay recomputes it in closed form between
+records, so a record's tick is enough to put it back in sequence.
+Forage is journaled but also re-run: the snapshot a journal starts from
+holds the forage schedule (take_save_snapshot), so replay runs the
+scheduler forward from it alongside the records, and the recovered farm
+keeps drawing forage exactly as the live one would have.
+
+File layout: JOURNAL_HEADER (identifies the snapshot the journal applies
+to and holds the tick count it was taken at), then records, each framed
+by its length and CRC32 so a torn write at the tail is detected and
+dropped on recovery.
+"""
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+from farming_game.data.data_classes import Position, EVENT_CELL, EVENT_CHECKPOINT, EVENT_SPAWN, EVENT_EXPIRE
+from farming_game.data.constants import GAME_DAY_LENGTH
+from farming_game.core.field import CELL_COLUMNS
+from farming_game.core.save_snapshot import SaveSnapshot, write_atomic, append_durable
+from farming_game.core.binary_save import (encode_binary, pack_names, unpack_names, pack_inventory,
+                                           unpack_inventory)
+
+MAGIC = b"FGJL"
+FORMAT_VERSION = 3  # 3: the base snapshot holds the forage schedule, so replay re-runs it
+
+# magic, version, base snapshot day, base snapshot time_minutes, GameManager.ticks at the snapshot
+JOURNAL_HEADER = struct.Struct("<4sHidq")
+# Version 1 header, written before the base tick was recorded
+JOURNAL_HEADER_V1 = struct.Struct("<4sHid")
+# payload length, CRC32 of the payload
+FRAME = struct.Struct("<II")
+# kind, flags, ticks since the base snapshot
+EVENT = struct.Struct("<BBI")
+# cell index, then one value per CELL_COLUMNS entry
+CELL = struct.Struct("<I" + "".join(typecode for _, typecode in CELL_COLUMNS))
+# player x, y, money; changed inventory entries follow
+PLAYER = struct.Struct("<iiq")
+# day, time_minutes
+CLOCK = struct.Struct("<id")
+
+FLAG_NAMES = 1
+FLAG_CELL = 2
+FLAG_PLAYER = 4
+FLAG_CLOCK = 8
+
+
+class Journal:
+    """Encodes records for one GameManager; attach() hooks it into the field and player."""
+
+    def __init__(self, game_manager):
+        self.game_manager = game_manager
+        self.records: List[bytes] = []
+        self.touched: Set[int] = set()  # cells edited with no action logged yet
+        self.base_tick = game_manager.ticks
+        self.bytes_since_snapshot = 0
+        self.needs_snapshot = True
+        self.logged_player_version = None
+        self.logged_inventory = {}
+        self.logged_names = (0, 0)
+
+    def attach(self):
+        self.game_manager.field.journal = self
+        self.game_manager.player.journal = self
+
+    def detach(self):
+        self.game_manager.field.journal = None
+        self.game_manager.player.journal = None
+
+    def invalidate(self):
+        """The game state was replaced wholesale; the next save has to be a snapshot."""
+        self.needs_snapshot = True
+
+    def rotate(self, snapshot: SaveSnapshot) -> bytes:
+        """Start a new journal on top of snapshot, which must be of the current state."""
+        field = self.game_manager.field
+        player = self.game_manager.player
+        self.records = []
+        self.touched.clear()
+        self.base_tick = self.game_manager.ticks
+        self.bytes_since_snapshot = 0
+        self.needs_snapshot = False
+        self.logged_player_version = player.version
+        self.logged_inventory = dict(player.inventory)
+        self.logged_names = (len(field.plant_names.names), len(field.forage_names.names))
+        return JOURNAL_HEADER.pack(MAGIC, FORMAT_VERSION, snapshot.day, snapshot.time_minutes, self.base_tick)
+
+    def log_cell(self, kind: int, index: int):
+        self.touched.discard(index)
+        self.append(kind, index)
+
+    def log_player(self, kind: int):
+        self.append(kind)
+
+    def append(self, kind: int, index: Optional[int] = None, clock: bool = False):
+        if self.needs_snapshot:
+            return  # The coming snapshot covers this change
+        game_manager = self.game_manager
+        field = game_manager.field
+        player = game_manager.player
+        flags = 0
+        parts = [b""]
+
+        plant_count, forage_count = len(field.plant_names.names), len(field.forage_names.names)
+        if (plant_count, forage_count) != self.logged_names:
+            flags |= FLAG_NAMES
+            parts.append(pack_names(field.plant_names.names[self.logged_names[0]:]))
+            parts.append(pack_names(field.forage_names.names[self.logged_names[1]:]))
+            self.logged_names = (plant_count, forage_count)
+
+        if index is not None:
+            flags |= FLAG_CELL
+            parts.append(CELL.pack(index, *(getattr(field, name)[index] for name, _ in CELL_COLUMNS)))
+
+        if clock:
+            flags |= FLAG_CLOCK
+            state = game_manager.game_state
+            parts.append(CLOCK.pack(state.day, state.time_minutes))
+
+        if player.version != self.logged_player_version:
+            flags |= FLAG_PLAYER
+            inventory = player.inventory
+            changes = {item: quantity for item, quantity in inventory.items()
+                       if self.logged_inventory.get(item) != quantity}
+            for item in self.logged_inventory:
+                if item not in inventory:
+                    changes[item] = 0
+            parts.append(PLAYER.pack(player.position.x, player.position.y, player.money))
+            parts.append(pack_inventory(changes))
+            self.logged_player_version = player.version
+            self.logged_inventory = dict(inventory)
+
+        parts[0] = EVENT.pack(kind, flags, game_manager.ticks - self.base_tick)
+        payload = b"".join(parts)
+        self.records.append(FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+
+    def take_records(self) -> List[bytes]:
+        """Everything recorded since the last call, closed by a checkpoint with the clock."""
+        for index in sorted(self.touched):
+            self.append(EVENT_CELL, index)
+        self.touched.clear()
+        self.append(EVENT_CHECKPOINT, clock=True)
+        records, self.records = self.records, []
+        self.bytes_since_snapshot += sum(len(record) for record in records)
+        return records
+
+
+@dataclass
+class JournalJob:
+    """Background write for a journal: append records, or compact into a new snapshot."""
+    filename: str
+    snapshot_filename: str
+    chunks: List[bytes] = field(default_factory=list)
+    snapshot: Optional[SaveSnapshot] = None
+    header: bytes = b""
+    compression: str = "zlib"
+    reason: str = "autosave"
+
+    @property
+    def key(self) -> str:
+        return self.filename
+
+    def merge(self, newer: "JournalJob") -> "JournalJob":
+        if newer.snapshot is not None:
+            return newer  # The new snapshot already contains everything queued here
+        self.chunks.extend(newer.chunks)
+        return self
+
+    def write(self) -> int:
+        if self.snapshot is None:
+            return append_durable(self.filename, self.chunks)
+        # Snapshot first: until the new journal replaces the old one, recovery
+        # sees the old journal's base no longer matches and ignores it
+        size = write_atomic(self.snapshot_filename, encode_binary(self.snapshot, self.compression))
+        return size + write_atomic(self.filename, [self.header] + self.chunks)
+
+
+def journal_path(snapshot_filename: str) -> str:
+    return snapshot_filename + ".journal"
+
+
+def advance_forage(field, ticks: int, minute: int) -> int:
+    """Run ticks forage updates, one game minute apart, after the one at minute; returns the last minute."""
+    while ticks > 0:
+        first = (minute + 1) % GAME_DAY_LENGTH  # The minute after the day's last one is 0
+        run = min(ticks, GAME_DAY_LENGTH - first)
+        field.advance_forage_spawns(run, first)
+        ticks -= run
+        minute = first + run - 1
+    return minute
+
+
+def replay_journal(game_manager, filename: str) -> int:
+    """Apply a journal on top of the snapshot just loaded; returns the records applied.
+
+    A journal written for a different snapshot is ignored, and reading
+    stops at the first incomplete or corrupt record.
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    if len(data) < JOURNAL_HEADER_V1.size:
+        return 0
+    magic, version, base_day, base_time = JOURNAL_HEADER_V1.unpack_from(data, 0)
+    state = game_manager.game_state
+    if magic != MAGIC or version > FORMAT_VERSION:
+        raise ValueError("Not a save journal")
+    base_tick = None
+    offset = JOURNAL_HEADER_V1.size
+    if version >= 2:
+        if len(data) < JOURNAL_HEADER.size:
+            return 0
+        base_tick = JOURNAL_HEADER.unpack_from(data, 0)[4]
+        offset = JOURNAL_HEADER.size
+    if (base_day, base_time) != (state.day, state.time_minutes):
+        print("Journal does not belong to this snapshot; ignoring it")
+        return 0
+
+    field = game_manager.field
+    player = game_manager.player
+    scheduler = field.forage_scheduler
+    rerun_forage = version >= 3
+    minute = int(state.time_minutes)  # of the last tick replayed
+    applied = 0
+    replayed_ticks = 0
+    while offset + FRAME.size <= len(data):
+        length, checksum = FRAME.unpack_from(data, offset)
+        payload = data[offset + FRAME.size:offset + FRAME.size + length]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            break
+        offset += FRAME.size + length
+
+        kind, flags, tick = EVENT.unpack_from(payload, 0)
+        position = EVENT.size
+        if tick > replayed_ticks:
+            game_manager.plant_system.advance_plant_growth(tick - replayed_ticks)
+            if rerun_forage:
+                minute = advance_forage(field, tick - replayed_ticks, minute)
+            replayed_ticks = tick
+
+        if flags & FLAG_NAMES:
+            plant_names, position = unpack_names(payload, position)
+            forage_names, position = unpack_names(payload, position)
+            for name in plant_names:
+                field.plant_names.intern(name)
+            for name in forage_names:
+                field.forage_names.intern(name)
+
+        if flags & FLAG_CELL:
+            values = CELL.unpack_from(payload, position)
+            position += CELL.size
+            index = values[0]
+            if index < field.size:
+                before = (field.cell_type[index], field.forage_id[index])
+                for (name, _), value in zip(CELL_COLUMNS, values[1:]):
+                    getattr(field, name)[index] = value
+                # Growth replayed before the next record walks the cell index
+                field.mark_dirty((index,))
+                # The re-run scheduler made its own spawns and expiries; any other edit was made
+                # through the field, which told the live scheduler, and so is this one. A spawn
+                # or expiry it disagrees with gets the cell rescheduled from the record.
+                if rerun_forage and (kind not in (EVENT_SPAWN, EVENT_EXPIRE)
+                                     or before != (field.cell_type[index], field.forage_id[index])):
+                    scheduler.cell_changed(index)
+
+        if flags & FLAG_CLOCK:
+            state.day, state.time_minutes = CLOCK.unpack_from(payload, position)
+            position += CLOCK.size
+            minute = int(state.time_minutes)
+
+        if flags & FLAG_PLAYER:
+            x, y, money = PLAYER.unpack_from(payload, position)
+            position += PLAYER.size
+            player.position = Position(x, y)
+            player.money = money
+            changes, position = unpack_inventory(payload, position)
+            for item, quantity in changes.items():
+                if quantity:
+                    player.inventory[item] = quantity
+                else:
+                    player.inventory.pop(item, None)
+            player.mark_changed()
+
+        applied += 1
+
+    if base_tick is not None:
+        game_manager.ticks = base_tick + replayed_ticks
+    else:
+        game_manager.ticks += replayed_ticks  # Version 1: the tick count at the snapshot is unknown
+    game_manager.last_update_time = int(state.time_minutes)
+    field.mark_dirty(range(field.size))
+    if not rerun_forage:
+        game_manager.restart_forage()  # Older journals: the live farm's forage can't be reproduced
+    return applied
@@ -1,21 +1,51 @@
 """
 Player character implementation with movement and inventory management.
 """
-from typing import Dict
+from typing import Dict, Optional
 from farming_game.data.data_classes import Position
 from farming_game.data.constants import FIELD_WIDTH, FIELD_HEIGHT, DEFAULT_STARTING_MONEY, DEFAULT_STARTING_SEEDS
 
 class Player:
-    def __init__(self, start_pos: Position):
+    def __init__(self, start_pos: Position, field_width: Optional[int] = FIELD_WIDTH,
+                 field_height: Optional[int] = FIELD_HEIGHT):
         self.position = start_pos
+        self.field_width = field_width
+        self.field_height = field_height  # None for both on unbounded (chunked) maps
         self.inventory: Dict[str, int] = DEFAULT_STARTING_SEEDS.copy()
         self.money = DEFAULT_STARTING_MONEY
+        self.version = 0  # bumped on every change to position, inventory or money
+        # Version of the last change to each part; inventory_versions keeps
+        # every item ever held so removals show up in diffs
+        self.position_version = 0
+        self.money_version = 0
+        self.inventory_versions: Dict[str, int] = {item: 0 for item in self.inventory}
+        self.journal = None  # save journal recording actions, if one is attached
+    
+    def mark_changed(self) -> None:
+        """Record a change made by assigning position, inventory or money directly."""
+        self.version += 1
+        self.position_version = self.version
+        self.money_version = self.version
+        for item in set(self.inventory_versions) | set(self.inventory):
+            self.inventory_versions[item] = self.version
+    
+    def inventory_changes_since(self, version: int) -> Dict[str, int]:
+        """Current quantity of each item changed after `version`; 0 means it is gone."""
+        return {item: self.inventory.get(item, 0)
+                for item, stamp in self.inventory_versions.items() if stamp > version}
+    
+    def log_event(self, kind: int) -> None:
+        """Record an action that changed inventory or money in the attached journal."""
+        if self.journal is not None:
+            self.journal.log_player(kind)
     
     def move(self, direction: Position) -> bool:
         """Move player in given direction if within field bounds."""
         new_pos = self.position + direction
-        if 0 <= new_pos.x < FIELD_WIDTH and 0 <= new_pos.y < FIELD_HEIGHT:
+        if self.field_width is None or (0 <= new_pos.x < self.field_width and 0 <= new_pos.y < self.field_height):
             self.position = new_pos
+            self.version += 1
+            self.position_version = self.version
             return True
         return False
     
@@ -24,6 +54,8 @@ class Player:
         if quantity <= 0:
             return False
         self.inventory[item] = self.inventory.get(item, 0) + quantity
+        self.version += 1
+        self.inventory_versions[item] = self.version
         return True
     
     def remove_item(self, item: str, quantity: int = 1) -> bool:
@@ -33,6 +65,8 @@ class Player:
         self.inventory[item] -= quantity
         if self.inventory[item] == 0:
             del self.inventory[item]
+        self.version += 1
+        self.inventory_versions[item] = self.version
         return True
     
     def has_item(self, item: str, quantity: int = 1) -> bool:
@@ -43,12 +77,16 @@ class Player:
         """Add money to player's funds."""
         if amount > 0:
             self.money += amount
+            self.version += 1
+            self.money_version = self.version
     
     def spend_money(self, amount: int) -> bool:
         """Spend money if player has enough."""
         if amount <= 0 or self.money < amount:
             return False
         self.money -= amount
+        self.version += 1
+        self.money_version = self.version
         return True
     
     def get_seed_for_plant(self, plant_type: str) -> str:
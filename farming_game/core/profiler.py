@@ -0,0 +1,149 @@
+"""
+Frame profiler: timing spans over the game's hot paths.
+
+attach() wraps the instrumented methods of the objects it is given (the
+game loop, GameManager, its plant system and field, the UI) with timing
+wrappers, like simulation.wrap_timed, and detach() removes them again. A
+game that isn't being profiled therefore runs exactly the code it would
+without a profiler. Each span keeps its last PROFILE_WINDOW durations for rolling
+percentiles, and the last PROFILE_TRACE_EVENTS spans are kept for export
+as CSV or as Chrome trace-event JSON (chrome://tracing, Perfetto).
+"""
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from farming_game.data.constants import PROFILE_WINDOW, PROFILE_TRACE_EVENTS
+
+# Methods wrapped by attach(), by the class of the object they belong to
+INSTRUMENTED = {
+    "FarmingGame": ["handle_events", "update", "draw"],
+    "GameManager": ["update", "step", "sync_game_state", "fast_forward", "save_game", "save_game_async", "load_game",
+                    "save_game_sqlite", "load_game_sqlite", "save_game_binary", "load_game_binary",
+                    "recover_game"],
+    "PlantSystem": ["update_plant_growth", "advance_plant_growth"],
+    "Field": ["update_forage_spawns", "advance_forage_spawns"],
+    "UI": ["draw_field", "draw_chunked_field", "draw_ui_panel", "draw_bottom_inventory", "draw_message",
+           "present"],
+}
+
+PERCENTILES = (50, 95, 99)
+
+# (span name, start, duration, thread id); times in perf_counter nanoseconds
+TraceEvent = Tuple[str, int, int, int]
+
+
+def percentile(ordered: List[int], p: float) -> int:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(int(round(p / 100 * len(ordered))), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Profiler:
+    def __init__(self, window: int = PROFILE_WINDOW, trace_events: int = PROFILE_TRACE_EVENTS):
+        self.window = window
+        self.enabled = False
+        self.durations: Dict[str, Deque[int]] = {}
+        self.counts: Dict[str, int] = {}
+        self.events: Deque[TraceEvent] = deque(maxlen=trace_events)
+        self.origin = time.perf_counter_ns()
+        # (owner, method name, what the instance held under that name before, if anything)
+        self.attached: List[Tuple[object, str, Optional[object]]] = []
+
+    def record(self, name: str, start: int, end: Optional[int] = None):
+        """Add one span that ran from start to end (perf_counter_ns values; end defaults to now)."""
+        if end is None:
+            end = time.perf_counter_ns()
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations[name] = deque(maxlen=self.window)
+            self.counts[name] = 0
+        durations.append(end - start)
+        self.counts[name] += 1
+        self.events.append((name, start, end - start, threading.get_ident()))
+
+    def wrap(self, owner, method_name: str, name: Optional[str] = None):
+        """Time every call of owner.method_name as span name (default Class.method)."""
+        method = getattr(owner, method_name)
+        previous = owner.__dict__.get(method_name)  # e.g. a simulation.wrap_timed wrapper
+        name = name or f"{type(owner).__name__}.{method_name}"
+        record = self.record
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(name, start)
+
+        setattr(owner, method_name, timed)
+        self.attached.append((owner, method_name, previous))
+
+    def attach(self, *owners):
+        """Start profiling: wrap the INSTRUMENTED methods of each owner."""
+        if self.enabled:
+            return
+        for owner in owners:
+            for method_name in INSTRUMENTED.get(type(owner).__name__, []):
+                if hasattr(owner, method_name):
+                    self.wrap(owner, method_name)
+        self.enabled = True
+
+    def detach(self):
+        """Stop profiling and restore every wrapped method; recorded spans are kept."""
+        for owner, method_name, previous in reversed(self.attached):
+            if previous is None:
+                # The wrapper only shadowed the class's method
+                del owner.__dict__[method_name]
+            else:
+                setattr(owner, method_name, previous)
+        self.attached.clear()
+        self.enabled = False
+
+    def reset(self):
+        self.durations.clear()
+        self.counts.clear()
+        self.events.clear()
+
+    def percentiles(self, name: str) -> Optional[Tuple[float, ...]]:
+        """(p50, p95, p99) of a span's recent durations in milliseconds, or None if it never ran."""
+        durations = self.durations.get(name)
+        if not durations:
+            return None
+        ordered = sorted(durations)
+        return tuple(percentile(ordered, p) / 1e6 for p in PERCENTILES)
+
+    def summary(self) -> List[Tuple[str, int, Tuple[float, ...]]]:
+        """(span, total calls, percentiles) for every span, slowest p95 first."""
+        rows = [(name, self.counts[name], self.percentiles(name)) for name in self.durations]
+        rows.sort(key=lambda row: row[2][1], reverse=True)
+        return rows
+
+    def export_csv(self, path: str) -> int:
+        """Write the recent spans as rows of name, start_ms, duration_ms, thread; returns the row count."""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "start_ms", "duration_ms", "thread"])
+            for name, start, duration, thread in self.events:
+                writer.writerow([name, f"{(start - self.origin) / 1e6:.4f}", f"{duration / 1e6:.4f}", thread])
+        return len(self.events)
+
+    def export_chrome_trace(self, path: str) -> int:
+        """Write the recent spans as Chrome trace-event JSON; returns the event count."""
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": (start - self.origin) / 1e3, "dur": duration / 1e3,
+                   "pid": pid, "tid": thread}
+                  for name, start, duration, thread in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def export(self, path: str) -> int:
+        """Export as CSV for .csv paths, Chrome trace JSON otherwise."""
+        if path.lower().endswith(".csv"):
+            return self.export_csv(path)
+        return self.export_chrome_trace(path)
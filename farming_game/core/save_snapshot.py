@@ -0,0 +1,148 @@
+"""
+Detached save snapshots and crash-safe file writes.
+
+A SaveSnapshot copies the field's packed cell buffer, the name tables,
+the player, the clock and the seed in one go, so it can be serialised on
+another thread while the game keeps running. Snapshots for saves also
+carry the forage schedule, so a loaded farm carries on exactly like the
+farm that was saved.
+"""
+import base64
+import os
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from farming_game.data.data_classes import CELL_TYPES
+from farming_game.core.field import column_views
+from farming_game.core.forage_scheduler import ForageState
+
+
+@dataclass
+class SaveSnapshot:
+    width: int
+    height: int
+    cells: bytes  # CELL_COLUMNS layout, native byte order
+    plant_names: List[Optional[str]]
+    forage_names: List[Optional[str]]
+    day: int
+    time_minutes: float
+    player_x: int
+    player_y: int
+    money: int
+    inventory: Dict[str, int]
+    seed: Optional[int] = None  # None in saves written before the seed was kept
+    forage: Optional[ForageState] = None  # None when the save didn't keep the forage schedule
+
+
+def take_snapshot(game_manager) -> SaveSnapshot:
+    """Copy everything a save needs; the cost is one memcpy of the cell buffer."""
+    field = game_manager.field
+    player = game_manager.player
+    state = game_manager.game_state
+    return SaveSnapshot(
+        width=field.width,
+        height=field.height,
+        cells=field.snapshot_buffer(),
+        plant_names=list(field.plant_names.names),
+        forage_names=list(field.forage_names.names),
+        day=state.day,
+        time_minutes=state.time_minutes,
+        player_x=player.position.x,
+        player_y=player.position.y,
+        money=player.money,
+        inventory=dict(player.inventory),
+        seed=game_manager.seed,
+    )
+
+
+def take_save_snapshot(game_manager) -> SaveSnapshot:
+    """take_snapshot plus the forage schedule; copies one list per event kind on top."""
+    snapshot = take_snapshot(game_manager)
+    snapshot.forage = game_manager.field.forage_scheduler.save_state()
+    return snapshot
+
+
+def pack_forage(forage: ForageState) -> str:
+    """Text form of a forage schedule for JSON saves."""
+    return base64.b64encode(zlib.compress(forage.pack())).decode("ascii")
+
+
+def unpack_forage(text: str) -> ForageState:
+    return ForageState.unpack(zlib.decompress(base64.b64decode(text)))
+
+
+def to_json_data(snapshot: SaveSnapshot) -> dict:
+    """The savegame.json structure read by GameManager.load_game."""
+    save_data = {
+        "game_state": {
+            "day": snapshot.day,
+            "time_minutes": snapshot.time_minutes,
+            "player_pos": {"x": snapshot.player_x, "y": snapshot.player_y},
+            "player_money": snapshot.money,
+            "inventory": snapshot.inventory,
+            "seed": snapshot.seed,
+        },
+        "field_state": []
+    }
+
+    columns = column_views(snapshot.cells, snapshot.width * snapshot.height)
+    for y in range(snapshot.height):
+        row = []
+        for i in range(y * snapshot.width, (y + 1) * snapshot.width):
+            row.append({
+                "cell_type": CELL_TYPES[columns["cell_type"][i]].value,
+                "plant_type": snapshot.plant_names[columns["plant_id"][i]],
+                "growth_stage": columns["growth_stage"][i],
+                "watered": bool(columns["watered"][i]),
+                "forage_item": snapshot.forage_names[columns["forage_id"][i]],
+                "forage_spawn_time": columns["forage_spawn_time"][i],
+                "plant_timer": columns["plant_timer"][i]
+            })
+        save_data["field_state"].append(row)
+    if snapshot.forage is not None:
+        save_data["forage_schedule"] = pack_forage(snapshot.forage)
+    return save_data
+
+
+def write_atomic(filename: str, chunks: Iterable[bytes]) -> int:
+    """Write chunks to filename so a crash leaves either the old or the new file.
+
+    The data goes to a temporary file in the same directory, is fsynced,
+    then renamed over filename. Returns the number of bytes written.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    temp_name = f"{filename}.tmp"
+    size = 0
+    try:
+        with open(temp_name, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, filename)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+
+    # Persist the rename itself; directories cannot be opened on Windows
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return size
+
+
+def append_durable(filename: str, chunks: Iterable[bytes]) -> int:
+    """Append chunks to filename and fsync; returns the number of bytes written."""
+    size = 0
+    with open(filename, "ab") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    return size
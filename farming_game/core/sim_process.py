@@ -0,0 +1,256 @@
+"""
+Simulation worker process with double-buffered shared state.
+
+SimulationProcess moves a farm into a process of its own, so a heavy tick
+runs on another core instead of lengthening the frame. The worker steps
+the farm on a FixedStepClock; after every step or command it writes the
+whole farm, in the uncompressed binary save layout, into the back one of
+two shared memory buffers and then flips them. The renderer copies the
+front buffer out under the flip lock and catches its RenderMirror up
+with it, so it always draws one complete, read-only state. Each buffer
+also lists the cells changed since the state the renderer last copied,
+so only those are redrawn without comparing the whole farm.
+
+Player actions, saves and loads go to the worker over a command queue.
+Actions and loads wait for the worker's reply; the worker records them in
+its own input log, so the session can still be replayed headless.
+"""
+import multiprocessing
+import queue
+import struct
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import List, Optional
+from farming_game.data.constants import (SIM_STEP_SECONDS, SIM_STATE_SLACK_BYTES, SIM_WORKER_REPLY_TIMEOUT,
+                                         INPUT_LOG_PATH)
+from farming_game.core.field import CELL_RECORD_SIZE
+from farming_game.core.game_manager import GameManager
+from farming_game.core.save_snapshot import take_snapshot, take_save_snapshot
+from farming_game.core.binary_save import encode_binary, decode_binary, apply_snapshot
+from farming_game.core.autosave import SaveResult
+from farming_game.core.input_log import InputLog
+from farming_game.core.simulation import perform_action
+from farming_game.core.game_loop import FixedStepClock, RenderMirror
+
+# Worker commands the game waits on for a reply
+REPLYING = ("action", "load")
+
+# Start of each shared buffer: state length, generation the changed-cell list counts from (-1: no list),
+# number of changed cells; the state follows, then the list as native ints
+BUFFER_HEADER = struct.Struct("=qqq")
+
+
+def write_state(buffer, game_manager) -> int:
+    """Write the farm into buffer as an uncompressed binary save; returns its length."""
+    offset = 0
+    for chunk in encode_binary(take_snapshot(game_manager)):
+        end = offset + len(chunk)
+        if end > len(buffer):
+            raise ValueError(f"Farm state needs more than the {len(buffer)} bytes of its shared buffer")
+        buffer[offset:end] = chunk
+        offset = end
+    return offset
+
+
+class SimulationWorker:
+    """The worker process's side: owns the farm, steps it and publishes it."""
+
+    def __init__(self, state: bytes, seed: int, ticks: int, last_update: int, buffer_names: List[str],
+                 control, commands, replies, notices, log_path: Optional[str], autosave: bool, step: float):
+        # Built the way replay_segment builds a segment's farm, so the log replays bit for bit
+        snapshot = decode_binary(bytearray(state))
+        self.game_manager = GameManager(snapshot.width, snapshot.height, seed=seed)
+        apply_snapshot(self.game_manager, snapshot)
+        self.game_manager.ticks = ticks
+        self.game_manager.last_update_time = last_update
+        if autosave:
+            self.game_manager.enable_autosave(journal=True)
+        self.input_log = InputLog.open(log_path) if log_path else None
+        if self.input_log:
+            self.input_log.start(self.game_manager, snapshot=True)
+
+        self.buffers = [shared_memory.SharedMemory(name=name) for name in buffer_names]
+        self.control = control  # published generation, generation last copied by the renderer
+        self.versions = {}  # field version of each generation the renderer may still hold
+        self.commands = commands
+        self.replies = replies
+        self.notices = notices
+        self.clock = FixedStepClock(step)
+        self.running = True
+
+    def publish(self):
+        """Write the farm into the back buffer, then make it the front one."""
+        field = self.game_manager.field
+        generation = self.control[0] + 1
+        buffer = self.buffers[generation % 2].buf
+        length = write_state(buffer[BUFFER_HEADER.size:], self.game_manager)
+
+        # Cells changed since the renderer's copy; more than that is harmless, as they are compared anyway
+        seen = self.control[1]
+        base, count = -1, 0
+        if seen in self.versions:
+            changed = field.changed_since(self.versions[seen])
+            offset = BUFFER_HEADER.size + length
+            if offset + len(changed) * 4 <= len(buffer):
+                indices = array("i", changed).tobytes()
+                buffer[offset:offset + len(indices)] = indices
+                base, count = seen, len(changed)
+        BUFFER_HEADER.pack_into(buffer, 0, length, base, count)
+        self.versions = {g: version for g, version in self.versions.items() if g >= seen}
+        self.versions[generation] = field.version
+
+        with self.control.get_lock():
+            self.control[0] = generation
+
+    def handle(self, command: tuple):
+        """Carry out one command; returns the reply for commands in REPLYING."""
+        game_manager = self.game_manager
+        kind = command[0]
+        if kind == "action":
+            _, action, params = command
+            if self.input_log:
+                self.input_log.record(action, **params)
+            return perform_action(game_manager, action, **params)
+        elif kind == "save":
+            game_manager.save_game_async(command[1])
+        elif kind == "load":
+            # Same sequence as FarmingGame's Ctrl+L: let saves land, close the segment, load
+            game_manager.autosaver.flush()
+            if self.input_log:
+                self.input_log.end()
+            loaded = game_manager.load_game(command[1])
+            if self.input_log:
+                self.input_log.start(game_manager, snapshot=True)
+            return loaded
+        elif kind == "stop":
+            self.running = False
+        else:
+            raise ValueError(f"Unknown worker command '{kind}'")
+
+    def run(self):
+        game_manager = self.game_manager
+        self.publish()
+        last = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            steps = self.clock.advance(now - last)
+            last = now
+            for _ in range(steps):
+                game_manager.step()
+                if self.input_log:
+                    self.input_log.note_update()
+            if steps:
+                self.publish()
+
+            # Wait for a command until the next step is due
+            try:
+                command = self.commands.get(timeout=max(self.clock.step - self.clock.accumulator, 0.0))
+            except queue.Empty:
+                command = None
+            if command is not None:
+                reply = self.handle(command)
+                # Published first, so the renderer can show the outcome as soon as it has the reply
+                self.publish()
+                if command[0] in REPLYING:
+                    self.replies.put(reply)
+
+            for result in game_manager.autosaver.poll_results():
+                self.notices.put(result)
+
+        game_manager.autosaver.flush()
+        if self.input_log:
+            self.input_log.close()
+        for buffer in self.buffers:
+            buffer.close()
+
+
+def run_worker(*args):
+    """Entry point of the worker process."""
+    SimulationWorker(*args).run()
+
+
+class SimulationProcess:
+    """The game's side: sends commands to the worker and reads back the state it publishes."""
+
+    def __init__(self, game_manager: GameManager, log_path: Optional[str] = INPUT_LOG_PATH,
+                 autosave: bool = False, step: float = SIM_STEP_SECONDS):
+        # The worker takes over the farm from here; game_manager is only read for its initial state
+        context = multiprocessing.get_context("spawn")  # no fork of the display's threads
+        field = game_manager.field
+        size = BUFFER_HEADER.size + field.size * CELL_RECORD_SIZE + SIM_STATE_SLACK_BYTES
+        self.buffers = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+        self.control = context.Array("q", 2)  # published generation, generation last copied here
+        self.commands = context.Queue()
+        self.replies = context.Queue()
+        self.notices = context.Queue()  # SaveResults of the worker's saves
+        self.generation = 0  # last one copied into the mirror
+        self.mirror = RenderMirror(game_manager)
+        state = b"".join(encode_binary(take_save_snapshot(game_manager)))
+        self.process = context.Process(
+            target=run_worker, name="simulation", daemon=True,
+            args=(state, game_manager.seed, game_manager.ticks, game_manager.last_update_time,
+                  [buffer.name for buffer in self.buffers], self.control, self.commands, self.replies,
+                  self.notices, log_path, autosave, step))
+
+    def start(self):
+        self.process.start()
+
+    def stop(self, timeout: float = SIM_WORKER_REPLY_TIMEOUT):
+        """Ask the worker to finish its saves and exit, then release the shared buffers."""
+        if self.process.is_alive():
+            self.commands.put(("stop",))
+            self.process.join(timeout)
+            if self.process.is_alive():
+                print("Simulation worker did not stop; terminating it")
+                self.process.terminate()
+                self.process.join()
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+
+    def request(self, command: tuple):
+        self.commands.put(command)
+        try:
+            return self.replies.get(timeout=SIM_WORKER_REPLY_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError("Simulation worker stopped responding") from None
+
+    def perform(self, action: str, **params):
+        """Apply a player action in the worker and return its result, like perform_action."""
+        return self.request(("action", action, params))
+
+    def save_game_async(self, filename: str = "savegame.json"):
+        """Have the worker save in the background; the outcome arrives through poll_results."""
+        self.commands.put(("save", filename))
+
+    def load_game(self, filename: str = "savegame.json") -> bool:
+        return self.request(("load", filename))
+
+    def poll_results(self) -> List[SaveResult]:
+        """Results of the worker's saves that finished since the last call."""
+        results = []
+        while True:
+            try:
+                results.append(self.notices.get_nowait())
+            except queue.Empty:
+                return results
+
+    def refresh(self) -> bool:
+        """Catch the mirror up with the worker's latest state; returns False if nothing new was published."""
+        with self.control.get_lock():
+            generation = self.control[0]
+            if generation == self.generation:
+                return False
+            buffer = self.buffers[generation % 2].buf
+            length, base, count = BUFFER_HEADER.unpack_from(buffer, 0)
+            offset = BUFFER_HEADER.size
+            data = bytearray(buffer[offset:offset + length])
+            changed = None
+            if base >= 0:
+                # Counted from a generation no newer than the mirror's, so it covers every change since
+                changed = array("i", bytes(buffer[offset + length:offset + length + count * 4]))
+            self.control[1] = generation
+        self.generation = generation
+        self.mirror.sync(decode_binary(data), changed)
+        return True
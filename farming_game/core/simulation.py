@@ -0,0 +1,552 @@
+"""
+Headless simulation: drive GameManager without a display, with scripted or
+random player actions, and measure where tick time goes. Also replays
+recorded sessions (see input_log) bit for bit, and checks that journaled
+autosaves recover the farm exactly.
+"""
+import base64
+import contextlib
+import copy
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from farming_game.data.data_classes import Position, CellState, CellType, InteractionResult
+from farming_game.data.constants import FIELD_WIDTH, FIELD_HEIGHT, GAME_DAY_LENGTH, MINUTES_PER_SECOND, PLANT_REGISTRY
+from farming_game.core.game_manager import GameManager
+from farming_game.core.player import Player
+from farming_game.core.chunked_field import ChunkedField
+from farming_game.core.binary_save import decode_binary, apply_snapshot
+from farming_game.core.input_log import state_digest, read_segments
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DIRECTIONS = {
+    "up": Position(0, -1),
+    "down": Position(0, 1),
+    "left": Position(-1, 0),
+    "right": Position(1, 0),
+}
+
+
+def batch_cells(field, params: dict) -> Optional[List[int]]:
+    """Cells a batch action applies to: params["rect"] as [left, top, width, height], params["cells"]
+    as field indices, or None when neither is given."""
+    if "rect" in params:
+        return field.rect_indices(*params["rect"])
+    if "cells" in params:
+        return list(params["cells"])
+    return None
+
+
+def perform_action(game_manager: GameManager, action: str, **params):
+    """Apply one player action the way FarmingGame's key handlers do."""
+    player = game_manager.player
+    pos = player.position
+    storage = game_manager.storage_system
+
+    if action == "move":
+        direction = DIRECTIONS.get(params.get("direction"))
+        if direction is None:
+            direction = Position(params.get("dx", 0), params.get("dy", 0))
+            # One tile per move, as from the keyboard; remote clients send any signed byte
+            if not (-1 <= direction.x <= 1 and -1 <= direction.y <= 1):
+                raise ValueError(f"Move ({direction.x}, {direction.y}) is more than one tile")
+        return player.move(direction)
+    elif action == "plant":
+        return game_manager.plant_system.plant_seed(player, pos, params["plant"])
+    elif action == "water":
+        return game_manager.plant_system.water_plant(pos)
+    elif action == "harvest":
+        return game_manager.plant_system.harvest_plant(player, pos)
+    elif action == "forage":
+        return game_manager.forage_system.forage_item(player, pos)
+    elif action == "buy":
+        if not storage.is_seed_shop_position(pos.x, pos.y):
+            return InteractionResult.NOT_POSSIBLE
+        return storage.buy_seeds(player, params.get("plant", "carrot"), params.get("quantity", 1))
+    elif action == "ship":
+        if not storage.is_shipping_position(pos.x, pos.y):
+            return InteractionResult.NOT_POSSIBLE
+        return storage.ship_items(player)
+    elif action == "place_sprinkler":
+        return game_manager.irrigation_system.place_sprinkler(player, pos)
+    elif action == "remove_sprinkler":
+        return game_manager.irrigation_system.remove_sprinkler(player, pos)
+    # Batch actions, for automation: any cells of the field, BatchResult per cell
+    elif action == "plant_many":
+        cells = batch_cells(game_manager.field, params)
+        if cells is None:
+            raise ValueError("plant_many needs cells or rect")
+        return game_manager.plant_system.plant_seeds(player, params["plant"], cells)
+    elif action == "water_many":
+        return game_manager.plant_system.water_plants(batch_cells(game_manager.field, params))
+    elif action == "harvest_many":
+        return game_manager.plant_system.harvest_plants(player, batch_cells(game_manager.field, params))
+    elif action == "forage_many":
+        return game_manager.forage_system.forage_items(player, batch_cells(game_manager.field, params))
+    elif action == "buy_basket":
+        if not storage.is_seed_shop_position(pos.x, pos.y):
+            return InteractionResult.NOT_POSSIBLE
+        return storage.buy_seed_basket(player, params["basket"])
+    elif action == "ship_basket":
+        if not storage.is_shipping_position(pos.x, pos.y):
+            return InteractionResult.NOT_POSSIBLE
+        return storage.ship_basket(player, params["basket"])
+    raise ValueError(f"Unknown action '{action}'")
+
+
+class ScriptedPlayer:
+    """Replays a list of {"tick": n, "action": name, ...params} entries."""
+
+    def __init__(self, script: List[dict]):
+        self.script = sorted(script, key=lambda entry: entry["tick"])
+        self.next_entry = 0
+
+    def act(self, game_manager: GameManager, tick: int):
+        while self.next_entry < len(self.script) and self.script[self.next_entry]["tick"] <= tick:
+            entry = dict(self.script[self.next_entry])
+            del entry["tick"]
+            perform_action(game_manager, entry.pop("action"), **entry)
+            self.next_entry += 1
+
+
+class RandomPlayer:
+    """Takes a random action on a fraction of ticks."""
+
+    def __init__(self, rng: random.Random, action_rate: float = 0.2):
+        self.rng = rng
+        self.action_rate = action_rate
+
+    def act(self, game_manager: GameManager, tick: int):
+        if self.rng.random() >= self.action_rate:
+            return
+        action = self.rng.choice(["move", "move", "move", "plant", "water", "harvest", "forage", "buy", "ship"])
+        if action == "move":
+            perform_action(game_manager, "move", direction=self.rng.choice(list(DIRECTIONS)))
+        elif action in ("plant", "buy"):
+            perform_action(game_manager, action, plant=self.rng.choice(list(PLANT_REGISTRY)))
+        else:
+            perform_action(game_manager, action)
+
+
+@dataclass
+class SimulationReport:
+    ticks: int = 0
+    days: int = 0
+    elapsed: float = 0.0
+    subsystem_times: Dict[str, float] = field(default_factory=dict)
+    peak_traced_bytes: Optional[int] = None
+    max_rss_kb: Optional[int] = None
+    field_bytes: int = 0
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "days": self.days,
+            "elapsed": self.elapsed,
+            "ticks_per_second": self.ticks_per_second,
+            "subsystem_times": dict(self.subsystem_times),
+            "peak_traced_bytes": self.peak_traced_bytes,
+            "max_rss_kb": self.max_rss_kb,
+            "field_bytes": self.field_bytes,
+        }
+
+    def format(self) -> str:
+        lines = [
+            f"Simulated {self.ticks} ticks ({self.days} days) in {self.elapsed:.3f}s "
+            f"-> {self.ticks_per_second:,.0f} ticks/sec",
+        ]
+        for name, seconds in sorted(self.subsystem_times.items(), key=lambda item: -item[1]):
+            share = seconds / self.elapsed * 100 if self.elapsed > 0 else 0.0
+            lines.append(f"  {name:<10} {seconds:8.3f}s  {share:5.1f}%")
+        lines.append(f"  field storage {self.field_bytes:,} bytes")
+        if self.peak_traced_bytes is not None:
+            lines.append(f"  peak traced memory {self.peak_traced_bytes:,} bytes")
+        if self.max_rss_kb is not None:
+            lines.append(f"  max RSS {self.max_rss_kb:,} KB")
+        return "\n".join(lines)
+
+
+def wrap_timed(owner, method_name: str, label: str, totals: Dict[str, float]):
+    """Replace owner.method_name with a wrapper adding its run time to totals[label]."""
+    method = getattr(owner, method_name)
+    totals.setdefault(label, 0.0)
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            totals[label] += time.perf_counter() - start
+
+    setattr(owner, method_name, timed)
+
+
+def populate_field(game_manager: GameManager, density: float, rng: random.Random):
+    """Plant a random crop, already watered, in roughly density of all cells."""
+    field = game_manager.field
+    plant_types = list(PLANT_REGISTRY)
+    for i in range(field.size):
+        if rng.random() < density:
+            field.set_cell(field.position_of(i), CellState(
+                cell_type=CellType.PLANTED,
+                plant_type=rng.choice(plant_types),
+                watered=True,
+            ))
+
+
+class HeadlessRunner:
+    """Drives GameManager.update with a fixed timestep and no display."""
+
+    def __init__(self, game_manager: GameManager, timestep: float = 1.0 / MINUTES_PER_SECOND,
+                 player=None, quiet: bool = True):
+        self.game_manager = game_manager
+        self.timestep = timestep
+        self.player = player
+        self.quiet = quiet
+        self.tick = 0
+        self.subsystem_times: Dict[str, float] = {}
+        wrap_timed(game_manager.plant_system, "update_plant_growth", "plants", self.subsystem_times)
+        wrap_timed(game_manager.field, "update_forage_spawns", "forage", self.subsystem_times)
+        wrap_timed(game_manager.storage_system, "ship_items", "shipping", self.subsystem_times)
+        if player is not None:
+            wrap_timed(player, "act", "actions", self.subsystem_times)
+
+    def run(self, ticks: int, trace_memory: bool = False) -> SimulationReport:
+        game_manager = self.game_manager
+        start_day = game_manager.game_state.day
+        for name in self.subsystem_times:
+            self.subsystem_times[name] = 0.0
+        if trace_memory:
+            tracemalloc.start()
+
+        # GameManager reports each day on stdout; keep long runs quiet
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext()):
+            start = time.perf_counter()
+            for _ in range(ticks):
+                if self.player is not None:
+                    self.player.act(game_manager, self.tick)
+                game_manager.update(self.timestep)
+                self.tick += 1
+            elapsed = time.perf_counter() - start
+
+        report = SimulationReport(
+            ticks=ticks,
+            days=game_manager.game_state.day - start_day,
+            elapsed=elapsed,
+            subsystem_times=dict(self.subsystem_times),
+            field_bytes=len(game_manager.field.buffer),
+        )
+        if trace_memory:
+            report.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if resource is not None:
+            report.max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return report
+
+
+@dataclass
+class ReplayReport:
+    segments: int = 0
+    ticks: int = 0
+    actions: int = 0
+    elapsed: float = 0.0
+    mismatches: List[str] = field(default_factory=list)  # segments whose final state differed
+    unverified: int = 0  # segments with no end digest (e.g. the game crashed)
+
+    @property
+    def verified(self) -> bool:
+        return not self.mismatches
+
+    def format(self) -> str:
+        rate = self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+        lines = [f"Replayed {self.segments} segments, {self.ticks} ticks and {self.actions} actions "
+                 f"in {self.elapsed:.3f}s -> {rate:,.0f} ticks/sec"]
+        if self.unverified:
+            lines.append(f"  {self.unverified} segments had no final digest to check")
+        lines.extend(f"  MISMATCH {mismatch}" for mismatch in self.mismatches)
+        if self.verified:
+            lines.append("  final states match the recording")
+        return "\n".join(lines)
+
+
+def update_to_minute(game_manager: GameManager, minute: int):
+    """Run one GameManager.update that lands exactly on minute, as the recorded update did."""
+    state = game_manager.game_state
+    if minute < int(state.time_minutes):
+        state.time_minutes = float(GAME_DAY_LENGTH)  # The day rolled over; minute is 0
+    else:
+        state.time_minutes = float(minute)
+    game_manager.update(0)
+
+
+def replay_segment(segment: List[dict]) -> Tuple[GameManager, Optional[bool], int]:
+    """Replay one input log segment; returns the farm, whether it matched the end digest (None if
+    there was none) and the number of actions applied."""
+    header, entries = segment[0], segment[1:]
+    game_manager = GameManager(header["width"], header["height"], seed=header["seed"])
+    if header["snapshot"]:
+        apply_snapshot(game_manager, decode_binary(base64.b64decode(header["snapshot"])))
+    game_manager.ticks = header["ticks"]
+    game_manager.last_update_time = header["last_update"]
+
+    def update_until(tick: int):
+        while game_manager.ticks < tick:
+            update_to_minute(game_manager, (game_manager.last_update_time + 1) % GAME_DAY_LENGTH)
+
+    matched = None
+    actions = 0
+    for entry in entries:
+        action = entry["action"]
+        if action == "clock":
+            update_until(entry["tick"] - 1)
+            update_to_minute(game_manager, entry["minute"])
+        elif action == "end":
+            update_until(entry["tick"])
+            matched = state_digest(game_manager) == entry["digest"]
+        else:
+            update_until(entry["tick"])
+            params = {key: value for key, value in entry.items() if key not in ("tick", "action")}
+            perform_action(game_manager, action, **params)
+            actions += 1
+    return game_manager, matched, actions
+
+
+def replay_session(filename: str, quiet: bool = True) -> ReplayReport:
+    """Replay every segment of an input log headless and check each against its recorded digest."""
+    report = ReplayReport()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        for segment in read_segments(filename):
+            first_tick = segment[0]["ticks"]
+            game_manager, matched, actions = replay_segment(segment)
+            report.segments += 1
+            report.ticks += game_manager.ticks - first_tick
+            report.actions += actions
+            if matched is None:
+                report.unverified += 1
+            elif not matched:
+                report.mismatches.append(f"segment {report.segments} (seed {segment[0]['seed']}) "
+                                         f"at tick {game_manager.ticks}")
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def check_recovery(width: int, height: int, density: float, ticks: int, seed: int = 0,
+                   vectorized: bool = True, continue_ticks: int = GAME_DAY_LENGTH) -> List[str]:
+    """Play a farm with journaled autosaves, recover it into a fresh GameManager and list what
+    differs from the live farm; an empty list means recovery was exact.
+
+    Both farms then play on for continue_ticks with the same inputs and are compared again, so
+    random streams that recovery failed to restore show up too. vectorized=False runs both farms
+    on the scalar growth path, as without NumPy.
+    """
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "recover.fgsv")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        live = GameManager(width, height, seed=seed)
+        recovered = GameManager(width, height, seed=seed)
+        if not vectorized:
+            live.plant_system.growth_engine = None
+            recovered.plant_system.growth_engine = None
+        populate_field(live, density, random.Random(seed))
+        # Enough money and seeds that most random actions change something
+        live.player.money = 1_000_000
+        for plant_type in PLANT_REGISTRY:
+            live.player.add_item(f"{plant_type}_seeds", 1000)
+        live.enable_autosave(filename, journal=True)
+
+        player = RandomPlayer(random.Random(seed + 1), action_rate=0.5)
+        for tick in range(ticks):
+            player.act(live, tick)
+            live.update(1.0 / MINUTES_PER_SECOND)
+        live.autosaver.save_journal(live)
+        live.autosaver.flush()
+        recovered.recover_game(filename)
+        mismatches = recovery_differences(recovered, live, "after recovery")
+
+        # The live farm keeps autosaving; saves must not change how it plays on
+        for farm in (live, recovered):
+            player = RandomPlayer(random.Random(seed + 2), action_rate=0.5)
+            for tick in range(continue_ticks):
+                player.act(farm, tick)
+                farm.update(1.0 / MINUTES_PER_SECOND)
+        mismatches += recovery_differences(recovered, live, f"{continue_ticks} ticks later")
+        live.autosaver.flush()
+    shutil.rmtree(directory, ignore_errors=True)
+    return mismatches
+
+
+def recovery_differences(recovered: GameManager, live: GameManager, label: str) -> List[str]:
+    mismatches = []
+    changed = recovered.field.changed_cells(live.field.snapshot_buffer())
+    if changed:
+        mismatches.append(f"{label}: {len(changed)} cells differ, first at index {min(changed)}")
+    if ((recovered.player.position, recovered.player.money, recovered.player.inventory)
+            != (live.player.position, live.player.money, live.player.inventory)):
+        mismatches.append(f"{label}: player differs")
+    if ((recovered.game_state.day, recovered.game_state.time_minutes)
+            != (live.game_state.day, live.game_state.time_minutes)):
+        mismatches.append(f"{label}: clock differs")
+    if recovered.ticks != live.ticks:
+        mismatches.append(f"{label}: tick count {recovered.ticks}, live farm {live.ticks}")
+    return mismatches
+
+
+class ChunkWalker:
+    """Plays a chunked map: walks a player over it, jumping to a random spot within extent cells of
+    the origin every jump_every ticks, keeps the chunks around them loaded and works the cell underfoot."""
+
+    def __init__(self, world: ChunkedField, rng: random.Random, extent: int,
+                 action_rate: float = 0.5, jump_every: int = 60):
+        self.world = world
+        self.rng = rng
+        self.extent = extent
+        self.action_rate = action_rate
+        self.jump_every = jump_every
+        self.player = Player(Position(0, 0), None, None)
+        self.player.money = 1_000_000
+        for plant_type in PLANT_REGISTRY:
+            self.player.add_item(f"{plant_type}_seeds", 1_000_000)
+
+    def populate(self, density: float):
+        """Plant a random crop in roughly density of the cells within extent."""
+        plant_types = list(PLANT_REGISTRY)
+        for y in range(self.extent):
+            for x in range(self.extent):
+                if self.rng.random() < density:
+                    self.world.plant_seed(self.player, Position(x, y), self.rng.choice(plant_types))
+
+    def act(self, tick: int):
+        world, rng, player = self.world, self.rng, self.player
+        if tick % self.jump_every == 0:
+            player.position = Position(rng.randrange(self.extent), rng.randrange(self.extent))
+        else:
+            player.move(rng.choice(list(DIRECTIONS.values())))
+        world.activate_around(player.position)
+        if rng.random() >= self.action_rate:
+            return
+        pos = player.position
+        cell = world.get_cell(pos)
+        if cell is None or cell.cell_type == CellType.EMPTY:
+            world.plant_seed(player, pos, rng.choice(list(PLANT_REGISTRY)))
+        elif cell.cell_type == CellType.FORAGE:
+            world.forage_item(player, pos)
+        elif cell.cell_type == CellType.PLANTED:
+            if world.harvest_plant(player, pos) != InteractionResult.SUCCESS:
+                world.water_plant(pos)
+
+
+def run_chunked(walkers: List[ChunkWalker], ticks: int, first_tick: int = 0):
+    """Step every walker's map one game minute per tick, in lockstep."""
+    for tick in range(first_tick, first_tick + ticks):
+        for walker in walkers:
+            walker.act(tick)
+            walker.world.update((walker.world.minute + 1) % GAME_DAY_LENGTH)
+
+
+def chunk_map_differences(world: ChunkedField, reference: ChunkedField) -> List[str]:
+    """What differs between two chunked maps at the same tick; pages every chunk of both back in."""
+    for each in (world, reference):
+        for key in list(each.paged):
+            each.page_in(key)
+    differences = []
+    if world.chunks.keys() != reference.chunks.keys():
+        differences.append(f"{len(world.chunks.keys() ^ reference.chunks.keys())} chunks exist in only one map")
+    changed = [key for key in sorted(world.chunks.keys() & reference.chunks.keys())
+               if world.chunks[key].field.changed_cells(reference.chunks[key].field.snapshot_buffer())]
+    if changed:
+        differences.append(f"{len(changed)} chunks differ, first {changed[0]}")
+    if world.tick != reference.tick:
+        differences.append(f"tick {world.tick}, reference {reference.tick}")
+    return differences
+
+
+def check_chunk_paging(extent: int, density: float, ticks: int, idle_ticks: int, seed: int = 0,
+                       page_dir: Optional[str] = None) -> List[str]:
+    """Play the same chunked map with idle chunks paged out and with every chunk kept loaded, list
+    what differs at the end; an empty list means paging was exact.
+
+    Halfway through both maps are saved, and a third map loaded from the paged one's save plays
+    the second half alongside them, to check that a loaded map carries on like the saved one.
+    """
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "map.fgcm")
+    paged = ChunkWalker(ChunkedField(idle_ticks=idle_ticks, page_dir=page_dir, seed=seed),
+                        random.Random(seed), extent)
+    loaded = ChunkWalker(ChunkedField(idle_ticks=0, seed=seed), random.Random(seed), extent)
+    walkers = [paged, loaded]
+    for walker in walkers:
+        walker.populate(density)
+    half = ticks // 2
+    run_chunked(walkers, half)
+
+    loaded.world.save(filename)
+    paged.world.save(filename)
+    # The same walk from here on, by the same player
+    restored = ChunkWalker(ChunkedField.load(filename, idle_ticks=idle_ticks), copy.deepcopy(paged.rng), extent)
+    restored.player = copy.deepcopy(paged.player)
+    shutil.rmtree(directory, ignore_errors=True)
+    walkers.append(restored)
+    run_chunked(walkers, ticks - half, half)
+
+    mismatches = [f"paged: {difference}" for difference in chunk_map_differences(paged.world, loaded.world)]
+    mismatches += [f"loaded from save: {difference}"
+                   for difference in chunk_map_differences(restored.world, loaded.world)]
+    for label, walker in (("paged", paged), ("loaded from save", restored)):
+        if (walker.player.money, walker.player.inventory) != (loaded.player.money, loaded.player.inventory):
+            mismatches.append(f"{label}: player differs")
+    return mismatches
+
+
+def run_benchmark(sizes: List[tuple], densities: List[float], ticks: int = GAME_DAY_LENGTH,
+                  seed: int = 0, progress: Optional[Callable[[dict], None]] = None) -> List[dict]:
+    """Time the tick path for every (grid size, crop density) combination."""
+    results = []
+    for width, height in sizes:
+        for density in densities:
+            rng = random.Random(seed)
+            game_manager = GameManager(width, height, seed=seed)
+            populate_field(game_manager, density, rng)
+            report = HeadlessRunner(game_manager).run(ticks)
+            result = {"width": width, "height": height, "density": density}
+            result.update(report.to_dict())
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
+
+
+def find_regressions(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Describe every case whose ticks/sec fell more than tolerance below the baseline."""
+    expected = {(r["width"], r["height"], r["density"]): r["ticks_per_second"] for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result["width"], result["height"], result["density"])
+        if key not in expected:
+            continue
+        floor = expected[key] * (1.0 - tolerance)
+        if result["ticks_per_second"] < floor:
+            regressions.append(
+                f"{key[0]}x{key[1]} density {key[2]}: {result['ticks_per_second']:,.0f} ticks/sec "
+                f"< {floor:,.0f} (baseline {expected[key]:,.0f})"
+            )
+    return regressions
+
+
+DEFAULT_BENCH_SIZES = [(FIELD_WIDTH, FIELD_HEIGHT), (64, 64), (256, 256)]
+DEFAULT_BENCH_DENSITIES = [0.0, 0.25, 1.0]
@@ -0,0 +1,278 @@
+"""
+SQLite save backend on the data/farming_game.db schema.
+
+Saves run as one transaction with executemany batches. After the first
+save to a slot, only cells that changed since the last save or load of
+that slot are written. The database runs in WAL mode so readers never
+wait on a save in progress.
+
+The game thread only takes a SaveSnapshot (prepare); diffing it against
+what the slot last held and the transaction itself run in write(),
+which the Autosaver's worker thread calls through SQLiteSaveJob, so a
+large save never stalls a frame. One lock serialises every use of the
+connection.
+"""
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from farming_game.data.data_classes import Position, CELL_TYPES, CELL_TYPE_CODES, CellType
+from farming_game.data.constants import SAVE_DATABASE_PATH, DEFAULT_USERNAME, DEFAULT_SAVE_NAME
+from farming_game.core.field import column_views, changed_between
+from farming_game.core.forage_scheduler import ForageState
+from farming_game.core.save_snapshot import SaveSnapshot, take_snapshot, take_save_snapshot
+
+INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_game_saves_player_slot ON game_saves (player_id, save_name)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_field_cells_save_cell ON field_cells (save_id, y, x)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_inventory_items_save_item ON inventory_items (save_id, item_name)",
+)
+
+# Used when the database file does not exist yet; matches data/farming_game.db
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS players (
+        id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, created_at DATETIME, last_played DATETIME,
+        PRIMARY KEY (id), UNIQUE (username))""",
+    """CREATE TABLE IF NOT EXISTS game_saves (
+        id INTEGER NOT NULL, player_id INTEGER NOT NULL, save_name VARCHAR(100) NOT NULL,
+        day INTEGER, time_minutes INTEGER, player_pos_x INTEGER, player_pos_y INTEGER, player_money INTEGER,
+        created_at DATETIME, updated_at DATETIME, seed INTEGER, forage_schedule BLOB,
+        PRIMARY KEY (id), FOREIGN KEY(player_id) REFERENCES players (id))""",
+    """CREATE TABLE IF NOT EXISTS field_cells (
+        id INTEGER NOT NULL, save_id INTEGER NOT NULL, x INTEGER NOT NULL, y INTEGER NOT NULL,
+        cell_type VARCHAR(20) NOT NULL, plant_type VARCHAR(50), growth_stage INTEGER, watered BOOLEAN,
+        forage_item VARCHAR(50), forage_spawn_time INTEGER, plant_timer INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(save_id) REFERENCES game_saves (id))""",
+    """CREATE TABLE IF NOT EXISTS inventory_items (
+        id INTEGER NOT NULL, save_id INTEGER NOT NULL, item_name VARCHAR(50) NOT NULL, quantity INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(save_id) REFERENCES game_saves (id))""",
+)
+
+# Columns added since data/farming_game.db was created: (table, column, definition)
+ADDED_COLUMNS = (
+    ("game_saves", "seed", "INTEGER"),
+    ("game_saves", "forage_schedule", "BLOB"),  # zlib-compressed ForageState.pack()
+)
+
+UPSERT_CELL = """
+    INSERT INTO field_cells (save_id, x, y, cell_type, plant_type, growth_stage, watered,
+                             forage_item, forage_spawn_time, plant_timer)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (save_id, y, x) DO UPDATE SET
+        cell_type = excluded.cell_type, plant_type = excluded.plant_type,
+        growth_stage = excluded.growth_stage, watered = excluded.watered,
+        forage_item = excluded.forage_item, forage_spawn_time = excluded.forage_spawn_time,
+        plant_timer = excluded.plant_timer
+"""
+
+
+def timestamp() -> str:
+    return datetime.now().isoformat(" ")
+
+
+@dataclass
+class SQLiteSaveJob:
+    """Background write of one save slot, queued on the Autosaver like a SaveJob."""
+    backend: "SQLiteSaveBackend"
+    username: str
+    save_name: str
+    snapshot: SaveSnapshot
+    reason: str = "manual"
+
+    @property
+    def filename(self) -> str:
+        return self.backend.path
+
+    @property
+    def key(self) -> tuple:
+        return (self.backend.path, self.username, self.save_name)
+
+    def merge(self, newer: "SQLiteSaveJob") -> "SQLiteSaveJob":
+        # write() diffs against what the slot holds, so the newer snapshot covers this one
+        return newer
+
+    def write(self) -> int:
+        """Returns the number of cells written."""
+        return self.backend.write(self)
+
+
+class SQLiteSaveBackend:
+    def __init__(self, path: str = SAVE_DATABASE_PATH):
+        self.path = path
+        # Used from the game thread and the save worker, never both at once (see lock)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            for statement in SCHEMA + INDEXES:
+                self.connection.execute(statement)
+            for table, column, definition in ADDED_COLUMNS:
+                columns = [row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")]
+                if column not in columns:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+        # What each (username, save name) slot holds as of its last save or load
+        self.baselines: Dict[Tuple[str, str], SaveSnapshot] = {}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_player_id(self, username: str) -> int:
+        row = self.connection.execute("SELECT id FROM players WHERE username = ?", (username,)).fetchone()
+        if row:
+            self.connection.execute("UPDATE players SET last_played = ? WHERE id = ?", (timestamp(), row[0]))
+            return row[0]
+        now = timestamp()
+        cursor = self.connection.execute(
+            "INSERT INTO players (username, created_at, last_played) VALUES (?, ?, ?)", (username, now, now))
+        return cursor.lastrowid
+
+    def find_save_id(self, username: str, save_name: str) -> Optional[int]:
+        row = self.connection.execute(
+            "SELECT game_saves.id FROM game_saves JOIN players ON players.id = game_saves.player_id "
+            "WHERE players.username = ? AND game_saves.save_name = ?", (username, save_name)).fetchone()
+        return row[0] if row else None
+
+    def list_saves(self, username: str) -> List[str]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT save_name FROM game_saves JOIN players ON players.id = game_saves.player_id "
+                "WHERE players.username = ? ORDER BY game_saves.updated_at DESC", (username,))
+            return [row[0] for row in rows]
+
+    def changed_indices(self, snapshot: SaveSnapshot, baseline: Optional[SaveSnapshot]) -> Optional[List[int]]:
+        """Cells of snapshot that differ from baseline, or None if every cell has to be rewritten."""
+        if baseline is None or (baseline.width, baseline.height) != (snapshot.width, snapshot.height):
+            return None
+        # Equal ids only mean equal names while the baseline's name tables are a prefix of the new ones
+        if (snapshot.plant_names[:len(baseline.plant_names)] != baseline.plant_names
+                or snapshot.forage_names[:len(baseline.forage_names)] != baseline.forage_names):
+            return None
+        return changed_between(snapshot.cells, baseline.cells, snapshot.width * snapshot.height)
+
+    def cell_rows(self, snapshot: SaveSnapshot, save_id: int, indices) -> List[tuple]:
+        columns = column_views(snapshot.cells, snapshot.width * snapshot.height)
+        cell_type, plant_id, forage_id = columns["cell_type"], columns["plant_id"], columns["forage_id"]
+        growth_stage, watered = columns["growth_stage"], columns["watered"]
+        forage_spawn_time, plant_timer = columns["forage_spawn_time"], columns["plant_timer"]
+        plant_names = snapshot.plant_names
+        forage_names = snapshot.forage_names
+        width = snapshot.width
+        rows = []
+        for i in indices:
+            rows.append((
+                save_id, i % width, i // width,
+                CELL_TYPES[cell_type[i]].value,
+                plant_names[plant_id[i]],
+                growth_stage[i],
+                bool(watered[i]),
+                forage_names[forage_id[i]],
+                forage_spawn_time[i],
+                plant_timer[i],
+            ))
+        return rows
+
+    def prepare(self, game_manager, username: str = DEFAULT_USERNAME, save_name: str = DEFAULT_SAVE_NAME,
+                reason: str = "manual") -> SQLiteSaveJob:
+        """Snapshot the game for a write to a save slot; the cost is one copy of the cell buffer."""
+        return SQLiteSaveJob(self, username, save_name, take_save_snapshot(game_manager), reason)
+
+    def save(self, game_manager, username: str = DEFAULT_USERNAME, save_name: str = DEFAULT_SAVE_NAME) -> int:
+        """Write the game to a save slot right away and return how many cells were written."""
+        return self.write(self.prepare(game_manager, username, save_name))
+
+    def write(self, job: SQLiteSaveJob) -> int:
+        """Write a prepared snapshot to its slot and return how many cells were written."""
+        snapshot = job.snapshot
+        slot = (job.username, job.save_name)
+        now = timestamp()
+
+        with self.lock:
+            try:
+                with self.connection:
+                    player_id = self.get_player_id(job.username)
+                    save_id = self.find_save_id(job.username, job.save_name)
+                    forage = zlib.compress(snapshot.forage.pack()) if snapshot.forage is not None else None
+                    values = (snapshot.day, snapshot.time_minutes, snapshot.player_x, snapshot.player_y,
+                              snapshot.money, snapshot.seed, forage, now)
+                    if save_id is None:
+                        cursor = self.connection.execute(
+                            "INSERT INTO game_saves (player_id, save_name, day, time_minutes, player_pos_x, "
+                            "player_pos_y, player_money, seed, forage_schedule, updated_at, created_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (player_id, job.save_name) + values + (now,))
+                        save_id = cursor.lastrowid
+                    else:
+                        self.connection.execute(
+                            "UPDATE game_saves SET day = ?, time_minutes = ?, player_pos_x = ?, player_pos_y = ?, "
+                            "player_money = ?, seed = ?, forage_schedule = ?, updated_at = ? WHERE id = ?", values + (save_id,))
+
+                    indices = self.changed_indices(snapshot, self.baselines.get(slot))
+                    if indices is None:
+                        # First save of this farm to the slot: rewrite every cell
+                        self.connection.execute("DELETE FROM field_cells WHERE save_id = ?", (save_id,))
+                        indices = range(snapshot.width * snapshot.height)
+                    self.connection.executemany(UPSERT_CELL, self.cell_rows(snapshot, save_id, indices))
+
+                    self.connection.execute("DELETE FROM inventory_items WHERE save_id = ?", (save_id,))
+                    self.connection.executemany(
+                        "INSERT INTO inventory_items (save_id, item_name, quantity) VALUES (?, ?, ?)",
+                        [(save_id, item, quantity) for item, quantity in snapshot.inventory.items()])
+            except Exception:
+                self.baselines.pop(slot, None)  # Rolled back; the next save rewrites the slot
+                raise
+            self.baselines[slot] = snapshot
+        return len(indices)
+
+    def load(self, game_manager, username: str = DEFAULT_USERNAME, save_name: str = DEFAULT_SAVE_NAME) -> bool:
+        with self.lock:
+            return self.load_locked(game_manager, username, save_name)
+
+    def load_locked(self, game_manager, username: str, save_name: str) -> bool:
+        save_id = self.find_save_id(username, save_name)
+        if save_id is None:
+            return False
+
+        day, time_minutes, pos_x, pos_y, money, seed, forage = self.connection.execute(
+            "SELECT day, time_minutes, player_pos_x, player_pos_y, player_money, seed, forage_schedule "
+            "FROM game_saves WHERE id = ?", (save_id,)).fetchone()
+        inventory = dict(self.connection.execute(
+            "SELECT item_name, quantity FROM inventory_items WHERE save_id = ? ORDER BY id", (save_id,)))
+
+        state = game_manager.game_state
+        state.day = day
+        state.time_minutes = time_minutes
+        player = game_manager.player
+        player.position = Position(pos_x, pos_y)
+        player.money = money
+        player.inventory = inventory
+        player.mark_changed()
+
+        field = game_manager.field
+        field.initialize_field()
+        rows = self.connection.execute(
+            "SELECT x, y, cell_type, plant_type, growth_stage, watered, forage_item, forage_spawn_time, plant_timer "
+            "FROM field_cells WHERE save_id = ?", (save_id,))
+        for x, y, cell_type, plant_type, growth_stage, watered, forage_item, spawn_time, plant_timer in rows:
+            if not field.is_valid_position(Position(x, y)):
+                continue
+            i = field.index_of(Position(x, y))
+            field.cell_type[i] = CELL_TYPE_CODES[CellType(cell_type)]
+            field.plant_id[i] = field.plant_names.intern(plant_type)
+            field.growth_stage[i] = growth_stage or 0
+            field.watered[i] = 1 if watered else 0
+            field.forage_id[i] = field.forage_names.intern(forage_item)
+            field.forage_spawn_time[i] = spawn_time or 0
+            field.plant_timer[i] = plant_timer or 0
+        field.mark_dirty(range(field.size))
+        if seed is not None:
+            game_manager.seed = seed
+        game_manager.resume_forage(ForageState.unpack(zlib.decompress(forage)) if forage else None)
+
+        self.baselines[(username, save_name)] = take_snapshot(game_manager)
+        return True
@@ -11,10 +11,16 @@ FPS = 60
 GRID_SIZE = 40
 FIELD_WIDTH = 18
 FIELD_HEIGHT = 17
+VIEW_TILES_X = FIELD_WIDTH  # camera viewport, in tiles; larger fields scroll
+VIEW_TILES_Y = FIELD_HEIGHT
 
 # Time settings (1 game minute = 1 real second)
 GAME_DAY_LENGTH = 900  # 900 game minutes = 15 real minutes
 MINUTES_PER_SECOND = 1  # 1 game minute per real second
+SIM_STEP_SECONDS = 1.0 / MINUTES_PER_SECOND  # wall time per fixed simulation step of one game minute
+SIM_MAX_CATCH_UP_STEPS = 5  # steps run after a slow frame before the game slows down instead
+SIM_STATE_SLACK_BYTES = 64 * 1024  # room for header, name tables and inventory in each shared state buffer
+SIM_WORKER_REPLY_TIMEOUT = 5.0  # seconds to wait for the simulation process to answer a command
 
 # Colors
 BLACK = (0, 0, 0)
@@ -85,14 +91,37 @@ FORAGE_REGISTRY = {
 # UI settings
 UI_PANEL_WIDTH = 300
 FONT_SIZE = 24
+SURFACE_CACHE_SIZE = 512  # rendered emoji/text surfaces kept by the UI
 
 # Game defaults
 DEFAULT_STARTING_MONEY = 20
 DEFAULT_STARTING_SEEDS = {"carrot_seeds": 3, "tomato_seeds": 2}
+SPRINKLER_COST = 100  # paid on placing a sprinkler, refunded on picking it up
+SPRINKLER_RADIUS = 1  # a sprinkler waters the square of cells this far from it
 MESSAGE_DISPLAY_TIME = 2000  # milliseconds
 MOVEMENT_DELAY = 150  # milliseconds
 MAX_INVENTORY_SLOTS = 8
 
+# Save settings
+SAVE_DATABASE_PATH = "data/farming_game.db"
+DEFAULT_USERNAME = "player"
+DEFAULT_SAVE_NAME = "default"
+AUTOSAVE_PATH = "autosave.fgsv"
+AUTOSAVE_INTERVAL_MINUTES = 180  # game minutes between timed autosaves
+JOURNAL_INTERVAL_MINUTES = 10  # autosave cadence when only the journal is appended
+JOURNAL_COMPACT_BYTES = 64 * 1024  # journal size that triggers a fresh snapshot
+INPUT_LOG_PATH = "session_inputs.jsonl"  # the game's player inputs, for headless replay
+
+# Chunked maps
+CHUNK_SIZE = 32  # cells per chunk side
+CHUNK_IDLE_TICKS = 120  # growth updates without activity before a chunk is paged out
+
+# Profiler
+PROFILE_WINDOW = 600  # recent durations per span behind the rolling percentiles
+PROFILE_TRACE_EVENTS = 100000  # most recent spans kept for export
+PROFILE_OVERLAY_REFRESH = 500  # milliseconds between overlay updates
+PROFILE_EXPORT_PATH = "profile_trace.json"  # .csv for CSV
+
 # Player position defaults
 DEFAULT_PLAYER_X = 9
 DEFAULT_PLAYER_Y = 7
@@ -1,8 +1,9 @@
 """
 Core data classes for the farming game.
 """
+from array import array
 from dataclasses import dataclass, field
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Sequence
 from enum import Enum
 
 @dataclass
@@ -20,6 +21,30 @@ class CellType(Enum):
     EMPTY = "empty"
     PLANTED = "planted"
     FORAGE = "forage"
+    SPRINKLER = "sprinkler"
+
+# Integer codes for CellType in the Field's packed cell_type column
+CELL_EMPTY = 0
+CELL_PLANTED = 1
+CELL_FORAGE = 2
+CELL_SPRINKLER = 3
+
+CELL_TYPES = [CellType.EMPTY, CellType.PLANTED, CellType.FORAGE, CellType.SPRINKLER]
+CELL_TYPE_CODES = {cell_type: code for code, cell_type in enumerate(CELL_TYPES)}
+
+# Save journal record kinds
+EVENT_CELL = 0  # cell edited outside the actions below
+EVENT_PLANT = 1
+EVENT_WATER = 2
+EVENT_HARVEST = 3
+EVENT_FORAGE = 4
+EVENT_BUY = 5
+EVENT_SHIP = 6
+EVENT_SPAWN = 7
+EVENT_EXPIRE = 8
+EVENT_CHECKPOINT = 9
+
+EVENT_NAMES = ["cell", "plant", "water", "harvest", "forage", "buy", "ship", "spawn", "expire", "checkpoint"]
 
 @dataclass
 class CellState:
@@ -45,6 +70,21 @@ class GameState:
         minutes = int(self.time_minutes % 60)
         return f"Day {self.day} - {hours:02d}:{minutes:02d}"
 
+@dataclass
+class StateDelta:
+    """What changed since a LiveGameState.versions() token; None means unchanged."""
+    versions: Dict[str, int]  # token to pass to the next delta_since call
+    day: Optional[int] = None
+    time_minutes: Optional[float] = None
+    player_pos: Optional[Position] = None
+    player_money: Optional[int] = None
+    inventory: Dict[str, int] = field(default_factory=dict)  # changed items, 0 = removed
+    cells: Sequence[int] = ()  # indices of changed cells; read them from the Field
+
+    @property
+    def player_changed(self) -> bool:
+        return self.player_pos is not None or self.player_money is not None or bool(self.inventory)
+
 class InteractionResult(Enum):
     SUCCESS = "success"
     FAILED = "failed"
@@ -53,4 +93,36 @@ class InteractionResult(Enum):
     NO_MONEY = "no_money"
     ALREADY_PLANTED = "already_planted"
     NOT_READY = "not_ready"
-    NOTHING_TO_HARVEST = "nothing_to_harvest"
\ No newline at end of file
+    NOTHING_TO_HARVEST = "nothing_to_harvest"
+
+# Integer codes for InteractionResult in a BatchResult's codes
+INTERACTION_RESULTS = list(InteractionResult)
+RESULT_CODES = {result: code for code, result in enumerate(INTERACTION_RESULTS)}
+
+@dataclass
+class BatchResult:
+    """Per-cell outcome of a batch action: codes[i] is the RESULT_CODES value for cells[i]."""
+    cells: array = field(default_factory=lambda: array("i"))  # field indices in request order, -1 if off the field
+    codes: bytearray = field(default_factory=bytearray)
+    
+    def __len__(self) -> int:
+        return len(self.cells)
+    
+    def add(self, index: int, result: InteractionResult):
+        self.cells.append(index)
+        self.codes.append(RESULT_CODES[result])
+    
+    def result(self, i: int) -> InteractionResult:
+        return INTERACTION_RESULTS[self.codes[i]]
+    
+    @property
+    def succeeded(self) -> int:
+        return self.codes.count(RESULT_CODES[InteractionResult.SUCCESS])
+    
+    def successful_cells(self) -> List[int]:
+        success = RESULT_CODES[InteractionResult.SUCCESS]
+        return [index for index, code in zip(self.cells, self.codes) if code == success]
+    
+    def counts(self) -> Dict[InteractionResult, int]:
+        """How many cells ended with each result."""
+        return {INTERACTION_RESULTS[code]: self.codes.count(code) for code in sorted(set(self.codes))}
@@ -0,0 +1,304 @@
+"""
+Multi-farm hosting: many GameManagers on one shared game clock.
+
+A FarmScheduler keeps farms asleep until their next due event (see
+GameManager.minutes_until_next_event) or until a player action arrives,
+then catches them up with fast_forward, so idle farms cost nothing per
+tick. A FarmServer splits farms into shards, one FarmScheduler each, and
+advances the shards in parallel. Each shard lives in a worker process of
+its own for the server's lifetime: a farm is pickled once, when it is
+added, and an advance only sends the queued actions and the minute count
+over the shard's pipe and gets the ActionResults back.
+"""
+import contextlib
+import heapq
+import multiprocessing
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from farming_game.data.constants import FIELD_WIDTH, FIELD_HEIGHT
+from farming_game.core.game_manager import GameManager
+from farming_game.core.simulation import perform_action
+
+
+@dataclass
+class ActionResult:
+    farm_id: int
+    minute: int
+    action: str
+    result: Any
+
+
+class FarmScheduler:
+    def __init__(self, quiet: bool = True):
+        self.quiet = quiet
+        self.minute = 0  # shared clock, in game minutes since the scheduler started
+        self.farms: Dict[int, GameManager] = {}
+        self.farm_minutes: Dict[int, int] = {}  # shared clock each farm was caught up to
+        self.wake_queue: List[Tuple[int, int]] = []  # (due minute, farm id), possibly stale
+        self.wake_due: Dict[int, int] = {}
+        self.actions: Dict[int, List[Tuple[str, dict]]] = {}
+        self.results: List[ActionResult] = []
+        self.farms_woken = 0
+
+    def add_farm(self, farm_id: int, game_manager: GameManager):
+        if farm_id in self.farms:
+            raise ValueError(f"Farm {farm_id} already exists")
+        self.farms[farm_id] = game_manager
+        self.farm_minutes[farm_id] = self.minute
+        self.schedule(farm_id)
+
+    def remove_farm(self, farm_id: int) -> GameManager:
+        self.catch_up(farm_id)
+        self.wake_due.pop(farm_id, None)  # Its queue entry is now stale
+        self.actions.pop(farm_id, None)
+        del self.farm_minutes[farm_id]
+        return self.farms.pop(farm_id)
+
+    def queue_action(self, farm_id: int, action: str, **params):
+        """Apply an action to the farm at the start of the next minute advanced."""
+        if farm_id not in self.farms:
+            raise KeyError(f"No farm {farm_id}")
+        self.actions.setdefault(farm_id, []).append((action, params))
+
+    def schedule(self, farm_id: int):
+        due = self.minute + self.farms[farm_id].minutes_until_next_event()
+        self.wake_due[farm_id] = due
+        heapq.heappush(self.wake_queue, (due, farm_id))
+        if len(self.wake_queue) > 2 * len(self.farms) + 64:
+            # Drop entries superseded by a later schedule() for the same farm
+            self.wake_queue = [(due, farm_id) for farm_id, due in self.wake_due.items()]
+            heapq.heapify(self.wake_queue)
+
+    def catch_up(self, farm_id: int) -> GameManager:
+        """Bring a sleeping farm forward to the shared clock."""
+        game_manager = self.farms[farm_id]
+        behind = self.minute - self.farm_minutes[farm_id]
+        if behind > 0:
+            game_manager.fast_forward(behind)
+            self.farm_minutes[farm_id] = self.minute
+        return game_manager
+
+    def get_farm(self, farm_id: int) -> GameManager:
+        return self.catch_up(farm_id)
+
+    def apply_actions(self):
+        actions, self.actions = self.actions, {}
+        for farm_id, queued in actions.items():
+            game_manager = self.catch_up(farm_id)
+            for action, params in queued:
+                try:
+                    result = perform_action(game_manager, action, **params)
+                except (ValueError, KeyError, TypeError) as e:
+                    result = e
+                self.results.append(ActionResult(farm_id, self.minute, action, result))
+            # The action may have started or stopped something time-dependent
+            self.schedule(farm_id)
+
+    def advance(self, minutes: int) -> List[ActionResult]:
+        """Run the shared clock forward; returns the results of the actions applied."""
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext()):
+            self.apply_actions()
+            target = self.minute + minutes
+            # Only farms with something due are visited, in due order; the
+            # clock jumps straight over minutes where nothing is due
+            while self.wake_queue and self.wake_queue[0][0] <= target:
+                due, farm_id = heapq.heappop(self.wake_queue)
+                if self.wake_due.get(farm_id) != due:
+                    continue
+                self.minute = max(self.minute, due)
+                self.catch_up(farm_id)
+                self.farms_woken += 1
+                self.schedule(farm_id)
+            self.minute = target
+
+        results, self.results = self.results, []
+        return results
+
+    def sync_all(self):
+        """Catch every farm up to the shared clock, e.g. before saving or inspecting them."""
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext()):
+            for farm_id in self.farms:
+                self.catch_up(farm_id)
+
+
+def advance_shard(shard: FarmScheduler, minutes: int,
+                  actions: List[Tuple[int, str, dict]]) -> Tuple[List[ActionResult], int]:
+    """Queue actions on a shard and advance it; returns the results and its wake-up count so far.
+
+    An action for a farm the shard doesn't host gets a KeyError as its result, like any failed action.
+    """
+    for farm_id, action, params in actions:
+        try:
+            shard.queue_action(farm_id, action, **params)
+        except KeyError as e:
+            shard.results.append(ActionResult(farm_id, shard.minute, action, e))
+    return shard.advance(minutes), shard.farms_woken
+
+
+# What a shard can be asked to do, by command name
+SHARD_COMMANDS = {
+    "add_farm": FarmScheduler.add_farm,
+    "remove_farm": FarmScheduler.remove_farm,
+    "get_farm": FarmScheduler.get_farm,
+    "advance": advance_shard,
+}
+
+
+def serve_shard(connection):
+    """Worker-process entry point: own one shard and run the commands sent to it until "stop"."""
+    shard = FarmScheduler()
+    while True:
+        command, args = connection.recv()
+        if command == "stop":
+            break
+        try:
+            reply = SHARD_COMMANDS[command](shard, *args)
+        except Exception as e:
+            reply = e
+        connection.send(reply)
+    for game_manager in shard.farms.values():
+        game_manager.autosaver.flush()
+    connection.close()
+
+
+class LocalShard:
+    """A shard run in the server's own process, behind the same send/receive calls as ShardProcess."""
+
+    def __init__(self):
+        self.scheduler = FarmScheduler()
+        self.reply = None
+
+    def send(self, command: str, *args):
+        try:
+            self.reply = SHARD_COMMANDS[command](self.scheduler, *args)
+        except Exception as e:
+            self.reply = e
+
+    def receive(self):
+        reply, self.reply = self.reply, None
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def call(self, command: str, *args):
+        self.send(command, *args)
+        return self.receive()
+
+    def stop(self):
+        pass
+
+
+class ShardProcess:
+    """A shard resident in a worker process of its own; commands and replies travel over a pipe."""
+
+    def __init__(self, context):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=serve_shard, args=(child,), name="farm-shard", daemon=True)
+        self.process.start()
+        child.close()
+
+    def send(self, command: str, *args):
+        self.connection.send((command, args))
+
+    def receive(self):
+        reply = self.connection.recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def call(self, command: str, *args):
+        self.send(command, *args)
+        return self.receive()
+
+    def stop(self, timeout: float = 5.0):
+        """Let the shard finish its farms' saves and exit."""
+        if self.process.is_alive():
+            self.connection.send(("stop", ()))
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.connection.close()
+
+
+class FarmServer:
+    """Hosts farms across shards; with workers != 0 every shard stays resident in a worker process."""
+
+    def __init__(self, shards: Optional[int] = None, workers: Optional[int] = None):
+        shards = shards or os.cpu_count() or 1
+        if workers == 0:
+            self.shards = [LocalShard() for _ in range(shards)]
+        else:
+            context = multiprocessing.get_context()  # the platform's default, as the process pool used
+            self.shards = [ShardProcess(context) for _ in range(shards)]
+        self.actions: List[List[Tuple[int, str, dict]]] = [[] for _ in range(shards)]  # sent with the next advance
+        self.farm_ids = set()
+        self.next_farm_id = 0
+        self.minute = 0
+        self.farms_woken = 0
+
+    def shard_index(self, farm_id: int) -> int:
+        return farm_id % len(self.shards)
+
+    def add_farm(self, game_manager: Optional[GameManager] = None,
+                 width: int = FIELD_WIDTH, height: int = FIELD_HEIGHT, seed: Optional[int] = None) -> int:
+        """Host a farm; game_manager is copied into its shard, so set it up before adding it."""
+        farm_id = self.next_farm_id
+        self.next_farm_id += 1
+        game_manager = game_manager or GameManager(width, height, seed=seed)
+        self.shards[self.shard_index(farm_id)].call("add_farm", farm_id, game_manager)
+        self.farm_ids.add(farm_id)
+        return farm_id
+
+    def remove_farm(self, farm_id: int) -> GameManager:
+        index = self.shard_index(farm_id)
+        game_manager = self.shards[index].call("remove_farm", farm_id)
+        self.farm_ids.discard(farm_id)
+        # Actions queued for it would only fail at the next advance
+        self.actions[index] = [entry for entry in self.actions[index] if entry[0] != farm_id]
+        return game_manager
+
+    def get_farm(self, farm_id: int) -> GameManager:
+        """The farm caught up to the shared clock; a copy when its shard runs in a worker process."""
+        return self.shards[self.shard_index(farm_id)].call("get_farm", farm_id)
+
+    def queue_action(self, farm_id: int, action: str, **params):
+        """Apply an action to the farm at the start of the next advance."""
+        if farm_id not in self.farm_ids:
+            raise KeyError(f"No farm {farm_id}")
+        self.actions[self.shard_index(farm_id)].append((farm_id, action, params))
+
+    @property
+    def farm_count(self) -> int:
+        return len(self.farm_ids)
+
+    def advance(self, minutes: int) -> List[ActionResult]:
+        """Advance every shard by the same number of game minutes."""
+        # Every shard starts before any reply is read, so worker shards run in parallel
+        for shard, actions in zip(self.shards, self.actions):
+            shard.send("advance", minutes, actions)
+        self.actions = [[] for _ in self.shards]
+        results = []
+        woken = 0
+        error = None
+        # Every reply is read even after a failure, or it would be taken for the reply to a later call
+        for shard in self.shards:
+            try:
+                shard_results, shard_woken = shard.receive()
+            except Exception as e:
+                error = error or e
+                continue
+            results += shard_results
+            woken += shard_woken
+        self.minute += minutes
+        if error is not None:
+            raise error
+        self.farms_woken = woken
+        return results
+
+    def close(self):
+        for shard in self.shards:
+            shard.stop()
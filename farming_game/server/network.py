@@ -0,0 +1,277 @@
+"""
+Asyncio game server and client over TCP or a Unix socket.
+
+GameServer runs one GameManager at a fixed tick rate. Each connection's
+reader queues requests as fast as they arrive (clients may pipeline);
+every tick the server applies the queued requests in arrival order,
+advances the game, and sends each connection its responses plus one
+shared DELTA of what changed (LiveGameState.delta_since), in a single
+write.
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from farming_game.data.constants import DEFAULT_PLAYER_X, DEFAULT_PLAYER_Y
+from farming_game.data.data_classes import Position
+from farming_game.core.field import Field, NameTable
+from farming_game.core.player import Player
+from farming_game.core.game_state import LiveGameState
+from farming_game.core.game_manager import GameManager
+from farming_game.core.save_snapshot import take_snapshot
+from farming_game.core.binary_save import encode_binary, decode_binary
+from farming_game.core.simulation import perform_action
+from farming_game.server.protocol import (FRAME, REQUEST, STATE, MSG_RESPONSE, MSG_STATE, MSG_DELTA,
+                                          OP_PING, OP_SUBSCRIBE, OP_UNSUBSCRIBE, OP_MOVE, OP_PLANT, OP_WATER,
+                                          OP_HARVEST, OP_FORAGE, OP_BUY, OP_SHIP, ACTIONS, STATUS_ERROR,
+                                          encode_request, decode_request, result_status, encode_response,
+                                          decode_response, encode_state, encode_delta, apply_delta)
+
+MAX_FRAME_SIZE = 1 << 16  # requests are tiny; anything bigger is a broken client
+MAX_QUEUED_REQUESTS = 4096  # per connection, before the reader stops reading
+
+
+class ClientConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.subscribed = False
+        self.queued = 0  # requests read but not yet applied
+        self.outbox: List[bytes] = []
+        self.room = asyncio.Event()  # set while the request queue has space
+        self.room.set()
+        self.handler: Optional[asyncio.Task] = None
+
+
+class GameServer:
+    def __init__(self, game_manager: Optional[GameManager] = None, tick_seconds: float = 0.1):
+        self.game_manager = game_manager or GameManager()
+        self.tick_seconds = tick_seconds
+        self.tick = 0
+        self.connections: Set[ClientConnection] = set()
+        self.requests: Deque[Tuple[ClientConnection, int, int, dict]] = deque()
+        self.servers: List[asyncio.AbstractServer] = []
+        self.running = False
+
+        field = self.game_manager.field
+        self.broadcast_names = (len(field.plant_names.names), len(field.forage_names.names))
+        self.broadcast_versions = self.game_manager.game_state.versions()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None):
+        """Listen on host:port, or on a Unix socket at path; returns the asyncio server."""
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        self.servers.append(server)
+        return server
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = ClientConnection(reader, writer)
+        connection.handler = asyncio.current_task()
+        self.connections.add(connection)
+        try:
+            while True:
+                await connection.room.wait()
+                (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                if length > MAX_FRAME_SIZE:
+                    break
+                payload = await reader.readexactly(length)
+                try:
+                    op, request_id, params = decode_request(payload)
+                except ValueError:
+                    # Keep the connection; answer in order with the rest of this tick
+                    (_, request_id), op, params = REQUEST.unpack_from(payload.ljust(REQUEST.size, b"\0")), None, {}
+                self.requests.append((connection, op, request_id, params))
+                connection.queued += 1
+                if connection.queued >= MAX_QUEUED_REQUESTS:
+                    connection.room.clear()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    def apply_request(self, connection: ClientConnection, op: Optional[int], request_id: int, params: dict):
+        if op is None:
+            connection.outbox.append(encode_response(request_id, STATUS_ERROR))
+        elif op in ACTIONS:
+            try:
+                result = perform_action(self.game_manager, ACTIONS[op], **params)
+                connection.outbox.append(encode_response(request_id, *result_status(result)))
+            except (ValueError, KeyError, TypeError):
+                connection.outbox.append(encode_response(request_id, STATUS_ERROR))
+        elif op == OP_SUBSCRIBE:
+            connection.outbox.append(encode_response(request_id, *result_status(None)))
+            if not connection.subscribed:
+                connection.subscribed = True
+                connection.outbox.append(encode_state(self.tick, encode_binary(take_snapshot(self.game_manager))))
+        elif op == OP_UNSUBSCRIBE:
+            connection.subscribed = False
+            connection.outbox.append(encode_response(request_id, *result_status(None)))
+        else:  # OP_PING
+            connection.outbox.append(encode_response(request_id, *result_status(None)))
+
+    def run_tick(self):
+        """Apply queued requests, advance the game one tick and queue the delta for subscribers."""
+        requests, self.requests = self.requests, deque()
+        for connection, op, request_id, params in requests:
+            self.apply_request(connection, op, request_id, params)
+            connection.queued -= 1
+            connection.room.set()
+
+        self.game_manager.update(self.tick_seconds)
+        self.tick += 1
+
+        field = self.game_manager.field
+        names = (len(field.plant_names.names), len(field.forage_names.names))
+        changes = self.game_manager.game_state.delta_since(self.broadcast_versions)
+        delta = encode_delta(self.tick, self.game_manager, changes,
+                             names_from=self.broadcast_names if names != self.broadcast_names else None)
+        self.broadcast_names = names
+        self.broadcast_versions = changes.versions
+
+        for connection in self.connections:
+            if connection.subscribed:
+                connection.outbox.append(delta)
+            if connection.outbox:
+                connection.writer.write(b"".join(connection.outbox))
+                connection.outbox.clear()
+
+    async def run(self):
+        """Tick on a fixed schedule until stop() is called."""
+        loop = asyncio.get_running_loop()
+        self.running = True
+        next_tick = loop.time()
+        while self.running:
+            self.run_tick()
+            # Slow readers hold the loop here instead of growing send buffers without bound
+            await asyncio.gather(*(connection.writer.drain() for connection in list(self.connections)),
+                                 return_exceptions=True)
+            next_tick += self.tick_seconds
+            await asyncio.sleep(max(next_tick - loop.time(), 0))
+
+    def stop(self):
+        self.running = False
+
+    async def close(self):
+        self.stop()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        # End each handler's read cleanly rather than cancelling it mid-read
+        handlers = []
+        for connection in list(self.connections):
+            connection.reader.feed_eof()
+            connection.room.set()
+            handlers.append(connection.handler)
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+
+class GameClient:
+    """Thin client: sends requests and keeps a mirror of the server's field, player and clock."""
+
+    def __init__(self):
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.next_request_id = 0
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.field: Optional[Field] = None
+        self.player = Player(Position(DEFAULT_PLAYER_X, DEFAULT_PLAYER_Y))
+        self.game_state: Optional[LiveGameState] = None
+        self.tick = 0
+        self.updated = asyncio.Event()  # set whenever a STATE or DELTA arrives
+        self.receiver: Optional[asyncio.Task] = None
+
+    async def connect(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None):
+        if path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.receiver = asyncio.create_task(self.receive())
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.receiver is not None:
+            self.receiver.cancel()
+
+    def send(self, op: int, **params) -> asyncio.Future:
+        """Queue a request without waiting; the future resolves to (result, value)."""
+        request_id = self.next_request_id
+        self.next_request_id = (self.next_request_id + 1) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(encode_request(op, request_id, **params))
+        return future
+
+    async def request(self, op: int, **params):
+        await self.writer.drain()
+        return await self.send(op, **params)
+
+    async def ping(self):
+        return await self.request(OP_PING)
+
+    async def subscribe(self):
+        return await self.request(OP_SUBSCRIBE)
+
+    async def move(self, dx: int, dy: int):
+        return await self.request(OP_MOVE, dx=dx, dy=dy)
+
+    async def plant(self, plant: str):
+        return await self.request(OP_PLANT, plant=plant)
+
+    async def water(self):
+        return await self.request(OP_WATER)
+
+    async def harvest(self):
+        return await self.request(OP_HARVEST)
+
+    async def forage(self):
+        return await self.request(OP_FORAGE)
+
+    async def buy(self, plant: str, quantity: int = 1):
+        return await self.request(OP_BUY, plant=plant, quantity=quantity)
+
+    async def ship(self):
+        return await self.request(OP_SHIP)
+
+    async def wait_for_tick(self, tick: int):
+        while self.tick < tick:
+            self.updated.clear()
+            await self.updated.wait()
+
+    async def receive(self):
+        try:
+            while True:
+                (length,) = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+                payload = await self.reader.readexactly(length)
+                kind = payload[0]
+                if kind == MSG_RESPONSE:
+                    request_id, result, value = decode_response(payload)
+                    future = self.pending.pop(request_id, None)
+                    if future is not None and not future.done():
+                        future.set_result((result, value))
+                elif kind == MSG_STATE:
+                    self.load_state(payload)
+                elif kind == MSG_DELTA and self.field is not None:
+                    self.tick = apply_delta(payload, self.field, self.player, self.game_state)
+                    self.updated.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the game server closed"))
+            self.pending.clear()
+
+    def load_state(self, payload):
+        (_, self.tick) = STATE.unpack_from(payload, 0)
+        snapshot = decode_binary(payload[STATE.size:])
+        self.field = Field(snapshot.width, snapshot.height)
+        self.field.adopt_buffer(snapshot.cells, snapshot.width, snapshot.height,
+                                NameTable(snapshot.plant_names[1:]), NameTable(snapshot.forage_names[1:]))
+        self.player = Player(Position(snapshot.player_x, snapshot.player_y), snapshot.width, snapshot.height)
+        self.player.money = snapshot.money
+        self.player.inventory = snapshot.inventory
+        self.game_state = LiveGameState(self.player, self.field, snapshot.day, snapshot.time_minutes)
+        self.updated.set()
@@ -0,0 +1,219 @@
+"""
+Binary wire protocol between the game server and remote clients.
+
+Every message is a FRAME (payload length) followed by its payload, all
+little-endian.
+
+Client to server: REQUEST (op, request id) followed by the op's
+arguments. A client may send any number of requests without waiting.
+
+Server to client, once per tick and in one write: a RESPONSE for each
+request applied that tick, in the order the connection sent them, then a
+DELTA with the cells, player and clock that changed during the tick; its
+inventory lists only the items that changed, with 0 for removed ones.
+After SUBSCRIBE the client first receives STATE: a full binary save (see
+binary_save) to apply the following deltas to. Like the renderer's dirty
+set, deltas carry a cell when it visibly changes, not on every growth
+tick, so a mirror's plant_timer is as of the cell's last change.
+"""
+import struct
+from typing import Iterable, Optional, Tuple
+from farming_game.data.data_classes import InteractionResult, BatchResult, Position, StateDelta
+from farming_game.core.field import CELL_COLUMNS
+from farming_game.core.binary_save import pack_names, unpack_names, pack_inventory, unpack_inventory
+from farming_game.core.journal import CELL, PLAYER
+
+FRAME = struct.Struct("<I")
+# op, request id
+REQUEST = struct.Struct("<BI")
+MOVE_ARGS = struct.Struct("<bb")
+QUANTITY = struct.Struct("<H")
+STRING_LENGTH = struct.Struct("<H")
+# kind, request id, status, value (e.g. shipping earnings)
+RESPONSE = struct.Struct("<BIBq")
+# kind, tick; a binary save follows
+STATE = struct.Struct("<BI")
+# kind, tick, flags, day, time_minutes; names, player and cells follow as flagged
+DELTA = struct.Struct("<BIBid")
+CELL_COUNT = struct.Struct("<I")
+
+OP_PING = 0
+OP_SUBSCRIBE = 1
+OP_UNSUBSCRIBE = 2
+OP_MOVE = 3
+OP_PLANT = 4
+OP_WATER = 5
+OP_HARVEST = 6
+OP_FORAGE = 7
+OP_BUY = 8
+OP_SHIP = 9
+
+# Ops that map onto simulation.perform_action
+ACTIONS = {
+    OP_MOVE: "move",
+    OP_PLANT: "plant",
+    OP_WATER: "water",
+    OP_HARVEST: "harvest",
+    OP_FORAGE: "forage",
+    OP_BUY: "buy",
+    OP_SHIP: "ship",
+}
+
+MSG_RESPONSE = 0x80
+MSG_STATE = 0x81
+MSG_DELTA = 0x82
+
+FLAG_NAMES = 1
+FLAG_PLAYER = 2
+FLAG_CELLS = 4
+
+RESULTS = list(InteractionResult)
+STATUS_ERROR = 255  # malformed request or unknown op
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload)) + payload
+
+
+def pack_string(text: str) -> bytes:
+    encoded = text.encode("utf-8")
+    return STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def unpack_string(data, offset: int) -> Tuple[str, int]:
+    (length,) = STRING_LENGTH.unpack_from(data, offset)
+    offset += STRING_LENGTH.size
+    if offset + length > len(data):
+        raise ValueError("String runs past the end of the message")
+    return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def encode_request(op: int, request_id: int, **params) -> bytes:
+    parts = [REQUEST.pack(op, request_id)]
+    if op == OP_MOVE:
+        parts.append(MOVE_ARGS.pack(params.get("dx", 0), params.get("dy", 0)))
+    elif op == OP_PLANT:
+        parts.append(pack_string(params["plant"]))
+    elif op == OP_BUY:
+        parts.append(pack_string(params.get("plant", "carrot")))
+        parts.append(QUANTITY.pack(params.get("quantity", 1)))
+    return frame(b"".join(parts))
+
+
+def decode_request(payload) -> Tuple[int, int, dict]:
+    """Returns (op, request id, params for perform_action); raises ValueError if malformed."""
+    try:
+        op, request_id = REQUEST.unpack_from(payload, 0)
+        offset = REQUEST.size
+        params = {}
+        if op == OP_MOVE:
+            params["dx"], params["dy"] = MOVE_ARGS.unpack_from(payload, offset)
+        elif op == OP_PLANT:
+            params["plant"], offset = unpack_string(payload, offset)
+        elif op == OP_BUY:
+            params["plant"], offset = unpack_string(payload, offset)
+            (params["quantity"],) = QUANTITY.unpack_from(payload, offset)
+        elif op not in ACTIONS and op not in (OP_PING, OP_SUBSCRIBE, OP_UNSUBSCRIBE):
+            raise ValueError(f"Unknown op {op}")
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed request: {e}")
+    return op, request_id, params
+
+
+def result_status(result) -> Tuple[int, int]:
+    """Map what perform_action returned onto a (status, value) pair."""
+    if isinstance(result, InteractionResult):
+        return RESULTS.index(result), 0
+    if isinstance(result, bool):  # Player.move
+        return RESULTS.index(InteractionResult.SUCCESS if result else InteractionResult.NOT_POSSIBLE), 0
+    if isinstance(result, BatchResult):  # batch actions: how many cells succeeded
+        success = InteractionResult.SUCCESS if result.succeeded else InteractionResult.NOT_POSSIBLE
+        return RESULTS.index(success), result.succeeded
+    if isinstance(result, int):  # StorageSystem.ship_items earnings
+        return RESULTS.index(InteractionResult.SUCCESS), result
+    return RESULTS.index(InteractionResult.SUCCESS), 0
+
+
+def encode_response(request_id: int, status: int, value: int = 0) -> bytes:
+    return frame(RESPONSE.pack(MSG_RESPONSE, request_id, status, value))
+
+
+def decode_response(payload) -> Tuple[int, Optional[InteractionResult], int]:
+    """Returns (request id, result or None for STATUS_ERROR, value)."""
+    _, request_id, status, value = RESPONSE.unpack_from(payload, 0)
+    result = RESULTS[status] if status < len(RESULTS) else None
+    return request_id, result, value
+
+
+def encode_state(tick: int, save_chunks: Iterable[bytes]) -> bytes:
+    return frame(STATE.pack(MSG_STATE, tick) + b"".join(save_chunks))
+
+
+def encode_delta(tick: int, game_manager, delta: StateDelta, names_from: Optional[Tuple[int, int]] = None) -> bytes:
+    """One tick's changes (see LiveGameState.delta_since); names_from is the
+    (plant, forage) name count clients already have."""
+    field = game_manager.field
+    player = game_manager.player
+    state = game_manager.game_state
+    flags = 0
+    parts = [b""]
+
+    if names_from is not None:
+        flags |= FLAG_NAMES
+        parts.append(pack_names(field.plant_names.names[names_from[0]:]))
+        parts.append(pack_names(field.forage_names.names[names_from[1]:]))
+
+    if delta.player_changed:
+        flags |= FLAG_PLAYER
+        parts.append(PLAYER.pack(player.position.x, player.position.y, player.money))
+        parts.append(pack_inventory(delta.inventory))
+
+    cells = sorted(delta.cells)
+    if cells:
+        flags |= FLAG_CELLS
+        columns = [getattr(field, name) for name, _ in CELL_COLUMNS]
+        parts.append(CELL_COUNT.pack(len(cells)))
+        parts.extend(CELL.pack(i, *(column[i] for column in columns)) for i in cells)
+
+    parts[0] = DELTA.pack(MSG_DELTA, tick, flags, state.day, state.time_minutes)
+    return frame(b"".join(parts))
+
+
+def apply_delta(payload, field, player, game_state) -> int:
+    """Apply a DELTA payload to a client-side mirror; returns the tick it describes."""
+    _, tick, flags, game_state.day, game_state.time_minutes = DELTA.unpack_from(payload, 0)
+    offset = DELTA.size
+
+    if flags & FLAG_NAMES:
+        plant_names, offset = unpack_names(payload, offset)
+        forage_names, offset = unpack_names(payload, offset)
+        for name in plant_names:
+            field.plant_names.intern(name)
+        for name in forage_names:
+            field.forage_names.intern(name)
+
+    if flags & FLAG_PLAYER:
+        x, y, player.money = PLAYER.unpack_from(payload, offset)
+        offset += PLAYER.size
+        player.position = Position(x, y)
+        changes, offset = unpack_inventory(payload, offset)
+        for item, quantity in changes.items():
+            if quantity:
+                player.inventory[item] = quantity
+            else:
+                player.inventory.pop(item, None)
+        player.mark_changed()
+
+    if flags & FLAG_CELLS:
+        (count,) = CELL_COUNT.unpack_from(payload, offset)
+        offset += CELL_COUNT.size
+        columns = [getattr(field, name) for name, _ in CELL_COLUMNS]
+        changed = []
+        for values in CELL.iter_unpack(payload[offset:offset + count * CELL.size]):
+            index = values[0]
+            for column, value in zip(columns, values[1:]):
+                column[index] = value
+            changed.append(index)
+        field.mark_dirty(changed)
+    return tick
+
@@ -1,8 +1,9 @@
 """
 Forage system with random spawning and rarity mechanics.
 """
-from typing import Optional
-from farming_game.data.data_classes import Position, CellState, CellType, InteractionResult
+from typing import Dict, Iterable, Optional
+from farming_game.data.data_classes import (Position, CellState, CellType, InteractionResult, BatchResult,
+                                            CELL_EMPTY, CELL_FORAGE, EVENT_FORAGE)
 from farming_game.data.constants import FORAGE_REGISTRY
 from farming_game.core.player import Player
 from farming_game.core.field import Field
@@ -28,9 +29,46 @@ class ForageSystem:
         cell.cell_type = CellType.EMPTY
         cell.forage_item = None
         cell.forage_spawn_time = 0
+        self.field.log_event(EVENT_FORAGE, cell.index)
         
         return InteractionResult.SUCCESS
     
+    def forage_items(self, player: Player, cells: Optional[Iterable[int]] = None) -> BatchResult:
+        """Forage the given field indices (-1: off the field), or every forage cell, in one pass.
+        
+        Each cell gets the result forage_item would give; the finds are added once per kind.
+        """
+        field = self.field
+        if cells is None:
+            cells = sorted(field.cell_index.forage_cells())
+        names = field.forage_names.names
+        cell_type = field.cell_type
+        forage_id = field.forage_id
+        result = BatchResult()
+        found: Dict[str, int] = {}
+        cleared = []
+        
+        for index in cells:
+            if not 0 <= index < field.size or cell_type[index] != CELL_FORAGE or forage_id[index] == 0:
+                result.add(index, InteractionResult.NOTHING_TO_HARVEST)
+                continue
+            item = names[forage_id[index]]
+            if not FORAGE_REGISTRY.get(item):
+                result.add(index, InteractionResult.FAILED)
+                continue
+            found[item] = found.get(item, 0) + 1
+            cell_type[index] = CELL_EMPTY
+            forage_id[index] = 0
+            field.forage_spawn_time[index] = 0
+            cleared.append(index)
+            result.add(index, InteractionResult.SUCCESS)
+        
+        for item, quantity in found.items():
+            player.add_item(item, quantity)
+        field.cells_changed(cleared)
+        field.log_events(EVENT_FORAGE, cleared)
+        return result
+    
     def get_forage_rarity(self, pos: Position) -> Optional[str]:
         cell = self.field.get_cell(pos)
         if not cell or cell.cell_type != CellType.FORAGE or not cell.forage_item:
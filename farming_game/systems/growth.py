@@ -0,0 +1,164 @@
+"""
+Vectorized plant growth over the field's column store.
+
+NumPy is optional: when it is not installed PlantSystem keeps using its
+scalar per-cell loop, which this engine matches tick for tick.
+"""
+from farming_game.data.constants import PLANT_REGISTRY
+from farming_game.core.field import Field, CELL_PLANTED
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def column_arrays(field: Field) -> dict:
+    """Writable NumPy views over the field columns (no copies)."""
+    return {
+        "cell_type": np.frombuffer(field.cell_type, dtype=np.uint8),
+        "plant_id": np.frombuffer(field.plant_id, dtype=np.uint8),
+        "growth_stage": np.frombuffer(field.growth_stage, dtype=np.uint8),
+        "watered": np.frombuffer(field.watered, dtype=np.uint8),
+        "plant_timer": np.frombuffer(field.plant_timer, dtype=np.int32),
+    }
+
+
+class GrowthTables:
+    """Per-plant lookup tables indexed by interned plant id."""
+
+    def __init__(self, plant_names):
+        count = len(plant_names)
+        self.known = np.zeros(count, dtype=bool)
+        self.last_stage = np.zeros(count, dtype=np.int32)
+        self.time_per_stage = np.zeros(count, dtype=np.int32)
+        # Bit s is set when stage s needs water before it can grow
+        self.water_mask = np.zeros(count, dtype=np.uint32)
+
+        for plant_id, name in enumerate(plant_names.names):
+            plant_data = PLANT_REGISTRY.get(name) if name else None
+            if not plant_data:
+                continue
+            self.known[plant_id] = True
+            self.last_stage[plant_id] = plant_data.growth_stages - 1
+            self.time_per_stage[plant_id] = plant_data.growth_time_per_stage
+            for stage in plant_data.water_requirements:
+                self.water_mask[plant_id] |= 1 << stage
+        self.size = count
+        self.plant_names = plant_names
+
+
+class GrowthEngine:
+    """Advances every planted cell of a field by one growth tick at once."""
+
+    def __init__(self, field: Field):
+        self.field = field
+        self.tables = None
+
+    def __getstate__(self):
+        # Tables are rebuilt on first use
+        return {"field": self.field, "tables": None}
+
+    def get_tables(self) -> GrowthTables:
+        # New plant names can be interned at any time, and loads may swap the whole table
+        plant_names = self.field.plant_names
+        if self.tables is None or self.tables.plant_names is not plant_names or self.tables.size != len(plant_names):
+            self.tables = GrowthTables(plant_names)
+        return self.tables
+
+    def planted_indices(self, columns: dict, tables: GrowthTables):
+        plant_id = columns["plant_id"]
+        return np.flatnonzero((columns["cell_type"] == CELL_PLANTED) & tables.known[plant_id])
+
+    def step(self):
+        tables = self.get_tables()
+        columns = column_arrays(self.field)
+        cells = self.planted_indices(columns, tables)
+        if cells.size == 0:
+            return
+
+        plant_id = columns["plant_id"][cells]
+        stage = columns["growth_stage"][cells].astype(np.int32)
+        watered = columns["watered"][cells]
+        timer = columns["plant_timer"][cells]
+
+        needs_water = (tables.water_mask[plant_id] >> stage.astype(np.uint32)) & 1
+        can_grow = (needs_water == 0) | (watered != 0)
+        timer = timer + can_grow
+        advance = can_grow & (timer >= tables.time_per_stage[plant_id]) & (stage < tables.last_stage[plant_id])
+
+        columns["plant_timer"][cells] = np.where(advance, 0, timer)
+        columns["growth_stage"][cells] = stage + advance
+        columns["watered"][cells] = np.where(advance, 0, watered)
+        self.field.touch()
+        self.field.mark_dirty(cells[advance].tolist())
+
+    def ticks_until_stage_change(self):
+        """Growth ticks until the first plant moves up a stage, or None if nothing is growing."""
+        tables = self.get_tables()
+        columns = column_arrays(self.field)
+        cells = self.planted_indices(columns, tables)
+        if cells.size == 0:
+            return None
+
+        plant_id = columns["plant_id"][cells]
+        stage = columns["growth_stage"][cells].astype(np.int32)
+        needs_water = (tables.water_mask[plant_id] >> stage.astype(np.uint32)) & 1
+        growing = ((needs_water == 0) | (columns["watered"][cells] != 0)) & (stage < tables.last_stage[plant_id])
+        if not growing.any():
+            return None
+        remaining = tables.time_per_stage[plant_id] - columns["plant_timer"][cells]
+        return max(int(remaining[growing].min()), 1)
+
+    def advance(self, ticks: int):
+        """Apply `ticks` growth updates in closed form.
+
+        Each cell jumps a whole stage at a time until it stalls on an
+        unwatered stage, reaches maturity or runs out of ticks, so the
+        cost depends on the number of stages rather than on `ticks`.
+        """
+        tables = self.get_tables()
+        columns = column_arrays(self.field)
+        cells = self.planted_indices(columns, tables)
+        if cells.size == 0 or ticks <= 0:
+            return
+
+        plant_id = columns["plant_id"][cells]
+        stage = columns["growth_stage"][cells].astype(np.int64)
+        watered = columns["watered"][cells] != 0
+        timer = columns["plant_timer"][cells].astype(np.int64)
+        water_mask = tables.water_mask[plant_id]
+        last_stage = tables.last_stage[plant_id]
+        time_per_stage = tables.time_per_stage[plant_id]
+        remaining = np.full(cells.size, ticks, dtype=np.int64)
+        active = np.ones(cells.size, dtype=bool)
+
+        while active.any():
+            needs_water = ((water_mask >> stage.astype(np.uint32)) & 1) != 0
+            active &= ~(needs_water & ~watered)
+
+            # Mature plants keep counting but never advance
+            mature = active & (stage >= last_stage)
+            timer[mature] += remaining[mature]
+            active &= ~mature
+
+            ticks_to_advance = np.maximum(time_per_stage - timer, 1)
+            partial = active & (remaining < ticks_to_advance)
+            timer[partial] += remaining[partial]
+            active &= ~partial
+
+            remaining[active] -= ticks_to_advance[active]
+            stage[active] += 1
+            timer[active] = 0
+            watered[active] = False
+
+        changed = stage != columns["growth_stage"][cells]
+        columns["plant_timer"][cells] = timer
+        columns["growth_stage"][cells] = stage
+        columns["watered"][cells] = watered
+        self.field.touch()
+        self.field.mark_dirty(cells[changed].tolist())
@@ -0,0 +1,81 @@
+"""
+Sprinklers: automatic watering driven by the field's needs-water index.
+
+A sprinkler takes up one cell and waters the plants in the square of
+cells within SPRINKLER_RADIUS of it. The cells covered by all sprinklers
+are computed once and cached until one is placed or removed. Each update
+only looks at the cells that started needing water since the last one
+(CellIndex.newly_thirsty), so a plant entering a thirsty stage under a
+sprinkler is watered in the tick it gets there, by one batched
+water_plants call, and the rest of the grid is never scanned.
+"""
+from typing import Set
+from farming_game.data.data_classes import Position, CellType, InteractionResult, CELL_SPRINKLER, EVENT_CELL
+from farming_game.data.constants import SPRINKLER_COST, SPRINKLER_RADIUS
+from farming_game.core.player import Player
+from farming_game.core.field import Field
+from farming_game.systems.plants import PlantSystem
+
+class IrrigationSystem:
+    def __init__(self, field: Field, plant_system: PlantSystem, radius: int = SPRINKLER_RADIUS):
+        self.field = field
+        self.plant_system = plant_system
+        self.radius = radius
+        self.covered: Set[int] = set()
+        self.covered_version = -1  # CellIndex.sprinkler_version the coverage was built for
+
+    def area(self, index: int) -> list:
+        """Cells a sprinkler at index waters."""
+        field = self.field
+        r = self.radius
+        return field.rect_indices(index % field.width - r, index // field.width - r, 2 * r + 1, 2 * r + 1)
+
+    def coverage(self) -> Set[int]:
+        """Cells watered by at least one sprinkler; treat the result as read-only."""
+        cell_index = self.field.cell_index
+        if self.covered_version != cell_index.sprinkler_version:
+            covered = set()
+            for sprinkler in cell_index.sprinklers:
+                covered.update(self.area(sprinkler))
+            self.covered = covered
+            self.covered_version = cell_index.sprinkler_version
+        return self.covered
+
+    def place_sprinkler(self, player: Player, pos: Position) -> InteractionResult:
+        """Buy a sprinkler for SPRINKLER_COST and set it on empty ground at pos."""
+        if not self.field.can_plant_at(pos):
+            return InteractionResult.NOT_POSSIBLE
+        if not player.spend_money(SPRINKLER_COST):
+            return InteractionResult.NO_MONEY
+
+        cell = self.field.get_cell(pos)
+        cell.cell_type = CellType.SPRINKLER
+        self.field.log_event(EVENT_CELL, cell.index)
+
+        # Plants already waiting for water around it don't have to wait for their next stage
+        needs_water = self.field.cell_index.needs_water
+        self.plant_system.water_plants([i for i in self.area(cell.index) if i in needs_water])
+        return InteractionResult.SUCCESS
+
+    def remove_sprinkler(self, player: Player, pos: Position) -> InteractionResult:
+        """Pick up the sprinkler at pos, refunding its cost."""
+        cell = self.field.get_cell(pos)
+        if not cell or self.field.cell_type[cell.index] != CELL_SPRINKLER:
+            return InteractionResult.NOT_POSSIBLE
+
+        cell.cell_type = CellType.EMPTY
+        player.add_money(SPRINKLER_COST)
+        self.field.log_event(EVENT_CELL, cell.index)
+        return InteractionResult.SUCCESS
+
+    def update(self) -> int:
+        """Water the covered plants that started needing water since the last update; returns how many."""
+        cell_index = self.field.cell_index
+        newly_thirsty = cell_index.newly_thirsty
+        if not newly_thirsty:
+            return 0
+        due = sorted(newly_thirsty & self.coverage()) if cell_index.sprinklers else []
+        newly_thirsty.clear()
+        if not due:
+            return 0
+        return self.plant_system.water_plants(due).succeeded
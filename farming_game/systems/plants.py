@@ -1,15 +1,19 @@
 """
 Plant system with growth mechanics and interactions.
 """
-from typing import Optional
-from farming_game.data.data_classes import Position, CellState, CellType, InteractionResult
+from typing import Dict, Iterable, Optional
+from farming_game.data.data_classes import (Position, CellState, CellType, InteractionResult, BatchResult,
+                                            CELL_EMPTY, CELL_PLANTED, EVENT_PLANT, EVENT_WATER, EVENT_HARVEST)
 from farming_game.data.constants import PLANT_REGISTRY
 from farming_game.core.player import Player
 from farming_game.core.field import Field
+from farming_game.systems.growth import GrowthEngine, numpy_available
 
 class PlantSystem:
-    def __init__(self, field: Field):
+    def __init__(self, field: Field, vectorized: bool = True):
         self.field = field
+        # Batched NumPy growth when available, otherwise the per-cell loop below
+        self.growth_engine = GrowthEngine(field) if vectorized and numpy_available() else None
     
     def plant_seed(self, player: Player, pos: Position, plant_type: str) -> InteractionResult:
         if not self.field.can_plant_at(pos):
@@ -31,6 +35,7 @@ class PlantSystem:
         cell.growth_stage = 0
         cell.plant_timer = 0
         cell.watered = False
+        self.field.log_event(EVENT_PLANT, cell.index)
         
         return InteractionResult.SUCCESS
     
@@ -43,6 +48,7 @@ class PlantSystem:
             return InteractionResult.NOT_POSSIBLE
         
         cell.watered = True
+        self.field.log_event(EVENT_WATER, cell.index)
         return InteractionResult.SUCCESS
     
     def harvest_plant(self, player: Player, pos: Position) -> InteractionResult:
@@ -69,34 +75,209 @@ class PlantSystem:
         cell.growth_stage = 0
         cell.plant_timer = 0
         cell.watered = False
+        self.field.log_event(EVENT_HARVEST, cell.index)
         
         return InteractionResult.SUCCESS
     
+    # Batch actions: one pass over many cells, each getting the result the single-cell action would give.
+    # Cells are field indices (Field.rect_indices, Field.indices_of); -1 stands for a position off the field.
+    
+    def plant_seeds(self, player: Player, plant_type: str, cells: Iterable[int]) -> BatchResult:
+        """Plant plant_type in every cell that is empty, while seeds last; seeds are taken in one go."""
+        field = self.field
+        seed_name = player.get_seed_for_plant(plant_type)
+        seeds = player.inventory.get(seed_name, 0)
+        plant_data = PLANT_REGISTRY.get(plant_type)
+        plant_id = None  # interned on the first planting, as plant_seed would
+        cell_type = field.cell_type
+        result = BatchResult()
+        planted = []
+        
+        for index in cells:
+            if not 0 <= index < field.size or cell_type[index] != CELL_EMPTY:
+                result.add(index, InteractionResult.ALREADY_PLANTED)
+            elif len(planted) >= seeds:
+                result.add(index, InteractionResult.NO_SEEDS)
+            elif not plant_data:
+                result.add(index, InteractionResult.FAILED)
+            else:
+                if plant_id is None:
+                    plant_id = field.plant_names.intern(plant_type)
+                cell_type[index] = CELL_PLANTED
+                field.plant_id[index] = plant_id
+                field.growth_stage[index] = 0
+                field.plant_timer[index] = 0
+                field.watered[index] = 0
+                planted.append(index)
+                result.add(index, InteractionResult.SUCCESS)
+        
+        if planted:
+            player.remove_item(seed_name, len(planted))
+            field.cells_changed(planted)
+            field.log_events(EVENT_PLANT, planted)
+        return result
+    
+    def water_plants(self, cells: Optional[Iterable[int]] = None) -> BatchResult:
+        """Water the given cells, or every plant that needs water to grow on."""
+        field = self.field
+        if cells is None:
+            cells = sorted(field.cell_index.needs_water)
+        cell_type = field.cell_type
+        watered = field.watered
+        result = BatchResult()
+        changed = []
+        
+        for index in cells:
+            if 0 <= index < field.size and cell_type[index] == CELL_PLANTED and not watered[index]:
+                watered[index] = 1
+                changed.append(index)
+                result.add(index, InteractionResult.SUCCESS)
+            else:
+                result.add(index, InteractionResult.NOT_POSSIBLE)
+        
+        field.cells_changed(changed)
+        field.log_events(EVENT_WATER, changed)
+        return result
+    
+    def harvest_plants(self, player: Player, cells: Optional[Iterable[int]] = None) -> BatchResult:
+        """Harvest the given cells, or every mature plant; the crops are added once per kind."""
+        field = self.field
+        if cells is None:
+            cells = sorted(field.cell_index.mature_cells())
+        names = field.plant_names.names
+        plant_data_by_id = [PLANT_REGISTRY.get(name) if name else None for name in names]
+        cell_type = field.cell_type
+        plant_id = field.plant_id
+        result = BatchResult()
+        harvested: Dict[str, int] = {}
+        cleared = []
+        
+        for index in cells:
+            if not 0 <= index < field.size or cell_type[index] != CELL_PLANTED or plant_id[index] == 0:
+                result.add(index, InteractionResult.NOTHING_TO_HARVEST)
+                continue
+            plant_data = plant_data_by_id[plant_id[index]]
+            if not plant_data:
+                result.add(index, InteractionResult.FAILED)
+            elif field.growth_stage[index] < plant_data.growth_stages - 1:
+                result.add(index, InteractionResult.NOT_READY)
+            else:
+                crop = names[plant_id[index]]
+                harvested[crop] = harvested.get(crop, 0) + 1
+                cell_type[index] = CELL_EMPTY
+                plant_id[index] = 0
+                field.growth_stage[index] = 0
+                field.plant_timer[index] = 0
+                field.watered[index] = 0
+                cleared.append(index)
+                result.add(index, InteractionResult.SUCCESS)
+        
+        for crop, quantity in harvested.items():
+            player.add_item(crop, quantity)
+        field.cells_changed(cleared)
+        field.log_events(EVENT_HARVEST, cleared)
+        return result
+    
     def update_plant_growth(self, current_time_minutes: int):
-        for y in range(len(self.field.cells)):
-            for x in range(len(self.field.cells[0])):
-                cell = self.field.cells[y][x]
+        if self.growth_engine:
+            self.growth_engine.step()
+        else:
+            self.update_plant_growth_scalar(current_time_minutes)
+    
+    def update_plant_growth_scalar(self, current_time_minutes: int):
+        field = self.field
+        plant_id = field.plant_id
+        growth_stage = field.growth_stage
+        watered = field.watered
+        plant_timer = field.plant_timer
+        plant_data_by_id = [PLANT_REGISTRY.get(name) if name else None for name in field.plant_names.names]
+        field.touch()  # Growth timers change every update
+        advanced = []
+        
+        for i in field.cell_index.planted_cells():
+            plant_data = plant_data_by_id[plant_id[i]]
+            if not plant_data:
+                continue
+            
+            # Check if plant needs water at this stage
+            needs_water = growth_stage[i] in plant_data.water_requirements
+            
+            # Only grow if watered when needed, or if no water needed
+            can_grow = not needs_water or watered[i]
+            
+            if can_grow:
+                plant_timer[i] += 1  # Increment each update (roughly once per second)
                 
-                if cell.cell_type == CellType.PLANTED and cell.plant_type:
-                    plant_data = PLANT_REGISTRY.get(cell.plant_type)
-                    if not plant_data:
-                        continue
-                    
-                    # Check if plant needs water at this stage
-                    needs_water = cell.growth_stage in plant_data.water_requirements
-                    
-                    # Only grow if watered when needed, or if no water needed
-                    can_grow = not needs_water or cell.watered
-                    
-                    if can_grow:
-                        cell.plant_timer += 1  # Increment each update (roughly once per second)
-                        
-                        # Check if ready to advance to next stage
-                        if cell.plant_timer >= plant_data.growth_time_per_stage:
-                            if cell.growth_stage < plant_data.growth_stages - 1:
-                                cell.growth_stage += 1
-                                cell.plant_timer = 0
-                                cell.watered = False  # Reset watered status for next stage
+                # Check if ready to advance to next stage
+                if plant_timer[i] >= plant_data.growth_time_per_stage:
+                    if growth_stage[i] < plant_data.growth_stages - 1:
+                        growth_stage[i] += 1
+                        plant_timer[i] = 0
+                        watered[i] = 0  # Reset watered status for next stage
+                        advanced.append(i)
+        field.mark_dirty(advanced)
+    
+    def advance_plant_growth(self, ticks: int):
+        """Apply `ticks` growth updates at once, same as calling update_plant_growth that many times."""
+        if self.growth_engine:
+            self.growth_engine.advance(ticks)
+            return
+        
+        field = self.field
+        plant_data_by_id = [PLANT_REGISTRY.get(name) if name else None for name in field.plant_names.names]
+        field.touch()
+        advanced = []
+        for i in field.cell_index.planted_cells():
+            plant_data = plant_data_by_id[field.plant_id[i]]
+            if not plant_data:
+                continue
+            
+            remaining = ticks
+            stage = field.growth_stage[i]
+            timer = field.plant_timer[i]
+            watered = field.watered[i]
+            while remaining > 0:
+                if stage in plant_data.water_requirements and not watered:
+                    break  # Stalled until someone waters it
+                if stage >= plant_data.growth_stages - 1:
+                    timer += remaining  # Mature plants keep counting
+                    break
+                ticks_to_advance = max(plant_data.growth_time_per_stage - timer, 1)
+                if remaining < ticks_to_advance:
+                    timer += remaining
+                    break
+                remaining -= ticks_to_advance
+                stage += 1
+                timer = 0
+                watered = 0
+            if stage != field.growth_stage[i]:
+                advanced.append(i)
+            field.growth_stage[i] = stage
+            field.plant_timer[i] = timer
+            field.watered[i] = watered
+        field.mark_dirty(advanced)
+    
+    def ticks_until_stage_change(self) -> Optional[int]:
+        """Growth updates until the first plant moves up a stage, or None if nothing is growing."""
+        if self.growth_engine:
+            return self.growth_engine.ticks_until_stage_change()
+        
+        field = self.field
+        plant_data_by_id = [PLANT_REGISTRY.get(name) if name else None for name in field.plant_names.names]
+        soonest = None
+        for i in field.cell_index.planted_cells():
+            plant_data = plant_data_by_id[field.plant_id[i]]
+            if not plant_data:
+                continue
+            stage = field.growth_stage[i]
+            if stage >= plant_data.growth_stages - 1:
+                continue
+            if stage in plant_data.water_requirements and not field.watered[i]:
+                continue
+            ticks = max(plant_data.growth_time_per_stage - field.plant_timer[i], 1)
+            if soonest is None or ticks < soonest:
+                soonest = ticks
+        return soonest
     
     def get_plant_growth_progress(self, pos: Position) -> Optional[float]:
         cell = self.field.get_cell(pos)
@@ -2,7 +2,7 @@
 Storage system with chest and shipping container mechanics.
 """
 from typing import Dict
-from farming_game.data.data_classes import InteractionResult
+from farming_game.data.data_classes import InteractionResult, EVENT_BUY, EVENT_SHIP
 from farming_game.data.constants import PLANT_REGISTRY, FORAGE_REGISTRY
 from farming_game.core.player import Player
 
@@ -23,6 +23,7 @@ class StorageSystem:
         
         seed_name = f"{plant_type}_seeds"
         player.add_item(seed_name, quantity)
+        player.log_event(EVENT_BUY)
         return InteractionResult.SUCCESS
     
     def ship_items(self, player: Player) -> int:
@@ -39,9 +40,43 @@ class StorageSystem:
         
         # Remove shipped items
         for item in items_to_remove:
-            del player.inventory[item]
+            player.remove_item(item, player.inventory[item])
         
         player.add_money(total_value)
+        if total_value > 0:
+            player.log_event(EVENT_SHIP)
+        return total_value
+    
+    def buy_seed_basket(self, player: Player, basket: Dict[str, int]) -> InteractionResult:
+        """Buy several kinds of seeds ({plant type: quantity}) as one purchase: all of it or nothing."""
+        if not basket or any(plant_type not in PLANT_REGISTRY or quantity <= 0
+                             for plant_type, quantity in basket.items()):
+            return InteractionResult.NOT_POSSIBLE
+        
+        total_cost = sum(PLANT_REGISTRY[plant_type].seed_cost * quantity for plant_type, quantity in basket.items())
+        if not player.spend_money(total_cost):
+            return InteractionResult.NO_MONEY
+        
+        for plant_type, quantity in basket.items():
+            player.add_item(f"{plant_type}_seeds", quantity)
+        player.log_event(EVENT_BUY)
+        return InteractionResult.SUCCESS
+    
+    def ship_basket(self, player: Player, basket: Dict[str, int]) -> int:
+        """Ship up to the given quantity of each item ({item: quantity}); seeds are never shipped."""
+        total_value = 0
+        for item, quantity in basket.items():
+            if item.endswith("_seeds"):
+                continue
+            quantity = min(quantity, player.inventory.get(item, 0))
+            item_value = self.get_item_value(item)
+            if quantity > 0 and item_value > 0:
+                player.remove_item(item, quantity)
+                total_value += item_value * quantity
+        
+        player.add_money(total_value)
+        if total_value > 0:
+            player.log_event(EVENT_SHIP)
         return total_value
     
     def get_item_value(self, item: str) -> int:
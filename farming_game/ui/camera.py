@@ -0,0 +1,53 @@
+"""
+Scrolling camera over the field.
+
+The camera shows a window of whole tiles centred on the player and
+clamped to the field edges, so drawing cost depends on the viewport size
+rather than the farm size. Fields no larger than the viewport never
+scroll.
+"""
+from typing import Iterator
+import pygame
+from farming_game.data.data_classes import Position
+from farming_game.data.constants import GRID_SIZE, VIEW_TILES_X, VIEW_TILES_Y
+
+
+class Camera:
+    def __init__(self, max_columns: int = VIEW_TILES_X, max_rows: int = VIEW_TILES_Y):
+        self.max_columns = max_columns
+        self.max_rows = max_rows
+        # Visible window in tiles; set by follow()
+        self.left = 0
+        self.top = 0
+        self.columns = 0
+        self.rows = 0
+
+    def follow(self, target: Position, field_width: int, field_height: int) -> bool:
+        """Centre the view on target within the field; returns True if the view changed."""
+        columns = min(self.max_columns, field_width)
+        rows = min(self.max_rows, field_height)
+        left = min(max(target.x - columns // 2, 0), field_width - columns)
+        top = min(max(target.y - rows // 2, 0), field_height - rows)
+        view = (left, top, columns, rows)
+        if view == (self.left, self.top, self.columns, self.rows):
+            return False
+        self.left, self.top, self.columns, self.rows = view
+        return True
+
+    @property
+    def pixel_rect(self) -> pygame.Rect:
+        """Screen area the view occupies, at the top left of the window."""
+        return pygame.Rect(0, 0, self.columns * GRID_SIZE, self.rows * GRID_SIZE)
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.left <= x < self.left + self.columns and self.top <= y < self.top + self.rows
+
+    def screen_rect(self, x: int, y: int) -> pygame.Rect:
+        """Screen rect of the tile at field position (x, y)."""
+        return pygame.Rect((x - self.left) * GRID_SIZE, (y - self.top) * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+
+    def visible_indices(self, field_width: int) -> Iterator[int]:
+        """Field cell indices inside the view, row by row."""
+        for y in range(self.top, self.top + self.rows):
+            start = y * field_width + self.left
+            yield from range(start, start + self.columns)
@@ -3,10 +3,61 @@ UI system for displaying game state, inventory, and tooltips.
 """
 import pygame
 import pygame_emojis
-from typing import Optional
-from farming_game.data.data_classes import Position, CellType
+from typing import Dict, Hashable, List, Optional, Tuple
+from farming_game.data.data_classes import Position, CELL_PLANTED, CELL_FORAGE, CELL_SPRINKLER
 from farming_game.data.constants import *
 from farming_game.core.game_manager import GameManager
+from farming_game.core.chunked_field import ChunkedField
+from farming_game.core.profiler import Profiler
+from farming_game.ui.camera import Camera
+from farming_game.ui.surface_cache import SurfaceCache
+
+# Emoji representation for inventory items
+ITEM_EMOJIS = {
+    # Seeds - use seed emoji for all seeds
+    "carrot_seeds": "🌱",
+    "tomato_seeds": "🌱", 
+    "melon_seeds": "🌱",
+    "gigantic_pumpkin_seeds": "🌱",
+    
+    # Harvested plants
+    "carrot": "🥕",
+    "tomato": "🍅",
+    "melon": "🍈", 
+    "gigantic_pumpkin": "🎃",
+    
+    # Forage items
+    "wild_berries": "🫐",
+    "herbs": "🌿",
+    "mushrooms": "🍄",
+    "flowers": "🌸",
+    "crystals": "💎",
+    "ancient_coin": "🪙",
+    "golden_artifact": "🏆"
+}
+
+SEED_PRICE_LINES = [
+    "Carrot: $1",
+    "Tomato: $2", 
+    "Melon: $5"
+]
+GIGANTIC_PUMPKIN_PRICE_LINE = "G.Pumpkin: $500"
+
+CONTROLS_HELP = [
+    "WASD/Arrows: Move",
+    "TAB: Select item",
+    "Space/P: Plant seed", 
+    "E: Water",
+    "H: Harvest",
+    "F: Forage",
+    "B: Buy seeds",
+    "X: Ship items",
+    "R: Sprinkler",
+    "Ctrl+Q: Save",
+    "Ctrl+L: Load",
+    "F3: Profiler",
+    "F4: Export profile"
+]
 
 class UI:
     def __init__(self, screen: pygame.Surface):
@@ -14,37 +65,170 @@ class UI:
         self.font = pygame.font.Font(None, FONT_SIZE)
         self.small_font = pygame.font.Font(None, 20)
         self.large_font = pygame.font.Font(None, 32)
+        
+        # Cached layers and bookkeeping for dirty-region rendering
+        self.camera = Camera()
+        self.field_layer: Optional[pygame.Surface] = None  # the camera's view of the field
+        self.full_redraw = True
+        self.player_region: Optional[pygame.Rect] = None
+        self.message_rect: Optional[pygame.Rect] = None
+        self.overlay_rect: Optional[pygame.Rect] = None
+        self.overlay: Optional[pygame.Surface] = None  # profiler overlay, rebuilt every PROFILE_OVERLAY_REFRESH
+        self.overlay_time = 0
+        self.panel_key = None
+        self.inventory_key = None
+        
+        # Rendered emoji and text surfaces, keyed by what was rendered
+        self.surface_cache = SurfaceCache(SURFACE_CACHE_SIZE)
+        self.prewarm_cache()
+        self.build_tiles()
+    
+    def prewarm_cache(self):
+        """Render every sprite and static label once so the first frames don't stall."""
+        for plant_data in PLANT_REGISTRY.values():
+            self.get_emoji_surface(plant_data.sprite, PLANT_EMOJI_SIZE)
+        for forage_data in FORAGE_REGISTRY.values():
+            self.get_emoji_surface(forage_data.sprite, PLANT_EMOJI_SIZE)
+        for emoji in ("🌱", "🌿"):
+            self.get_emoji_surface(emoji, PLANT_EMOJI_SIZE)
+        for emoji in ("🏪", "📫"):
+            self.get_emoji_surface(emoji, SHOP_EMOJI_SIZE)
+        self.get_emoji_surface("👩‍🌾", PLAYER_EMOJI_SIZE)
+        for emoji in set(ITEM_EMOJIS.values()):
+            self.get_emoji_surface(emoji, INVENTORY_EMOJI_SIZE)
+            self.get_emoji_surface(emoji, HELD_ITEM_EMOJI_SIZE)
+        
+        for label in ("Seed Prices:", "Controls:"):
+            self.get_text_surface(label, BLACK, self.large_font)
+        for line in SEED_PRICE_LINES + [GIGANTIC_PUMPKIN_PRICE_LINE] + CONTROLS_HELP:
+            self.get_text_surface(line, BLACK, self.small_font)
+        self.get_text_surface("Inventory:", BLACK, self.font)
+    
+    def invalidate(self):
+        """Force the next frame to redraw and present the whole screen."""
+        self.full_redraw = True
+    
+    def build_tiles(self):
+        """Pre-composite every tile the field can show into one atlas surface.
+        
+        Planted tiles include their stage sprite and water indicator, so any
+        cell is drawn with a single blit from the atlas.
+        """
+        tiles = {
+            "ground": (LIGHT_BROWN, None, False),
+            "shop": (BROWN, "🏪", False),
+            "shipping": (GRAY, "📫", False),
+            "planted": (GREEN, None, False),  # plant type missing from the registry
+            "forage": (BROWN, None, False),  # Hide forage items visually
+            "sprinkler": (LIGHT_BROWN, "💦", False),
+        }
+        for plant_data in PLANT_REGISTRY.values():
+            for stage in range(plant_data.growth_stages):
+                emoji = self.stage_emoji(plant_data, stage)
+                tiles[("planted", emoji, False)] = (GREEN, emoji, False)
+                if stage in plant_data.water_requirements:
+                    tiles[("planted", emoji, True)] = (GREEN, emoji, True)
+        
+        self.atlas = pygame.Surface((GRID_SIZE * len(tiles), GRID_SIZE))
+        self.atlas_rects: Dict[Hashable, pygame.Rect] = {}
+        for slot, (key, (color, emoji, thirsty)) in enumerate(tiles.items()):
+            rect = pygame.Rect(slot * GRID_SIZE, 0, GRID_SIZE, GRID_SIZE)
+            self.atlas.fill(color, rect)
+            pygame.draw.rect(self.atlas, BLACK, rect, 1)
+            if emoji:
+                size = PLANT_EMOJI_SIZE if color == GREEN else SHOP_EMOJI_SIZE
+                self.draw_emoji(emoji, rect.centerx, rect.centery, size=size, surface=self.atlas)
+            if thirsty:
+                pygame.draw.circle(self.atlas, BLUE, (rect.right - 5, rect.top + 5), 3)
+            self.atlas_rects[key] = rect
+    
+    def stage_emoji(self, plant_data, stage: int) -> str:
+        if stage == 0:
+            return "🌱"
+        if stage < plant_data.growth_stages - 1:
+            return "🌿"
+        return plant_data.sprite
     
-    def draw_field(self, game_manager: GameManager, selected_item=None):
+    def cell_tile(self, field, index: int) -> pygame.Rect:
+        """Atlas rect showing the cell at index, read straight from the field's columns."""
+        kind = field.cell_type[index]
+        if kind == CELL_PLANTED:
+            plant_data = PLANT_REGISTRY.get(field.plant_names.names[field.plant_id[index]])
+            if not plant_data:
+                return self.atlas_rects["planted"]
+            stage = field.growth_stage[index]
+            thirsty = stage in plant_data.water_requirements and not field.watered[index]
+            return self.atlas_rects[("planted", self.stage_emoji(plant_data, stage), thirsty)]
+        if kind == CELL_FORAGE:
+            return self.atlas_rects["forage"]
+        if kind == CELL_SPRINKLER:
+            return self.atlas_rects["sprinkler"]
+        return self.atlas_rects["ground"]
+    
+    def cell_blit(self, game_manager: GameManager, index: int) -> Optional[Tuple[pygame.Surface, pygame.Rect, pygame.Rect]]:
+        """(atlas, screen rect, atlas rect) for one cell, or None if it is off camera."""
         field = game_manager.field
-        player_pos = game_manager.player.position
         storage = game_manager.storage_system
+        x, y = index % field.width, index // field.width
+        if not self.camera.contains(x, y):
+            return None
+        
+        if storage.is_seed_shop_position(x, y):
+            area = self.atlas_rects["shop"]
+        elif storage.is_shipping_position(x, y):
+            area = self.atlas_rects["shipping"]
+        else:
+            area = self.cell_tile(field, index)
+        return self.atlas, self.camera.screen_rect(x, y), area
+    
+    def draw_field(self, game_manager: GameManager, selected_item=None) -> List[pygame.Rect]:
+        """Bring changed tiles up to date and return the screen rects that were redrawn."""
+        field = game_manager.field
+        player_pos = game_manager.player.position
+        camera = self.camera
+        scrolled = camera.follow(player_pos, field.width, field.height)
+        field_rect = camera.pixel_rect
+        regions = []
+        
+        if self.field_layer is None or self.field_layer.get_size() != field_rect.size:
+            self.field_layer = pygame.Surface(field_rect.size)
+            self.full_redraw = True  # The side panel moves with the view's width
         
-        for y in range(FIELD_HEIGHT):
-            for x in range(FIELD_WIDTH):
-                cell = field.get_cell(Position(x, y))
-                rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                
-                # Draw cell background
-                if storage.is_seed_shop_position(x, y):
-                    pygame.draw.rect(self.screen, BROWN, rect)
-                    self.draw_emoji("🏪", rect.centerx, rect.centery, size=SHOP_EMOJI_SIZE)
-                elif storage.is_shipping_position(x, y):
-                    pygame.draw.rect(self.screen, GRAY, rect)
-                    self.draw_emoji("📫", rect.centerx, rect.centery, size=SHOP_EMOJI_SIZE)
-                elif cell.cell_type == CellType.PLANTED:
-                    pygame.draw.rect(self.screen, GREEN, rect)
-                    self.draw_plant(cell, rect)
-                elif cell.cell_type == CellType.FORAGE:
-                    pygame.draw.rect(self.screen, BROWN, rect)  # Hide forage items visually
-                else:
-                    pygame.draw.rect(self.screen, LIGHT_BROWN, rect)
-                
-                # Draw grid lines
-                pygame.draw.rect(self.screen, BLACK, rect, 1)
+        if self.full_redraw or scrolled:
+            if self.full_redraw:
+                self.screen.fill(BLACK)
+                self.panel_key = None
+                self.inventory_key = None
+            field.take_dirty()
+            batch = [self.cell_blit(game_manager, i) for i in camera.visible_indices(field.width)]
+            regions.append(field_rect)
+        else:
+            blits = (self.cell_blit(game_manager, i) for i in field.take_dirty())
+            batch = [blit for blit in blits if blit is not None]
+            regions.extend(blit[1] for blit in batch)
+        self.field_layer.blits(batch, doreturn=False)
+        
+        # Player and held item may overhang their tile slightly
+        player_rect = camera.screen_rect(player_pos.x, player_pos.y)
+        player_region = player_rect.inflate(8, 8).clip(field_rect)
+        regions.append(player_region)
+        if self.player_region and self.player_region != player_region:
+            regions.append(self.player_region)
+        self.player_region = player_region
+        
+        # Uncover the area under last frame's message and profiler overlay
+        for covered in (self.message_rect, self.overlay_rect):
+            if covered:
+                regions.append(covered.clip(field_rect))
+                if not field_rect.contains(covered):
+                    self.panel_key = None
+        self.message_rect = None
+        self.overlay_rect = None
+        
+        for region in regions:
+            self.screen.blit(self.field_layer, region, region)
         
         # Draw player
-        player_rect = pygame.Rect(player_pos.x * GRID_SIZE, player_pos.y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
         self.draw_emoji("👩‍🌾", player_rect.centerx, player_rect.centery, size=PLAYER_EMOJI_SIZE)
         
         # Draw held item indicator next to player
@@ -52,8 +236,50 @@ class UI:
             item_emoji = self.get_item_emoji(selected_item)
             if item_emoji:
                 self.draw_emoji(item_emoji, player_rect.right - 6, player_rect.centery - 10, size=HELD_ITEM_EMOJI_SIZE)
+        return regions
+    
+    def draw_chunked_field(self, world: ChunkedField, player_pos: Position, view: pygame.Rect) -> List[pygame.Rect]:
+        """Draw the cells of a chunked map inside view (in cells) at the top left of the screen.
+
+        Only chunks overlapping the view are visited, and within them only
+        planted and forage cells (from each chunk's cell index); the rest is
+        bare ground drawn as one fill plus grid lines.
+        """
+        area = pygame.Rect(0, 0, view.width * GRID_SIZE, view.height * GRID_SIZE)
+        self.screen.fill(LIGHT_BROWN, area)
+        for x in range(view.width + 1):
+            pygame.draw.line(self.screen, BLACK, (x * GRID_SIZE, 0), (x * GRID_SIZE, area.bottom))
+        for y in range(view.height + 1):
+            pygame.draw.line(self.screen, BLACK, (0, y * GRID_SIZE), (area.right, y * GRID_SIZE))
+        
+        batch = []
+        for chunk in world.visible_chunks(view.left, view.top, view.right, view.bottom):
+            origin = world.chunk_origin(chunk)
+            field = chunk.field
+            index = field.cell_index
+            for i in index.planted_cells() | index.forage_cells():
+                x, y = origin.x + i % field.width, origin.y + i // field.width
+                if view.collidepoint(x, y):
+                    rect = pygame.Rect((x - view.left) * GRID_SIZE, (y - view.top) * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                    batch.append((self.atlas, rect, self.cell_tile(field, i)))
+        self.screen.blits(batch, doreturn=False)
+        
+        if view.collidepoint(player_pos.x, player_pos.y):
+            self.draw_emoji("👩‍🌾", (player_pos.x - view.left) * GRID_SIZE + GRID_SIZE // 2,
+                            (player_pos.y - view.top) * GRID_SIZE + GRID_SIZE // 2, size=PLAYER_EMOJI_SIZE)
+        return [area]
+    
+    def present(self, dirty_rects: List[pygame.Rect]):
+        """Push this frame to the display, updating only the given rects when possible."""
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
     
-    def draw_plant(self, cell, rect):
+    def draw_plant(self, cell, rect, surface=None):
+        if surface is None:
+            surface = self.screen
         if not cell.plant_type:
             return
         
@@ -63,15 +289,15 @@ class UI:
         
         # Show different stages
         if cell.growth_stage == 0:
-            self.draw_emoji("🌱", rect.centerx, rect.centery, size=PLANT_EMOJI_SIZE)
+            self.draw_emoji("🌱", rect.centerx, rect.centery, size=PLANT_EMOJI_SIZE, surface=surface)
         elif cell.growth_stage < plant_data.growth_stages - 1:
-            self.draw_emoji("🌿", rect.centerx, rect.centery, size=PLANT_EMOJI_SIZE)
+            self.draw_emoji("🌿", rect.centerx, rect.centery, size=PLANT_EMOJI_SIZE, surface=surface)
         else:
-            self.draw_emoji(plant_data.sprite, rect.centerx, rect.centery, size=PLANT_EMOJI_SIZE)
+            self.draw_emoji(plant_data.sprite, rect.centerx, rect.centery, size=PLANT_EMOJI_SIZE, surface=surface)
         
         # Show water indicator
         if cell.growth_stage in plant_data.water_requirements and not cell.watered:
-            pygame.draw.circle(self.screen, BLUE, (rect.right - 5, rect.top + 5), 3)
+            pygame.draw.circle(surface, BLUE, (rect.right - 5, rect.top + 5), 3)
     
     def draw_forage(self, cell, rect, forage_system):
         if not cell.forage_item:
@@ -88,8 +314,16 @@ class UI:
         rarity_color = RARITY_COLORS.get(forage_data.rarity, WHITE)
         pygame.draw.rect(self.screen, rarity_color, rect, 2)
     
-    def draw_ui_panel(self, game_manager: GameManager):
-        panel_rect = pygame.Rect(FIELD_WIDTH * GRID_SIZE, 0, UI_PANEL_WIDTH, WINDOW_HEIGHT)
+    def draw_ui_panel(self, game_manager: GameManager) -> List[pygame.Rect]:
+        panel_rect = pygame.Rect(self.camera.pixel_rect.width, 0, UI_PANEL_WIDTH, WINDOW_HEIGHT)
+        
+        # Only time and money change between frames
+        panel_key = (game_manager.get_current_time_string(), game_manager.player.money)
+        if panel_key == self.panel_key:
+            return []
+        self.panel_key = panel_key
+        self.inventory_key = None  # The inventory bar is drawn over the panel's lower edge
+        
         pygame.draw.rect(self.screen, WHITE, panel_rect)
         pygame.draw.rect(self.screen, BLACK, panel_rect, 2)
         
@@ -113,15 +347,11 @@ class UI:
         y_offset += 30
         
         # Dynamic seed info based on what's available
-        seed_info = [
-            "Carrot: $1",
-            "Tomato: $2", 
-            "Melon: $5"
-        ]
+        seed_info = list(SEED_PRICE_LINES)
         
         # Add gigantic pumpkin if unlocked (day 3+)
         if game_manager.game_state.day >= 1:
-            seed_info.append("G.Pumpkin: $500")
+            seed_info.append(GIGANTIC_PUMPKIN_PRICE_LINE)
         
         for info in seed_info:
             self.draw_text(info, panel_rect.x + 10, y_offset, color=BLACK, font=self.small_font)
@@ -132,47 +362,54 @@ class UI:
         self.draw_text("Controls:", panel_rect.x + 10, y_offset, color=BLACK, font=self.large_font)
         y_offset += 30
         
-        controls = [
-            "WASD/Arrows: Move",
-            "TAB: Select item",
-            "Space/P: Plant seed", 
-            "E: Water",
-            "H: Harvest",
-            "F: Forage",
-            "B: Buy seeds",
-            "X: Ship items",
-            "Ctrl+Q: Save",
-            "Ctrl+L: Load"
-        ]
-        
-        for control in controls:
+        for control in CONTROLS_HELP:
             self.draw_text(control, panel_rect.x + 10, y_offset, color=BLACK, font=self.small_font)
             y_offset += 15
+        return [panel_rect]
     
-    def draw_text(self, text: str, x: int, y: int, color=WHITE, center=False, font=None):
+    def draw_text(self, text: str, x: int, y: int, color=WHITE, center=False, font=None, surface=None):
         if font is None:
             font = self.font
+        if surface is None:
+            surface = self.screen
         
-        text_surface = font.render(str(text), True, color)
+        text_surface = self.get_text_surface(str(text), color, font)
         if center:
             text_rect = text_surface.get_rect(center=(x, y))
-            self.screen.blit(text_surface, text_rect)
+            surface.blit(text_surface, text_rect)
         else:
-            self.screen.blit(text_surface, (x, y))
+            surface.blit(text_surface, (x, y))
+    
+    def get_text_surface(self, text: str, color, font) -> pygame.Surface:
+        return self.surface_cache.get(("text", text, font, color), lambda: font.render(text, True, color))
+    
+    def get_emoji_surface(self, emoji: str, size: int) -> pygame.Surface:
+        return self.surface_cache.get(("emoji", emoji, size), lambda: self.render_emoji(emoji, size))
     
-    def draw_emoji(self, emoji: str, x: int, y: int, size: int = 24):
+    def render_emoji(self, emoji: str, size: int) -> pygame.Surface:
         try:
-            emoji_surface = pygame_emojis.load_emoji(emoji, size)
-            emoji_rect = emoji_surface.get_rect(center=(x, y))
-            self.screen.blit(emoji_surface, emoji_rect)
+            return pygame_emojis.load_emoji(emoji, size)
         except (pygame_emojis.EmojiNotFound, FileNotFoundError):
             # Fallback to text if emoji not found
-            self.draw_text(emoji, x, y, center=True, font=self.small_font)
+            return self.small_font.render(emoji, True, WHITE)
     
-    def draw_bottom_inventory(self, game_manager: GameManager, selected_item=None):
+    def draw_emoji(self, emoji: str, x: int, y: int, size: int = 24, surface=None):
+        if surface is None:
+            surface = self.screen
+        emoji_surface = self.get_emoji_surface(emoji, size)
+        emoji_rect = emoji_surface.get_rect(center=(x, y))
+        surface.blit(emoji_surface, emoji_rect)
+    
+    def draw_bottom_inventory(self, game_manager: GameManager, selected_item=None) -> List[pygame.Rect]:
         # Draw inventory bar at bottom of screen
         inventory_height = 100
         inventory_rect = pygame.Rect(0, WINDOW_HEIGHT - inventory_height, WINDOW_WIDTH, inventory_height)
+        
+        inventory_key = (tuple(game_manager.player.inventory.items()), selected_item)
+        if inventory_key == self.inventory_key:
+            return []
+        self.inventory_key = inventory_key
+        
         pygame.draw.rect(self.screen, WHITE, inventory_rect)
         pygame.draw.rect(self.screen, BLACK, inventory_rect, 2)
         
@@ -194,88 +431,90 @@ class UI:
             inventory_items.append(f"empty_slot_{empty_slot_count}")
             empty_slot_count += 1
         
-        # Draw each slot
+        # Collect every slot's background, icon and count, then draw them in one batch
+        batch = []
         for slot_index in range(max_slots):
             slot_x = start_x + slot_index * (slot_size + 5)
-            slot_rect = pygame.Rect(slot_x, y_pos + 15, slot_size, slot_size)
             
             item = inventory_items[slot_index] if slot_index < len(inventory_items) else f"empty_slot_{slot_index}"
             
-            if item is None:  # Empty hands slot
+            if item is None or item.startswith("empty_slot"):  # Empty hands or empty slot: left blank
                 slot_color = GRAY
-                # Highlight if empty hands is selected
-                if selected_item is None:
-                    pygame.draw.rect(self.screen, YELLOW, slot_rect)
-                    pygame.draw.rect(self.screen, RED, slot_rect, 3)
-                else:
-                    pygame.draw.rect(self.screen, slot_color, slot_rect)
-                    pygame.draw.rect(self.screen, BLACK, slot_rect, 1)
-                # Leave blank - no icon
-                
-            elif item.startswith("empty_slot"):  # Empty inventory slot
-                # Highlight if this empty slot is selected
-                if selected_item == item:
-                    pygame.draw.rect(self.screen, YELLOW, slot_rect)
-                    pygame.draw.rect(self.screen, RED, slot_rect, 3)
-                else:
-                    pygame.draw.rect(self.screen, GRAY, slot_rect)
-                    pygame.draw.rect(self.screen, BLACK, slot_rect, 1)
-                # Leave blank
-                
-            else:  # Actual inventory item
-                # Use seed color for seeds, light brown for other items
-                if item.endswith("_seeds"):
-                    slot_color = SEED_COLORS.get(item, LIGHT_BROWN)
-                else:
-                    slot_color = LIGHT_BROWN
-                
-                # Highlight if this item is selected
-                if selected_item == item:
-                    pygame.draw.rect(self.screen, YELLOW, slot_rect)
-                    pygame.draw.rect(self.screen, RED, slot_rect, 3)
-                else:
-                    pygame.draw.rect(self.screen, slot_color, slot_rect)
-                    pygame.draw.rect(self.screen, BLACK, slot_rect, 1)
-                
-                # Draw item content
-                emoji = self.get_item_emoji(item)
-                if emoji:
-                    self.draw_emoji(emoji, slot_x + slot_size//2, y_pos + 30, size=INVENTORY_EMOJI_SIZE)
-                    quantity = game_manager.player.inventory.get(item, 0)
-                    self.draw_text(str(quantity), slot_x + slot_size - 20, y_pos + 55, color=BLACK, font=self.small_font)
-                else:
-                    item_abbrev = item[:4] + str(game_manager.player.inventory.get(item, 0))
-                    self.draw_text(item_abbrev, slot_x + 2, y_pos + 20, color=BLACK, font=self.small_font)
+            elif item.endswith("_seeds"):  # Seed color for seeds, light brown for other items
+                slot_color = SEED_COLORS.get(item, LIGHT_BROWN)
+            else:
+                slot_color = LIGHT_BROWN
+            batch.append((self.get_slot_surface(slot_color, selected_item == item, slot_size),
+                          (slot_x, y_pos + 15)))
+            
+            if item is None or item.startswith("empty_slot"):
+                continue
+            emoji = self.get_item_emoji(item)
+            quantity = game_manager.player.inventory.get(item, 0)
+            if emoji:
+                emoji_surface = self.get_emoji_surface(emoji, INVENTORY_EMOJI_SIZE)
+                batch.append((emoji_surface, emoji_surface.get_rect(center=(slot_x + slot_size//2, y_pos + 30))))
+                batch.append((self.get_text_surface(str(quantity), BLACK, self.small_font),
+                              (slot_x + slot_size - 20, y_pos + 55)))
+            else:
+                batch.append((self.get_text_surface(item[:4] + str(quantity), BLACK, self.small_font),
+                              (slot_x + 2, y_pos + 20)))
+        self.screen.blits(batch, doreturn=False)
+        return [inventory_rect]
+    
+    def get_slot_surface(self, color, selected: bool, size: int) -> pygame.Surface:
+        """Inventory slot background; the selected slot is highlighted whatever its color."""
+        def render():
+            surface = pygame.Surface((size, size))
+            rect = surface.get_rect()
+            if selected:
+                surface.fill(YELLOW)
+                pygame.draw.rect(surface, RED, rect, 3)
+            else:
+                surface.fill(color)
+                pygame.draw.rect(surface, BLACK, rect, 1)
+            return surface
+        return self.surface_cache.get(("slot", YELLOW if selected else color, selected, size), render)
     
     def get_item_emoji(self, item: str) -> str:
         """Get emoji representation for inventory items"""
-        emoji_map = {
-            # Seeds - use seed emoji for all seeds
-            "carrot_seeds": "🌱",
-            "tomato_seeds": "🌱", 
-            "melon_seeds": "🌱",
-            "gigantic_pumpkin_seeds": "🌱",
-            
-            # Harvested plants
-            "carrot": "🥕",
-            "tomato": "🍅",
-            "melon": "🍈", 
-            "gigantic_pumpkin": "🎃",
-            
-            # Forage items
-            "wild_berries": "🫐",
-            "herbs": "🌿",
-            "mushrooms": "🍄",
-            "flowers": "🌸",
-            "crystals": "💎",
-            "ancient_coin": "🪙",
-            "golden_artifact": "🏆"
-        }
-        return emoji_map.get(item, "")
+        return ITEM_EMOJIS.get(item, "")
     
-    def draw_message(self, message: str, duration: int = 2000):
+    def draw_message(self, message: str, duration: int = 2000) -> List[pygame.Rect]:
         # Draw temporary message (could be enhanced with timer)
-        text_surface = self.font.render(message, True, WHITE)
+        text_surface = self.get_text_surface(message, WHITE, self.font)
         text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, 50))
-        pygame.draw.rect(self.screen, BLACK, text_rect.inflate(20, 10))
-        self.screen.blit(text_surface, text_rect)
\ No newline at end of file
+        box_rect = text_rect.inflate(20, 10)
+        pygame.draw.rect(self.screen, BLACK, box_rect)
+        self.screen.blit(text_surface, text_rect)
+        
+        # Restored from the field layer next frame
+        self.message_rect = box_rect
+        return [box_rect]
+    
+    def draw_profiler(self, profiler: Profiler) -> List[pygame.Rect]:
+        """Overlay the profiler's span percentiles at the top left of the field."""
+        now = pygame.time.get_ticks()
+        if self.overlay is None or now - self.overlay_time >= PROFILE_OVERLAY_REFRESH:
+            self.overlay_time = now
+            # Rendered straight from the font: the numbers change too often for the surface cache
+            rows = [("span", "calls", "p50 ms", "p95 ms", "p99 ms")]
+            for name, count, (p50, p95, p99) in profiler.summary():
+                rows.append((name, str(count), f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}"))
+            name_width, column_width, row_height = 230, 60, 16
+            self.overlay = pygame.Surface((name_width + 4 * column_width + 10, len(rows) * row_height + 8))
+            self.overlay.fill(BLACK)
+            batch = []
+            for row_index, (name, *numbers) in enumerate(rows):
+                y = 4 + row_index * row_height
+                batch.append((self.small_font.render(name, True, WHITE), (5, y)))
+                for column, text in enumerate(numbers):
+                    surface = self.small_font.render(text, True, WHITE)
+                    right = 5 + name_width + (column + 1) * column_width
+                    batch.append((surface, surface.get_rect(topright=(right, y))))
+            self.overlay.blits(batch, doreturn=False)
+        
+        rect = self.screen.blit(self.overlay, (4, 4))
+        # Restored from the field layer next frame
+        self.overlay_rect = rect
+        return [rect]
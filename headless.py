@@ -0,0 +1,278 @@
+"""
+Headless entry point: run the simulation without a display, or benchmark the tick path.
+
+    python3 headless.py run --days 1000 --width 64 --height 64 --density 0.3 --random-actions
+    python3 headless.py run --minutes 5000 --script actions.json
+    python3 headless.py run --days 5 --profile trace.json
+    python3 headless.py replay session_inputs.jsonl
+    python3 headless.py recover --days 3 --width 40 --height 30
+    python3 headless.py bench --sizes 18x17,64x64,256x256 --densities 0,0.25,1 --output bench.json
+    python3 headless.py bench --compare bench.json --tolerance 0.2
+    python3 headless.py farms --farms 2000 --shards 8 --days 2
+    python3 headless.py chunks --chunks 16 --days 2 --save map.fgcm --check
+    python3 headless.py serve --port 7777 --tick 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from farming_game.data.constants import GAME_DAY_LENGTH, FIELD_WIDTH, FIELD_HEIGHT, CHUNK_SIZE, CHUNK_IDLE_TICKS
+from farming_game.core.game_manager import GameManager
+from farming_game.core.chunked_field import ChunkedField
+from farming_game.core.profiler import Profiler
+from farming_game.core.simulation import (HeadlessRunner, RandomPlayer, ScriptedPlayer, populate_field,
+                                          run_benchmark, find_regressions, replay_session, check_recovery,
+                                          ChunkWalker, run_chunked, check_chunk_paging,
+                                          DEFAULT_BENCH_SIZES, DEFAULT_BENCH_DENSITIES)
+from farming_game.server.farms import FarmServer
+from farming_game.server.network import GameServer
+
+
+def parse_sizes(text: str):
+    sizes = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def parse_densities(text: str):
+    return [float(item) for item in text.split(",")]
+
+
+def run_command(args) -> int:
+    game_manager = GameManager(args.width, args.height, seed=args.seed)
+    populate_field(game_manager, args.density, random.Random(args.seed))
+
+    player = None
+    if args.script:
+        with open(args.script) as f:
+            player = ScriptedPlayer(json.load(f))
+    elif args.random_actions:
+        player = RandomPlayer(random.Random(args.seed), args.action_rate)
+
+    ticks = args.minutes if args.minutes is not None else args.days * GAME_DAY_LENGTH
+    runner = HeadlessRunner(game_manager, timestep=args.timestep, player=player, quiet=not args.verbose)
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        profiler.attach(game_manager, game_manager.plant_system, game_manager.field)
+    report = runner.run(ticks, trace_memory=args.trace_memory)
+    print(report.format())
+    if profiler is not None:
+        profiler.detach()
+        for name, count, (p50, p95, p99) in profiler.summary():
+            print(f"  {name:<34} {count:>9} calls  p50 {p50:.3f}  p95 {p95:.3f}  p99 {p99:.3f} ms")
+        print(f"Wrote {profiler.export(args.profile)} spans to {args.profile}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return 0
+
+
+def bench_command(args) -> int:
+    def progress(result):
+        print(f"{result['width']:>5}x{result['height']:<5} density {result['density']:<5} "
+              f"{result['ticks_per_second']:>12,.0f} ticks/sec")
+
+    results = run_benchmark(parse_sizes(args.sizes), parse_densities(args.densities),
+                            ticks=args.ticks, seed=args.seed, progress=progress)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+def farms_command(args) -> int:
+    server = FarmServer(shards=args.shards, workers=args.workers)
+    try:
+        for i in range(args.farms):
+            game_manager = GameManager(args.width, args.height, seed=args.seed + i)
+            populate_field(game_manager, args.density, random.Random(args.seed + i))
+            server.add_farm(game_manager)
+
+        minutes = args.days * GAME_DAY_LENGTH
+        start = time.perf_counter()
+        advanced = 0
+        while advanced < minutes:
+            step = min(args.step, minutes - advanced)
+            server.advance(step)
+            advanced += step
+        elapsed = time.perf_counter() - start
+    finally:
+        server.close()
+
+    farm_minutes = args.farms * minutes
+    woken = server.farms_woken
+    print(f"{args.farms} farms x {minutes} minutes in {elapsed:.3f}s "
+          f"-> {farm_minutes / elapsed:,.0f} farm-minutes/sec")
+    print(f"  {woken:,} wake-ups ({woken / farm_minutes:.1%} of farm-minutes)")
+    return 0
+
+
+def chunks_command(args) -> int:
+    extent = args.chunks * CHUNK_SIZE
+    if args.load:
+        world = ChunkedField.load(args.load, args.idle_ticks, args.page_dir)
+    else:
+        world = ChunkedField(idle_ticks=args.idle_ticks, page_dir=args.page_dir, seed=args.seed)
+    walker = ChunkWalker(world, random.Random(args.seed), extent)
+    if not args.load:
+        walker.populate(args.density)
+
+    ticks = args.minutes if args.minutes is not None else args.days * GAME_DAY_LENGTH
+    start = time.perf_counter()
+    run_chunked([walker], ticks, world.tick)
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} minutes on a {extent}x{extent} map in {elapsed:.3f}s -> {ticks / elapsed:,.0f} ticks/sec")
+    print(f"  {world.loaded_count} chunks loaded, {world.paged_count} paged out")
+    if args.save:
+        size = world.save(args.save)
+        print(f"Saved {world.loaded_count + world.paged_count} chunks ({size:,} bytes) to {args.save}")
+
+    if args.check:
+        page_dir = os.path.join(args.page_dir, "check") if args.page_dir else None
+        mismatches = check_chunk_paging(extent, args.density, ticks, args.idle_ticks, args.seed, page_dir)
+        if mismatches:
+            print(f"MISMATCH {'; '.join(mismatches)}")
+            return 1
+        print(f"Paged and loaded-from-save maps match the always-loaded one after {ticks} ticks")
+    return 0
+
+
+def replay_command(args) -> int:
+    report = replay_session(args.log, quiet=not args.verbose)
+    print(report.format())
+    return 0 if report.verified else 1
+
+
+def recover_command(args) -> int:
+    ticks = args.days * GAME_DAY_LENGTH
+    failed = False
+    # Both growth paths: the scalar one is what players without NumPy recover with
+    for vectorized in (True, False):
+        label = "vectorized" if vectorized else "scalar"
+        mismatches = check_recovery(args.width, args.height, args.density, ticks, args.seed, vectorized)
+        if mismatches:
+            failed = True
+            print(f"{label} growth: MISMATCH {'; '.join(mismatches)}")
+        else:
+            print(f"{label} growth: recovered farm matches the live one after {ticks} ticks")
+    return 1 if failed else 0
+
+
+def serve_command(args) -> int:
+    async def serve():
+        server = GameServer(GameManager(args.width, args.height), tick_seconds=args.tick)
+        listener = await server.start(args.host, args.port, path=args.unix)
+        for address in (sock.getsockname() for sock in listener.sockets):
+            print(f"Serving on {address}")
+        try:
+            await server.run()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the farming simulation without a display.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="simulate a farm and report timings")
+    run.add_argument("--days", type=int, default=10)
+    run.add_argument("--minutes", type=int, help="simulate this many game minutes instead of --days")
+    run.add_argument("--width", type=int, default=FIELD_WIDTH)
+    run.add_argument("--height", type=int, default=FIELD_HEIGHT)
+    run.add_argument("--density", type=float, default=0.0, help="fraction of cells planted up front")
+    run.add_argument("--timestep", type=float, default=1.0, help="seconds of game time per update")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--random-actions", action="store_true")
+    run.add_argument("--action-rate", type=float, default=0.2)
+    run.add_argument("--script", help="JSON list of {tick, action, ...} entries")
+    run.add_argument("--trace-memory", action="store_true", help="track peak Python allocations (slower)")
+    run.add_argument("--output", help="write the report as JSON")
+    run.add_argument("--profile", help="record timing spans and write them here (.csv, else Chrome trace JSON)")
+    run.add_argument("--verbose", action="store_true", help="keep the game's own console output")
+    run.set_defaults(handler=run_command)
+
+    bench = commands.add_parser("bench", help="benchmark the tick path over grid sizes and crop densities")
+    bench.add_argument("--sizes", default=",".join(f"{w}x{h}" for w, h in DEFAULT_BENCH_SIZES))
+    bench.add_argument("--densities", default=",".join(str(d) for d in DEFAULT_BENCH_DENSITIES))
+    bench.add_argument("--ticks", type=int, default=GAME_DAY_LENGTH)
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--output", help="write results as JSON")
+    bench.add_argument("--compare", help="baseline results JSON; exit 1 on regressions")
+    bench.add_argument("--tolerance", type=float, default=0.2, help="allowed ticks/sec drop vs baseline")
+    bench.set_defaults(handler=bench_command)
+
+    farms = commands.add_parser("farms", help="host many farms on the shared scheduler and report throughput")
+    farms.add_argument("--farms", type=int, default=1000)
+    farms.add_argument("--days", type=int, default=1)
+    farms.add_argument("--width", type=int, default=FIELD_WIDTH)
+    farms.add_argument("--height", type=int, default=FIELD_HEIGHT)
+    farms.add_argument("--density", type=float, default=0.1, help="fraction of cells planted up front")
+    farms.add_argument("--shards", type=int, help="farm groups advanced independently (default: CPU count)")
+    farms.add_argument("--workers", type=int, help="0 runs every shard in this process instead of one worker process each")
+    farms.add_argument("--step", type=int, default=60, help="game minutes per server advance")
+    farms.add_argument("--seed", type=int, default=0)
+    farms.set_defaults(handler=farms_command)
+
+    chunks = commands.add_parser("chunks", help="play a large chunked map with idle chunks paged out")
+    chunks.add_argument("--chunks", type=int, default=16, help="map side in chunks, for planting and walking")
+    chunks.add_argument("--days", type=int, default=1)
+    chunks.add_argument("--minutes", type=int, help="simulate this many game minutes instead of --days")
+    chunks.add_argument("--density", type=float, default=0.1, help="fraction of cells planted up front")
+    chunks.add_argument("--idle-ticks", type=int, default=CHUNK_IDLE_TICKS, help="0 keeps every chunk loaded")
+    chunks.add_argument("--page-dir", help="page idle chunks out to files here instead of memory")
+    chunks.add_argument("--seed", type=int, default=0)
+    chunks.add_argument("--load", help="continue a map saved with --save instead of planting a new one")
+    chunks.add_argument("--save", help="save the map here at the end")
+    chunks.add_argument("--check", action="store_true",
+                        help="also check that paging and saving leave the map as if every chunk stayed loaded")
+    chunks.set_defaults(handler=chunks_command)
+
+    replay = commands.add_parser("replay", help="replay a recorded game session and verify its final state")
+    replay.add_argument("log", help="input log written by the game (see INPUT_LOG_PATH)")
+    replay.add_argument("--verbose", action="store_true", help="keep the game's own console output")
+    replay.set_defaults(handler=replay_command)
+
+    recover = commands.add_parser("recover", help="check that journaled autosaves recover a farm exactly")
+    recover.add_argument("--days", type=int, default=3)
+    recover.add_argument("--width", type=int, default=40)
+    recover.add_argument("--height", type=int, default=30)
+    recover.add_argument("--density", type=float, default=0.2, help="fraction of cells planted up front")
+    recover.add_argument("--seed", type=int, default=0)
+    recover.set_defaults(handler=recover_command)
+
+    serve = commands.add_parser("serve", help="run one farm as a network game server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=7777)
+    serve.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    serve.add_argument("--tick", type=float, default=0.1, help="seconds of game time per server tick")
+    serve.add_argument("--width", type=int, default=FIELD_WIDTH)
+    serve.add_argument("--height", type=int, default=FIELD_HEIGHT)
+    serve.set_defaults(handler=serve_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
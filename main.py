@@ -1,22 +1,51 @@
 """
 Main game loop and entry point for the farming game - refactored with modules.
 """
+import contextlib
 import pygame
 import sys
-from farming_game.data.data_classes import Position, InteractionResult
+import time
+from farming_game.data.data_classes import Position, InteractionResult, CELL_SPRINKLER
 from farming_game.data.constants import *
 from farming_game.core.game_manager import GameManager
+from farming_game.core.profiler import Profiler
+from farming_game.core.input_log import InputLog
+from farming_game.core.simulation import perform_action
+from farming_game.core.game_loop import FixedStepClock, SimulationThread
+from farming_game.core.sim_process import SimulationProcess
 from farming_game.ui.renderer import UI
 
 class FarmingGame:
-    def __init__(self):
+    def __init__(self, threaded_simulation: bool = False, simulation_process: bool = False):
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Farming & Foraging Game")
         self.clock = pygame.time.Clock()
         
         self.game_manager = GameManager()
+        # The farm advances in fixed one-minute steps, here, on a thread of its own or in a worker process
+        self.step_clock = FixedStepClock()
+        self.simulation = None
+        self.worker = None
+        self.input_log = None
+        self.view = self.game_manager  # what is drawn and read for display
+        self.farm_lock = contextlib.nullcontext()  # held while changing the farm
+        if simulation_process:
+            # The worker owns the farm from here on; it autosaves and logs the inputs itself
+            self.worker = SimulationProcess(self.game_manager, INPUT_LOG_PATH, autosave=True)
+            self.view = self.worker.mirror
+        else:
+            self.game_manager.enable_autosave(journal=True)
+            # Every action goes through perform() and is logged, so the session can be replayed headless
+            self.input_log = InputLog.open(INPUT_LOG_PATH)
+            self.input_log.start(self.game_manager)
+        if threaded_simulation and not self.worker:
+            self.simulation = SimulationThread(self.game_manager, self.step_clock, on_step=self.input_log.note_update)
+            self.view = self.simulation.reset_mirror()
+            self.farm_lock = self.simulation.lock
+        
         self.ui = UI(self.screen)
+        self.profiler = Profiler()  # attached (and shown) with F3
         self.running = True
         self.message = ""
         self.message_timer = 0
@@ -39,6 +68,9 @@ class FarmingGame:
             
             elif event.type == pygame.KEYDOWN:
                 self.handle_keypress(event.key)
+            
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.ui.invalidate()
         
         # Handle continuous movement with held keys
         self.handle_held_keys()
@@ -52,29 +84,34 @@ class FarmingGame:
             return
         
         keys = pygame.key.get_pressed()
-        player = self.game_manager.player
         moved = False
         
         # Movement with held keys
         if keys[pygame.K_w] or keys[pygame.K_UP]:
-            moved = player.move(Position(0, -1))
+            moved = self.perform("move", dx=0, dy=-1)
         elif keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            moved = player.move(Position(0, 1))
+            moved = self.perform("move", dx=0, dy=1)
         elif keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            moved = player.move(Position(-1, 0))
+            moved = self.perform("move", dx=-1, dy=0)
         elif keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            moved = player.move(Position(1, 0))
+            moved = self.perform("move", dx=1, dy=0)
         
         # Update last move time if we actually moved
         if moved:
             self.last_move_time = current_time
     
+    def perform(self, action: str, **params):
+        """Apply a player action to the farm, logging it for replay."""
+        if self.worker:
+            return self.worker.perform(action, **params)
+        with self.farm_lock:
+            self.input_log.record(action, **params)
+            result = perform_action(self.game_manager, action, **params)
+            if self.simulation:
+                self.simulation.publish()
+        return result
+    
     def handle_keypress(self, key):
-        player = self.game_manager.player
-        plant_system = self.game_manager.plant_system
-        forage_system = self.game_manager.forage_system
-        storage = self.game_manager.storage_system
-        
         # Inventory selection with TAB
         if key == pygame.K_TAB:
             self.cycle_inventory_selection()
@@ -98,24 +135,76 @@ class FarmingGame:
         elif key == pygame.K_x:
             self.ship_items()
         
+        elif key == pygame.K_r:
+            self.toggle_sprinkler()
+        
+        # Profiling
+        elif key == pygame.K_F3:
+            self.toggle_profiler()
+        
+        elif key == pygame.K_F4:
+            self.export_profile()
+        
         # Save/Load
         elif key == pygame.K_q and pygame.key.get_pressed()[pygame.K_LCTRL]:
-            if self.game_manager.save_game():
-                self.show_message("Game saved!")
+            # Written in the background; update() reports the outcome
+            if self.worker:
+                self.worker.save_game_async()
             else:
-                self.show_message("Save failed!")
+                with self.farm_lock:
+                    self.game_manager.save_game_async()
+            self.show_message("Saving...")
         
         elif key == pygame.K_l and pygame.key.get_pressed()[pygame.K_LCTRL]:
-            if self.game_manager.load_game():
+            if self.worker:
+                loaded = self.worker.load_game()
+            else:
+                loaded = self.load_game()
+            if loaded:
+                self.ui.invalidate()
                 self.show_message("Game loaded!")
             else:
                 self.show_message("Load failed!")
     
+    def load_game(self) -> bool:
+        with self.farm_lock:
+            # Let a save still in flight land before reading the file back
+            self.game_manager.autosaver.flush()
+            self.input_log.end()
+            loaded = self.game_manager.load_game()
+            # Replay restarts from whatever the load left
+            self.input_log.start(self.game_manager, snapshot=True)
+            if self.simulation:
+                self.view = self.simulation.reset_mirror()
+        return loaded
+    
+    def toggle_profiler(self):
+        if self.profiler.enabled:
+            self.profiler.detach()
+            self.ui.invalidate()  # the overlay may cover the side panel
+            self.show_message("Profiler off")
+        else:
+            game_manager = self.game_manager
+            if self.worker:
+                # The farm is simulated in the worker; only this process's loop and drawing are timed
+                self.profiler.attach(self, self.ui)
+            else:
+                self.profiler.attach(self, game_manager, game_manager.plant_system, game_manager.field, self.ui)
+            self.show_message("Profiler on")
+    
+    def export_profile(self, filename: str = PROFILE_EXPORT_PATH):
+        try:
+            events = self.profiler.export(filename)
+            self.show_message(f"Exported {events} spans to {filename}")
+        except OSError as e:
+            print(f"Failed to export profile: {e}")
+            self.show_message("Profile export failed!")
+    
     def cycle_inventory_selection(self):
         # Create full inventory list with empty hands + items + empty slots
         max_slots = MAX_INVENTORY_SLOTS
         inventory_slots = [None]  # Empty hands
-        inventory_slots.extend(list(self.game_manager.player.inventory.keys()))
+        inventory_slots.extend(list(self.view.player.inventory.keys()))
         
         # Fill remaining slots with unique empty slot identifiers
         empty_slot_count = 0
@@ -141,11 +230,7 @@ class FarmingGame:
             return
         
         plant_type = self.selected_inventory_item.replace("_seeds", "")
-        result = self.game_manager.plant_system.plant_seed(
-            self.game_manager.player, 
-            self.game_manager.player.position, 
-            plant_type
-        )
+        result = self.perform("plant", plant=plant_type)
         
         if result == InteractionResult.SUCCESS:
             self.show_message(f"Planted {plant_type}!")
@@ -157,7 +242,7 @@ class FarmingGame:
             self.show_message("Can't plant here!")
     
     def water_plant(self):
-        result = self.game_manager.plant_system.water_plant(self.game_manager.player.position)
+        result = self.perform("water")
         
         if result == InteractionResult.SUCCESS:
             self.show_message("Plant watered!")
@@ -165,10 +250,7 @@ class FarmingGame:
             self.show_message("Nothing to water here!")
     
     def harvest_plant(self):
-        result = self.game_manager.plant_system.harvest_plant(
-            self.game_manager.player, 
-            self.game_manager.player.position
-        )
+        result = self.perform("harvest")
         
         if result == InteractionResult.SUCCESS:
             self.show_message("Harvested!")
@@ -178,10 +260,7 @@ class FarmingGame:
             self.show_message("Nothing to harvest!")
     
     def forage_item(self):
-        result = self.game_manager.forage_system.forage_item(
-            self.game_manager.player, 
-            self.game_manager.player.position
-        )
+        result = self.perform("forage")
         
         if result == InteractionResult.SUCCESS:
             self.show_message("Foraged item!")
@@ -189,7 +268,7 @@ class FarmingGame:
             self.show_message("Nothing to forage!")
     
     def buy_seeds(self):
-        pos = self.game_manager.player.position
+        pos = self.view.player.position
         if not self.game_manager.storage_system.is_seed_shop_position(pos.x, pos.y):
             self.show_message("No seed shop here!")
             return
@@ -200,9 +279,7 @@ class FarmingGame:
         else:
             plant_type = "carrot"  # Default to cheapest seed
         
-        result = self.game_manager.storage_system.buy_seeds(
-            self.game_manager.player, plant_type, 1
-        )
+        result = self.perform("buy", plant=plant_type, quantity=1)
         
         if result == InteractionResult.SUCCESS:
             self.show_message(f"Bought {plant_type} seeds!")
@@ -214,23 +291,56 @@ class FarmingGame:
             self.show_message("Can't buy seeds!")
     
     def ship_items(self):
-        pos = self.game_manager.player.position
+        pos = self.view.player.position
         if not self.game_manager.storage_system.is_shipping_position(pos.x, pos.y):
             self.show_message("No shipping container here!")
             return
         
-        earnings = self.game_manager.storage_system.ship_items(self.game_manager.player)
+        earnings = self.perform("ship")
         if earnings > 0:
             self.show_message(f"Shipped items for ${earnings}!")
         else:
             self.show_message("Nothing to ship!")
     
+    def toggle_sprinkler(self):
+        # Picks up the sprinkler under the player, otherwise places one
+        view = self.view
+        cell = view.field.get_cell(view.player.position)
+        if cell and view.field.cell_type[cell.index] == CELL_SPRINKLER:
+            if self.perform("remove_sprinkler") == InteractionResult.SUCCESS:
+                self.show_message(f"Picked up sprinkler, +${SPRINKLER_COST}")
+            return
+        
+        result = self.perform("place_sprinkler")
+        if result == InteractionResult.SUCCESS:
+            self.show_message("Sprinkler placed!")
+        elif result == InteractionResult.NO_MONEY:
+            self.show_message(f"Need ${SPRINKLER_COST} for a sprinkler!")
+        else:
+            self.show_message("Can't place a sprinkler here!")
+    
     def show_message(self, text: str):
         self.message = text
         self.message_timer = pygame.time.get_ticks() + MESSAGE_DISPLAY_TIME
     
     def update(self, delta_time):
-        self.game_manager.update(delta_time)
+        if self.worker:
+            self.worker.refresh()
+        elif self.simulation is None:
+            # Catch up in whole minutes; after a very slow frame the game runs late rather than skip
+            for _ in range(self.step_clock.advance(delta_time)):
+                self.game_manager.step()
+                self.input_log.note_update()
+        else:
+            self.view.apply(self.simulation.frames)
+        
+        # Report background saves that finished
+        autosaver = self.worker or self.game_manager.autosaver
+        for result in autosaver.poll_results():
+            if result.reason == "manual":
+                self.show_message("Game saved!" if result.success else "Save failed!")
+            elif not result.success:
+                self.show_message("Autosave failed!")
         
         # Update message timer
         if self.message_timer > 0 and pygame.time.get_ticks() > self.message_timer:
@@ -238,36 +348,53 @@ class FarmingGame:
             self.message_timer = 0
         
         # Unlock gigantic pumpkin on day 3
-        if (self.game_manager.game_state.day >= 3 and 
+        if (self.view.game_state.day >= 3 and 
             "gigantic_pumpkin" not in self.plant_types):
             self.plant_types.append("gigantic_pumpkin")
             self.show_message("Gigantic Pumpkin seeds unlocked!")
     
     def draw(self):
-        self.screen.fill(BLACK)
-        
-        # Draw game elements
-        self.ui.draw_field(self.game_manager, self.selected_inventory_item)
-        self.ui.draw_ui_panel(self.game_manager)
-        self.ui.draw_bottom_inventory(self.game_manager, self.selected_inventory_item)
+        # Draw game elements, collecting the screen areas that changed
+        dirty_rects = self.ui.draw_field(self.view, self.selected_inventory_item)
+        dirty_rects += self.ui.draw_ui_panel(self.view)
+        dirty_rects += self.ui.draw_bottom_inventory(self.view, self.selected_inventory_item)
         
         # Draw message if active
         if self.message:
-            self.ui.draw_message(self.message)
+            dirty_rects += self.ui.draw_message(self.message)
         
-        pygame.display.flip()
+        if self.profiler.enabled:
+            dirty_rects += self.ui.draw_profiler(self.profiler)
+        
+        self.ui.present(dirty_rects)
     
     def run(self):
+        if self.simulation:
+            self.simulation.start()
+        if self.worker:
+            self.worker.start()
         while self.running:
             delta_time = self.clock.tick(FPS) / 1000.0  # Convert to seconds
+            frame_start = time.perf_counter_ns()
             
             self.handle_events()
             self.update(delta_time)
             self.draw()
+            
+            if self.profiler.enabled:
+                self.profiler.record("frame", frame_start)
         
+        if self.simulation:
+            self.simulation.stop()
+        if self.worker:
+            self.worker.stop()
+        else:
+            self.game_manager.autosaver.flush()
+            self.input_log.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = FarmingGame()
+    game = FarmingGame(threaded_simulation="--sim-thread" in sys.argv,
+                       simulation_process="--sim-process" in sys.argv)
     game.run()
\ No newline at end of file